@@ -0,0 +1,54 @@
+"""Runtime and peak memory of eafpy.get_diff_eaf with 3 objectives.
+
+Each dataset has as many runs as tests/test_data/spherical-250-10-3d.txt,
+split in two halves, and each run is a set of mutually nondominated points
+sampled uniformly on the positive orthant of the unit sphere.  The number of
+points per run is 250 times each scale.  The peak memory is the maximum
+resident set size of the process, so the scales are run in increasing order.
+
+Usage: python benchmarks/bench_diff_eaf_3d.py [--runs N] [--scale N ...]
+"""
+import argparse
+import resource
+import sys
+import time
+
+import numpy as np
+import eafpy as eaf
+
+
+def sphere_runs(nruns, npoints, first_run=1, seed=0):
+    rng = np.random.default_rng(seed + first_run)
+    points = np.abs(rng.standard_normal((nruns * npoints, 3)))
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    runs = np.repeat(np.arange(first_run, first_run + nruns), npoints)
+    return np.column_stack((points, runs))
+
+
+def peak_rss_mib():
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kibibytes elsewhere.
+    return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 2**10
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="runs of both datasets")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    half = args.runs // 2
+    print(f"{'points/run':>10} {'seconds':>8} {'EAF points':>11} {'peak MiB':>9}")
+    for scale in sorted(args.scale):
+        npoints = 250 * scale
+        x = sphere_runs(half, npoints)
+        y = sphere_runs(args.runs - half, npoints, first_run=half + 1)
+        start = time.perf_counter()
+        diff = eaf.get_diff_eaf(x, y)
+        elapsed = time.perf_counter() - start
+        print(f"{npoints:>10} {elapsed:>8.3f} {len(diff):>11} {peak_rss_mib():>9.0f}")
+        del diff
+
+
+if __name__ == "__main__":
+    main()
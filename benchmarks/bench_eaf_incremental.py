@@ -0,0 +1,61 @@
+"""Cost of adding runs to eafpy.EAF versus recomputing eafpy.get_eaf.
+
+Runs of 2 objectives arrive in batches.  After each batch, the EAF of all
+levels and the EAF at a few percentiles are obtained either from an
+eafpy.EAF to which the batch is added, or by calling eafpy.get_eaf on all
+the runs seen so far.
+
+Usage: python benchmarks/bench_eaf_incremental.py [--batch N] [--batches N] [--points N] [--report N]
+"""
+import argparse
+import time
+
+import numpy as np
+import eafpy as eaf
+
+
+def sphere_runs(nruns, npoints, first_run=0, seed=0):
+    rng = np.random.default_rng(seed + first_run)
+    points = np.abs(rng.standard_normal((nruns * npoints, 2)))
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    runs = np.repeat(np.arange(first_run, first_run + nruns), npoints)
+    return np.column_stack((points, runs))
+
+
+def timed(f):
+    start = time.perf_counter()
+    f()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=1, help="runs per batch")
+    parser.add_argument("--points", type=int, default=20, help="points per run")
+    parser.add_argument("--batches", type=int, default=500)
+    parser.add_argument("--report", type=int, default=100, help="report every N runs")
+    args = parser.parse_args()
+
+    percentiles = [10, 50, 90]
+    all_levels = eaf.EAF()
+    some_levels = eaf.EAF()
+    data = np.empty((0, 3))
+    print(f"{'':>6} {'all levels':>22} {'3 percentiles':>22}")
+    print(
+        f"{'runs':>6} {'update':>10} {'recompute':>11} {'update':>10} {'recompute':>11}"
+    )
+    for b in range(args.batches):
+        batch = sphere_runs(args.batch, args.points, first_run=b * args.batch)
+        data = np.vstack((data, batch))
+        times = [
+            timed(lambda: all_levels.add(batch).get()),
+            timed(lambda: eaf.get_eaf(data)),
+            timed(lambda: some_levels.add(batch).get(percentiles)),
+            timed(lambda: eaf.get_eaf(data, percentiles)),
+        ]
+        if all_levels.nruns % args.report == 0:
+            print(f"{all_levels.nruns:>6}", " ".join(f"{t:>10.4f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Runtime of eafpy.get_eaf versus the number of objectives, runs and points.
+
+Each run is a set of mutually nondominated points sampled uniformly on the
+positive orthant of the unit sphere.  More than three objectives use a sweep
+that computes a 3-objective EAF for each combination of distinct values of
+the objectives beyond the third, so the number of these computations is
+also reported.
+
+Usage: python benchmarks/bench_eaf_nobj.py [--repeat N]
+"""
+import argparse
+import timeit
+
+import numpy as np
+import eafpy as eaf
+
+
+def sphere_dataset(nobj, nruns, npoints, seed=0):
+    rng = np.random.default_rng(seed)
+    points = np.abs(rng.standard_normal((nruns * npoints, nobj)))
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    runs = np.repeat(np.arange(1, nruns + 1), npoints)
+    return np.column_stack((points, runs))
+
+
+def bench(nobj, nruns, npoints, repeat):
+    data = sphere_dataset(nobj, nruns, npoints)
+    times = timeit.repeat(lambda: eaf.get_eaf(data), number=1, repeat=repeat)
+    return min(times), eaf3d_calls(data[:, :-1])
+
+
+def eaf3d_calls(points):
+    """Number of 3-objective EAFs computed by the sweep over the objectives beyond the third"""
+    if points.shape[1] <= 3:
+        return int(points.shape[1] == 3)
+    last = points[:, -1]
+    return sum(eaf3d_calls(points[last <= z, :-1]) for z in np.unique(last))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cases = [
+        # Objectives
+        *[(nobj, 10, 10) for nobj in [2, 3, 4, 5]],
+        # Runs
+        *[(4, nruns, 20) for nruns in [5, 10, 20]],
+        # Points per run
+        *[(4, 10, npoints) for npoints in [10, 20, 40]],
+    ]
+    print(f"{'nobj':>4} {'runs':>5} {'points':>6} {'seconds':>10} {'eaf3d calls':>12}")
+    for nobj, nruns, npoints in cases:
+        seconds, calls = bench(nobj, nruns, npoints, args.repeat)
+        print(f"{nobj:>4} {nruns:>5} {npoints:>6} {seconds:>10.4f} {calls:>12}")
+
+
+if __name__ == "__main__":
+    main()
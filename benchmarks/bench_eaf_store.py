@@ -0,0 +1,114 @@
+"""Runtime and peak memory of the ways of storing the runs that attain each EAF point.
+
+libeaf stores, for each point of the EAF, either one bit per run
+(EAF_STORE_BITS), nothing (EAF_STORE_NONE), or the number of runs of x and
+of y that attain it (EAF_STORE_LEFT_RIGHT).  eafpy.get_eaf stores the bits
+only with return_attained=True, and eafpy.get_diff_eaf stores the counts.
+For each number of runs, this script times:
+
+  bits        get_eaf(data, return_attained=True)
+  none        get_eaf(data)
+  diff-bits   get_diff_eaf computed from the bits of get_eaf of x and y
+  left-right  get_diff_eaf(x, y)
+
+Each run is a set of mutually nondominated points sampled uniformly on the
+positive orthant of the unit sphere, and half the runs are x.  Every case
+runs in a fresh Python process, and its peak memory is the growth of the
+maximum resident set size once the data has been created.
+
+Usage: python benchmarks/bench_eaf_store.py [--runs N ...] [--points N] [--nobj N]
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import eafpy as eaf
+
+CASES = ["bits", "none", "diff-bits", "left-right"]
+
+
+def sphere_runs(nruns, npoints, nobj, first_run=1, seed=0):
+    rng = np.random.default_rng(seed + first_run)
+    points = np.abs(rng.standard_normal((nruns * npoints, nobj)))
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    runs = np.repeat(np.arange(first_run, first_run + nruns), npoints)
+    return np.column_stack((points, runs))
+
+
+def peak_rss_mib():
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kibibytes elsewhere.
+    return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 2**10
+
+
+# Number of bits set in each byte.
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def diff_from_bits(x, y, chunk=1 << 16):
+    """get_diff_eaf(x, y) computed from the runs that attain each point"""
+    nx, ny = len(np.unique(x[:, -1])), len(np.unique(y[:, -1]))
+    points, attained = eaf.get_eaf(np.vstack((x, y)), return_attained=True)
+    # Bit k of each row is run k, so the runs of x are the first nx bits.
+    mask = np.packbits(np.arange(attained.shape[1] * 8) < nx, bitorder="little")
+    left = np.empty(len(points))
+    total = np.empty(len(points))
+    # The bits are counted by chunks of rows, to use little memory.
+    for i in range(0, len(points), chunk):
+        rows = attained[i : i + chunk]
+        left[i : i + chunk] = POPCOUNT[rows & mask].sum(axis=1)
+        total[i : i + chunk] = POPCOUNT[rows].sum(axis=1)
+    intervals = (nx + ny) // 2
+    diff = intervals * (left / nx - (total - left) / ny)
+    return np.column_stack((points[:, :-1], diff))
+
+
+def run_case(case, nruns, npoints, nobj):
+    half = nruns // 2
+    x = sphere_runs(half, npoints, nobj)
+    y = sphere_runs(nruns - half, npoints, nobj, first_run=half + 1)
+    data = np.vstack((x, y))
+    f = {
+        "bits": lambda: eaf.get_eaf(data, return_attained=True)[0],
+        "none": lambda: eaf.get_eaf(data),
+        "diff-bits": lambda: diff_from_bits(x, y),
+        "left-right": lambda: eaf.get_diff_eaf(x, y),
+    }[case]
+    base = peak_rss_mib()
+    start = time.perf_counter()
+    result = f()
+    elapsed = time.perf_counter() - start
+    return dict(seconds=elapsed, points=len(result), peak_mib=peak_rss_mib() - base)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--points", type=int, default=20, help="points per run")
+    parser.add_argument("--nobj", type=int, default=2)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_case(args.child, args.runs[0], args.points, args.nobj)
+        print(json.dumps(result))
+        return
+
+    print(f"{'runs':>6} {'case':>10} {'seconds':>8} {'EAF points':>11} {'peak MiB':>9}")
+    for nruns in args.runs:
+        for case in CASES:
+            cmd = [sys.executable, __file__, "--child", case, "--runs", str(nruns)]
+            cmd += ["--points", str(args.points), "--nobj", str(args.nobj)]
+            out = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            r = json.loads(out.stdout)
+            print(
+                f"{nruns:>6} {case:>10} {r['seconds']:>8.3f} {r['points']:>11} {r['peak_mib']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Cost of eafpy.hypervolume_trajectory versus recomputing eafpy.hypervolume.
+
+A run of 3 objectives finds one point per evaluation, and the hypervolume of
+the points found so far is reported at a number of checkpoints, either by
+eafpy.hypervolume_trajectory, which updates it with each point, or by
+calling eafpy.hypervolume on each prefix.  The points are either sampled
+uniformly in the unit cube, so that few of them are nondominated, or on the
+positive orthant of the unit sphere, so that all of them are.
+
+Usage: python benchmarks/bench_hv_trajectory.py [--points N ...] [--checkpoints N]
+"""
+import argparse
+import time
+
+import numpy as np
+import eafpy as eaf
+
+
+def run_points(kind, npoints, seed=0):
+    rng = np.random.default_rng(seed)
+    if kind == "cube":
+        return rng.random((npoints, 3))
+    points = np.abs(rng.standard_normal((npoints, 3)))
+    return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, nargs="+", default=[1000, 6000, 20000])
+    parser.add_argument("--checkpoints", type=int, default=100)
+    args = parser.parse_args()
+
+    ref = [1.1, 1.1, 1.1]
+    print(
+        f"{'points':>7} {'kind':>6} {'trajectory':>11} {'recompute':>10} {'max error':>10}"
+    )
+    for npoints in args.points:
+        for kind in ["cube", "sphere"]:
+            points = run_points(kind, npoints)
+            time = np.arange(1, npoints + 1)
+            checkpoints = np.linspace(1, npoints, args.checkpoints).round()
+            t_traj, trajectory = timed(
+                lambda: eaf.hypervolume_trajectory(points, time, ref, checkpoints)
+            )
+            t_full, full = timed(
+                lambda: [eaf.hypervolume(points[: int(c)], ref) for c in checkpoints]
+            )
+            error = np.max(np.abs(trajectory[:, 1] - full))
+            print(
+                f"{npoints:>7} {kind:>6} {t_traj:>11.3f} {t_full:>10.3f} {error:>10.2g}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""Benchmark suite of the hot paths of eafpy, with per-machine baselines.
+
+Each case times one function on synthetic data of a given number of points
+(n), objectives (nobj) and sets (nsets), generated with
+eafpy.generate_nondominated_sets.  Every case runs in a fresh Python process,
+so its peak memory (maximum resident set size) can be measured: the peak
+reported is the growth of the peak above the memory in use once the data has
+been created.  On Linux, the peak is reset after creating the data, so that
+memory freed during the setup does not hide the peak of the function.  The
+time is the minimum over several calls.  The "import" case times importing
+eafpy in a new interpreter, and reports the peak memory of that process.
+
+Baselines are stored in benchmarks/baselines/<machine>.json, where the
+machine tag is derived from the host name, architecture and Python version
+(or given with --machine), because timings are only comparable on the same
+machine.  With --check, the run fails if any case is slower, or uses more
+memory, than its baseline by more than the threshold.
+
+Usage:
+    python benchmarks/suite.py [--quick] [-k PATTERN] [--save] [--check] [--threshold F]
+"""
+import argparse
+import atexit
+import itertools
+import json
+import lzma
+import os
+import platform
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import eafpy as eaf
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def _dataset(n, nobj, nsets, seed=0):
+    return eaf.generate_nondominated_sets(
+        n // nsets, nobj=nobj, nsets=nsets, method="sphere", seed=seed
+    )
+
+
+def _points(n, nobj, seed=0):
+    return np.ascontiguousarray(_dataset(n, nobj, 1, seed)[:, :-1])
+
+
+def _write_dataset(data, filename):
+    opener = lzma.open if filename.endswith(".xz") else open
+    with opener(filename, "wt") as f:
+        for s in np.unique(data[:, -1]):
+            np.savetxt(f, data[data[:, -1] == s, :-1])
+            f.write("\n")
+
+
+def _setup_read(compressed):
+    def setup(n, nobj, nsets):
+        tmpdir = tempfile.mkdtemp()
+        atexit.register(shutil.rmtree, tmpdir, ignore_errors=True)
+        filename = os.path.join(tmpdir, "data.txt" + (".xz" if compressed else ""))
+        _write_dataset(_dataset(n, nobj, nsets), filename)
+        return lambda: eaf.read_datasets(filename)
+
+    return setup
+
+
+def _setup_is_nondominated(n, nobj, nsets):
+    # Half of the points are dominated.
+    points = _points(n // 2, nobj)
+    data = np.ascontiguousarray(np.vstack((points, points + 0.1)))
+    return lambda: eaf.is_nondominated(data)
+
+
+def _setup_filter_dominated_sets(n, nobj, nsets):
+    data = _dataset(n, nobj, nsets)
+    data = np.vstack((data, data + np.append(np.full(nobj, 0.1), 0)))
+    return lambda: eaf.filter_dominated_sets(data)
+
+
+def _setup_unary(f, **kwargs):
+    def setup(n, nobj, nsets):
+        data = _points(n, nobj)
+        ref = _points(min(max(n // 10, 10), 1000), nobj, seed=1) * 0.9
+        return lambda: f(data, ref, **kwargs)
+
+    return setup
+
+
+def _setup_hypervolume(n, nobj, nsets):
+    data = _points(n, nobj)
+    ref = np.full(nobj, 1.1)
+    return lambda: eaf.hypervolume(data, ref)
+
+
+def _setup_normalise(n, nobj, nsets):
+    data = _points(n, nobj)
+    return lambda: eaf.normalise(data)
+
+
+def _setup_get_eaf(n, nobj, nsets):
+    data = _dataset(n, nobj, nsets)
+    return lambda: eaf.get_eaf(data)
+
+
+def _setup_get_diff_eaf(n, nobj, nsets):
+    x = _dataset(n // 2, nobj, nsets // 2)
+    y = _dataset(n // 2, nobj, nsets // 2, seed=1)
+    return lambda: eaf.get_diff_eaf(x, y)
+
+
+def _setup_import(**params):
+    # Plotting is imported lazily, so this only imports the numerical API.
+    args = [sys.executable, "-c", "import eafpy"]
+    return lambda: subprocess.run(args, check=True)
+
+
+def _grid(n, nobj, nsets=(1,)):
+    return [
+        dict(n=a, nobj=b, nsets=c)
+        for a, b, c in itertools.product(n, nobj, nsets)
+        if a >= 2 * c
+    ]
+
+
+# name: (setup, full parameter grid, quick parameter grid)
+BENCHMARKS = {
+    "import": (_setup_import, [{}], [{}]),
+    "read_datasets": (
+        _setup_read(False),
+        _grid([10_000, 100_000], [2, 5], [10]),
+        _grid([10_000], [2], [10]),
+    ),
+    "read_datasets_xz": (
+        _setup_read(True),
+        _grid([10_000, 100_000], [2, 5], [10]),
+        _grid([10_000], [2], [10]),
+    ),
+    "is_nondominated": (
+        _setup_is_nondominated,
+        _grid([1000, 10_000, 30_000], [2, 3, 5]),
+        _grid([10_000], [2, 3]),
+    ),
+    "filter_dominated_sets": (
+        _setup_filter_dominated_sets,
+        _grid([10_000, 50_000], [2, 3], [10, 100]),
+        _grid([10_000], [2], [10]),
+    ),
+    "hypervolume": (
+        _setup_hypervolume,
+        _grid([1000, 10_000, 100_000], [2, 3]) + _grid([500, 1000], [4, 5]),
+        _grid([10_000], [2, 3]) + _grid([500], [5]),
+    ),
+    "igd": (
+        _setup_unary(eaf.igd),
+        _grid([1000, 10_000, 100_000], [2, 5]),
+        _grid([10_000], [2]),
+    ),
+    "igd_plus": (
+        _setup_unary(eaf.igd_plus),
+        _grid([1000, 10_000, 100_000], [2, 5]),
+        _grid([10_000], [2]),
+    ),
+    "avg_hausdorff_dist": (
+        _setup_unary(eaf.avg_hausdorff_dist),
+        _grid([1000, 10_000, 100_000], [2, 5]),
+        _grid([10_000], [2]),
+    ),
+    "epsilon_additive": (
+        _setup_unary(eaf.epsilon_additive),
+        _grid([1000, 10_000, 100_000], [2, 5]),
+        _grid([10_000], [2]),
+    ),
+    "epsilon_mult": (
+        _setup_unary(eaf.epsilon_mult),
+        _grid([1000, 10_000, 100_000], [2, 5]),
+        _grid([10_000], [2]),
+    ),
+    "normalise": (
+        _setup_normalise,
+        _grid([10_000, 1_000_000], [2, 5]),
+        _grid([10_000], [2]),
+    ),
+    "get_eaf": (
+        _setup_get_eaf,
+        _grid([10_000, 100_000], [2], [10, 100])
+        + _grid([2500, 10_000], [3], [10, 20])
+        + _grid([500], [4], [10]),
+        _grid([10_000], [2], [10]) + _grid([2500], [3], [10]),
+    ),
+    "get_diff_eaf": (
+        _setup_get_diff_eaf,
+        _grid([10_000, 100_000], [2], [10, 100]) + _grid([2500, 10_000], [3], [10]),
+        _grid([10_000], [2], [10]) + _grid([2500], [3], [10]),
+    ),
+}
+
+
+def case_id(name, params):
+    if not params:
+        return name
+    return f"{name}[{','.join(f'{k}={v}' for k, v in params.items())}]"
+
+
+def machine_tag():
+    tag = f"{platform.node()}-{platform.machine()}-py{sys.version_info[0]}{sys.version_info[1]}"
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", tag)
+
+
+def reset_peak_rss():
+    """Reset the peak resident set size (Linux only); return whether it was."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def rss_mib(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 2**10
+    raise ValueError(f"{field} not found in /proc/self/status")
+
+
+def peak_rss_mib(who=resource.RUSAGE_SELF):
+    maxrss = resource.getrusage(who).ru_maxrss
+    # Bytes on macOS, kibibytes elsewhere.
+    return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 2**10
+
+
+def run_case(name, params, min_time, max_repeat):
+    """Run one case in this process and return its time and peak memory."""
+    f = BENCHMARKS[name][0](**params)
+    if reset_peak_rss():
+        base = rss_mib("VmRSS")
+        peak = lambda: rss_mib("VmHWM")
+    else:
+        base = peak_rss_mib()
+        peak = peak_rss_mib
+    times = []
+    start = time.perf_counter()
+    while not times or (
+        len(times) < max_repeat and time.perf_counter() - start < min_time
+    ):
+        t = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - t)
+    # Cases that run a child process report the peak of the child.
+    peak_mib = max(peak() - base, peak_rss_mib(resource.RUSAGE_CHILDREN))
+    return dict(time=min(times), peak_mib=peak_mib, repeat=len(times))
+
+
+def run_case_subprocess(name, params, min_time, max_repeat):
+    args = [sys.executable, os.path.abspath(__file__), "--child", name]
+    args += [json.dumps(params), str(min_time), str(max_repeat)]
+    out = subprocess.run(args, check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def compare(result, baseline, threshold, min_peak_mib):
+    """Return the reasons why RESULT is a regression with respect to BASELINE."""
+    reasons = []
+    if result["time"] > baseline["time"] * (1 + threshold):
+        reasons.append(f"time x{result['time'] / baseline['time']:.2f}")
+    if result["peak_mib"] > max(baseline["peak_mib"], min_peak_mib) * (1 + threshold):
+        reasons.append(
+            f"peak {baseline['peak_mib']:.1f} -> {result['peak_mib']:.1f} MiB"
+        )
+    return reasons
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="run small sizes only")
+    parser.add_argument("-k", default="", help="only run the cases matching this regex")
+    parser.add_argument("--machine", default=machine_tag(), help="baseline tag")
+    parser.add_argument("--save", action="store_true", help="save results as baseline")
+    parser.add_argument(
+        "--check", action="store_true", help="fail on regressions from the baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="allowed relative increase of time and memory (default: 0.25)",
+    )
+    parser.add_argument(
+        "--min-time", type=float, default=0.5, help="seconds to repeat each case"
+    )
+    parser.add_argument("--max-repeat", type=int, default=50)
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        name, params, min_time, max_repeat = args.child
+        result = run_case(name, json.loads(params), float(min_time), int(max_repeat))
+        print(json.dumps(result))
+        return 0
+
+    baseline_file = os.path.join(BASELINES_DIR, f"{args.machine}.json")
+    baseline = {}
+    if os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            baseline = json.load(f)["results"]
+    elif args.check:
+        parser.error(f"no baseline for machine '{args.machine}' ({baseline_file})")
+
+    results = {}
+    regressions = []
+    print(f"{'case':<52} {'seconds':>10} {'peak MiB':>9} {'baseline':>10}")
+    for name, (_, full, quick) in BENCHMARKS.items():
+        for params in quick if args.quick else full:
+            cid = case_id(name, params)
+            if not re.search(args.k, cid):
+                continue
+            result = run_case_subprocess(name, params, args.min_time, args.max_repeat)
+            results[cid] = result
+            line = f"{cid:<52} {result['time']:>10.5f} {result['peak_mib']:>9.1f}"
+            if cid in baseline:
+                line += f" {baseline[cid]['time']:>10.5f}"
+                # Small peaks are dominated by noise, so 1 MiB is the minimum.
+                reasons = compare(result, baseline[cid], args.threshold, 1.0)
+                if reasons:
+                    regressions.append(cid)
+                    line += "  REGRESSION: " + ", ".join(reasons)
+            print(line, flush=True)
+
+    if args.save:
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        saved = {}
+        if os.path.exists(baseline_file):
+            with open(baseline_file) as f:
+                saved = json.load(f)["results"]
+        saved.update(results)
+        with open(baseline_file, "w") as f:
+            json.dump(
+                dict(
+                    machine=args.machine,
+                    platform=platform.platform(),
+                    processor=platform.processor(),
+                    python=platform.python_version(),
+                    numpy=np.__version__,
+                    eafpy=eaf.__version__,
+                    results=saved,
+                ),
+                f,
+                indent=1,
+                sort_keys=True,
+            )
+        print(f"Saved {len(results)} results to {baseline_file}")
+
+    if args.check and regressions:
+        print(f"{len(regressions)} regressions beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
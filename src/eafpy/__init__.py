@@ -1,6 +1,9 @@
 from .eaf import read_datasets, ReadDatasetsError
 from .eaf import (
     hypervolume,
+    hypervolume_trajectory,
+    hypervolume_trajectory_sets,
+    hv_subset_selection,
     igd,
     igd_plus,
     avg_hausdorff_dist,
@@ -12,13 +15,52 @@ from .eaf import (
     subset,
     data_subset,
     normalise_sets,
+    pipeline,
     filter_dominated_sets,
     get_eaf,
+    get_eaf_many,
+    iter_eaf,
+    EAF,
+    AttainmentIndex,
+    vorobev_threshold,
+    vorobev_expectation,
+    vorobev_deviation,
     get_diff_eaf,
+    eaf_permutation_test,
     rand_non_dominated_sets,
+    generate_nondominated_sets,
 )
-from .plot import plot_datasets, plot_eaf
+from ._profiling import profiling, Profile, CallStats, PhaseStats
+from ._cache import caching, ResultCache
 
 import importlib.metadata as _metadata
 
 __version__ = _metadata.version(__package__ or __name__)
+
+
+# The plotting functions need plotly, pandas and matplotlib, which take longer
+# to import than the rest of the package, so they are only imported when
+# first accessed.
+_lazy_attributes = {
+    "plot_datasets": ".plot",
+    "plot_eaf": ".plot",
+    "plot": ".plot",
+    "colour": ".colour",
+    "aio": ".aio",
+    "parallel": ".parallel",
+}
+
+
+def __getattr__(name):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    module = importlib.import_module(_lazy_attributes[name], __name__)
+    value = module if module.__name__ == f"{__name__}.{name}" else getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes))
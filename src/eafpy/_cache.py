@@ -0,0 +1,273 @@
+"""Opt-in cache of the results of eafpy, keyed by the contents of the inputs
+
+The key of a call is a digest of the function name and all its arguments,
+including the bytes of the arrays, so identical inputs hit the cache even if
+they are different arrays.  The results of :func:`eafpy.read_datasets` are
+keyed by the path, modification time and size of the file instead.
+"""
+import contextlib
+import contextvars
+import functools
+import hashlib
+import inspect
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# The cache installed by caching() in the current thread or asyncio task.
+_active = contextvars.ContextVar("eafpy_cache", default=None)
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _digest(x, h):
+    if isinstance(x, np.ndarray):
+        h.update(f"ndarray{x.shape}{x.dtype.str}".encode())
+        h.update(np.ascontiguousarray(x).data)
+    elif isinstance(x, (list, tuple)):
+        h.update(f"{type(x).__name__}{len(x)}".encode())
+        for y in x:
+            _digest(y, h)
+    elif x is None or isinstance(x, (bool, int, float, str, np.number, np.bool_)):
+        h.update(repr(x).encode())
+    else:
+        raise _Uncacheable()
+
+
+def _key(name, args, kwargs):
+    """A digest of the function name and arguments, or None if the result cannot be reused"""
+    # Calls that write to their arguments must all run.
+    if kwargs.get("out") is not None or kwargs.get("inplace"):
+        return None
+    h = hashlib.blake2b(name.encode())
+    try:
+        _digest(args, h)
+        _digest(sorted(kwargs.items()), h)
+    except _Uncacheable:
+        return None
+    return h.hexdigest()
+
+
+def _file_key(name, filename):
+    filename = os.path.realpath(os.path.expanduser(filename))
+    stat = os.stat(filename)
+    return _key(name, (filename, stat.st_mtime_ns, stat.st_size), {})
+
+
+def _nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(_nbytes(x) for x in value)
+    return 64
+
+
+def _read_only(value):
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, tuple):
+        for x in value:
+            _read_only(x)
+    return value
+
+
+class ResultCache:
+    """Cache of results in memory, and optionally on disk
+
+    Install it with :func:`caching`. The cached arrays are read-only, because they are returned to every \
+    call with the same inputs.
+
+    Parameters
+    ----------
+    maxbytes : int
+        Maximum size of the results kept in memory. The least recently used results are evicted first.
+    directory : str, optional
+        Directory where the results are also stored, as ``.npz`` files, so that they persist across processes. \
+        It is created if it does not exist, and it is never pruned.
+
+    Attributes
+    ----------
+    hits, misses : int
+        Number of calls whose result was, or was not, found in the cache.
+    nbytes : int
+        Size of the results kept in memory.
+    """
+
+    def __init__(self, maxbytes=256 * 2**20, directory=None):
+        if maxbytes < 0:
+            raise ValueError(f"'maxbytes' must be non-negative ({maxbytes} given)")
+        self.maxbytes = maxbytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Remove all the results from memory (not from the directory)"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+        found, value = self._load(key)
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if found:
+            self._put_memory(key, value)
+        return found, value
+
+    def put(self, key, value):
+        value = _read_only(value)
+        self._put_memory(key, value)
+        self._save(key, value)
+
+    def _put_memory(self, key, value):
+        nbytes = _nbytes(value)
+        if nbytes > self.maxbytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.maxbytes:
+                _, (_, size) = self._entries.popitem(last=False)
+                self.nbytes -= size
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def _save(self, key, value):
+        if self.directory is None:
+            return
+        if isinstance(value, np.ndarray):
+            kind, arrays = "array", [value]
+        elif isinstance(value, float):
+            kind, arrays = "float", [np.array(value)]
+        elif isinstance(value, tuple) and all(isinstance(x, np.ndarray) for x in value):
+            kind, arrays = "tuple", list(value)
+        else:
+            return
+        # Written to a temporary file first, so readers never see a partial file.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, *arrays, kind=np.array(kind))
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def _load(self, key):
+        if self.directory is None:
+            return False, None
+        try:
+            with np.load(self._path(key), allow_pickle=False) as npz:
+                kind = str(npz["kind"])
+                arrays = [npz[f"arr_{i}"] for i in range(len(npz.files) - 1)]
+        except (OSError, ValueError, KeyError):
+            return False, None
+        if kind == "float":
+            return True, float(arrays[0])
+        value = arrays[0] if kind == "array" else tuple(arrays)
+        return True, _read_only(value)
+
+
+@contextlib.contextmanager
+def caching(maxbytes=256 * 2**20, directory=None):
+    """Reuse the results of eafpy for identical inputs inside a ``with`` block
+
+    While the block runs, the results of :func:`read_datasets`, :func:`get_eaf`, :func:`get_diff_eaf`, \
+    :func:`hypervolume`, the IGD and epsilon indicators and the Vorob'ev functions are stored in a \
+    :class:`ResultCache`, and returned again by any call with identical arguments. The arrays are compared \
+    by contents (with a BLAKE2 digest), and the files read by :func:`read_datasets` by path, modification time \
+    and size. Calls given an `out` array are not cached. The cache is only used by the calls made in the same \
+    thread or asyncio task (including the calls of :mod:`eafpy.aio` awaited there), so concurrent blocks \
+    do not interfere.
+
+    Parameters
+    ----------
+    maxbytes : int
+        Maximum size of the results kept in memory, which are evicted in least recently used order.
+    directory : str, optional
+        Also store the results in this directory, so that later processes reuse them.
+
+    Returns
+    -------
+    ResultCache
+        The cache, with the number of hits and misses.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> with eaf.caching() as cache:
+    ...     x = eaf.get_eaf(dataset, percentiles = [50])
+    ...     y = eaf.get_eaf(dataset.copy(), percentiles = [50])
+    >>> x is y, cache.hits, cache.misses
+    (True, 1, 1)
+    """
+    cache = ResultCache(maxbytes, directory)
+    token = _active.set(cache)
+    try:
+        yield cache
+    finally:
+        _active.reset(token)
+
+
+def cached(f=None, file_arg=None):
+    """Reuse the results of `f` from the installed cache
+
+    If `file_arg` is given, it is the name of the argument with the name of a file, which is hashed by path, \
+    modification time and size instead of by the arguments.
+    """
+    if f is None:
+        return functools.partial(cached, file_arg=file_arg)
+    signature = inspect.signature(f)
+    name = f"{f.__module__}.{f.__qualname__}"
+
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        cache = _active.get()
+        if cache is None:
+            return f(*args, **kwargs)
+        # Arguments given by position, by name or by default have the same key.
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        if file_arg is not None:
+            try:
+                key = _file_key(name, bound.arguments[file_arg])
+            except OSError:
+                return f(*args, **kwargs)
+        else:
+            key = _key(name, (), bound.arguments)
+        if key is None:
+            return f(*args, **kwargs)
+        found, value = cache.get(key)
+        if found:
+            return value
+        value = f(*args, **kwargs)
+        cache.put(key, value)
+        return value
+
+    return wrapper
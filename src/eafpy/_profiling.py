@@ -0,0 +1,400 @@
+"""Opt-in profiling of the functions of eafpy and of the phases of libeaf
+
+Profiling is enabled inside a :func:`profiling` block, or for the whole
+session by setting the environment variable ``EAFPY_PROFILE``.  While it is
+disabled, a profiled function costs a single test of a global list.
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from eafpy.c_bindings import lib, ffi
+
+# The profiles being recorded, innermost last.
+_profiles = []
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class PhaseStats:
+    """A phase of libeaf run by a profiled call
+
+    Attributes
+    ----------
+    name : str
+        Name of the phase, for example ``"read_datasets.parse"``, ``"eaf2d"``, ``"eaf3d"``, ``"eafnd"`` (the sweep \
+        computing the attainment surfaces) or ``"get_eaf.copy"`` (the copy of the result).
+    start : float
+        Start time, in seconds since the start of the profile.
+    wall : float
+        Wall time, in seconds.
+    npoints : int
+        Number of points processed.
+    nbytes : int
+        Bytes allocated by libeaf for the result of the phase.
+    depth : int
+        Number of enclosing phases.
+    """
+
+    __slots__ = ("name", "start", "wall", "npoints", "nbytes", "depth")
+
+    def __init__(self, name, start, wall, npoints, nbytes, depth):
+        self.name = name
+        self.start = start
+        self.wall = wall
+        self.npoints = npoints
+        self.nbytes = nbytes
+        self.depth = depth
+
+    def __repr__(self):
+        return (
+            f"PhaseStats({self.name!r}, wall={self.wall:.6f}, npoints={self.npoints})"
+        )
+
+
+class CallStats:
+    """A call to a profiled function of eafpy
+
+    Attributes
+    ----------
+    name : str
+        Name of the function.
+    thread : int
+        Identifier of the thread that made the call.
+    start : float
+        Start time, in seconds since the start of the profile.
+    wall : float
+        Wall time, in seconds.
+    npoints : int or None
+        Number of rows of the first array argument (or list of arrays), or of the result if there is none.
+    nbytes : int
+        Bytes allocated by libeaf for the results of the phases of the call.
+    phases : list of PhaseStats
+        The phases of libeaf run by the call, in order.
+    depth : int
+        Number of enclosing profiled calls.
+    """
+
+    __slots__ = (
+        "name",
+        "thread",
+        "start",
+        "wall",
+        "npoints",
+        "nbytes",
+        "phases",
+        "depth",
+    )
+
+    def __init__(self, name, thread, start, wall, npoints, phases, depth):
+        self.name = name
+        self.thread = thread
+        self.start = start
+        self.wall = wall
+        self.npoints = npoints
+        self.phases = phases
+        self.nbytes = sum(p.nbytes for p in phases)
+        self.depth = depth
+
+    @property
+    def c_time(self):
+        """Wall time spent in the outermost phases of libeaf run by the thread of the call, in seconds."""
+        return sum(p.wall for p in self.phases if p.depth == 0)
+
+    @property
+    def python_time(self):
+        """Wall time spent outside libeaf (validation, conversion and grouping in Python), in seconds."""
+        return self.wall - self.c_time
+
+    def __repr__(self):
+        return f"CallStats({self.name!r}, wall={self.wall:.6f}, npoints={self.npoints})"
+
+
+class Profile:
+    """Calls recorded by :func:`profiling`
+
+    Attributes
+    ----------
+    calls : list of CallStats
+        The calls, in the order in which they finished. Calls made by other profiled calls are included, \
+        with a positive `depth`.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self._start_ns = time.perf_counter_ns()
+
+    def _add(self, name, thread, start_ns, end_ns, npoints, events, depth):
+        start = (start_ns - self._start_ns) / 1e9
+        phases = [
+            PhaseStats(pname, (t - self._start_ns) / 1e9, wall, n, b, d)
+            for pname, t, wall, n, b, d in events
+        ]
+        call = CallStats(
+            name, thread, start, (end_ns - start_ns) / 1e9, npoints, phases, depth
+        )
+        with _lock:
+            self.calls.append(call)
+
+    def summary(self):
+        """Aggregate the calls and phases by name
+
+        Returns
+        -------
+        dict
+            For the name of each function, and of each phase prefixed by the name of the function and a slash, \
+            a dict with the number of ``calls``, the total ``wall``, ``c_time`` and ``python_time``, in seconds, \
+            and the total ``npoints`` and ``nbytes``.
+        """
+        summary = {}
+
+        def add(name, wall, c_time, npoints, nbytes):
+            s = summary.setdefault(
+                name,
+                dict(
+                    calls=0, wall=0.0, c_time=0.0, python_time=0.0, npoints=0, nbytes=0
+                ),
+            )
+            s["calls"] += 1
+            s["wall"] += wall
+            s["c_time"] += c_time
+            s["python_time"] += wall - c_time
+            s["npoints"] += npoints or 0
+            s["nbytes"] += nbytes
+
+        for call in self.calls:
+            add(call.name, call.wall, call.c_time, call.npoints, call.nbytes)
+            for p in call.phases:
+                if call.depth == 0:
+                    add(f"{call.name}/{p.name}", p.wall, p.wall, p.npoints, p.nbytes)
+        return summary
+
+    def report(self, file=None):
+        """Print the summary as a table, sorted by decreasing wall time"""
+        summary = sorted(self.summary().items(), key=lambda x: -x[1]["wall"])
+        print(
+            f"{'name':<40} {'calls':>6} {'wall s':>10} {'C s':>10} {'Python s':>10} {'points':>10} {'MiB':>8}",
+            file=file,
+        )
+        for name, s in summary:
+            print(
+                f"{name:<40} {s['calls']:>6} {s['wall']:>10.4f} {s['c_time']:>10.4f} "
+                f"{s['python_time']:>10.4f} {s['npoints']:>10} {s['nbytes'] / 2**20:>8.1f}",
+                file=file,
+            )
+
+    def to_dict(self):
+        """The calls and their phases as a dict that can be written as JSON"""
+        return dict(
+            calls=[
+                dict(
+                    {k: getattr(call, k) for k in CallStats.__slots__ if k != "phases"},
+                    c_time=call.c_time,
+                    python_time=call.python_time,
+                    phases=[
+                        {k: getattr(p, k) for k in PhaseStats.__slots__}
+                        for p in call.phases
+                    ],
+                )
+                for call in self.calls
+            ],
+            summary=self.summary(),
+        )
+
+    def to_json(self, filename):
+        """Write :meth:`to_dict` to a JSON file"""
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    def to_chrome_trace(self, filename=None):
+        """Convert the calls and their phases to the Chrome trace event format
+
+        The result can be opened with ``chrome://tracing`` or https://ui.perfetto.dev.
+
+        Parameters
+        ----------
+        filename : str, optional
+            If given, write the trace to this JSON file.
+
+        Returns
+        -------
+        dict
+            The trace, with one complete event (``"ph": "X"``) per call and per phase.
+        """
+        pid = os.getpid()
+        events = []
+        for call in self.calls:
+            events.append(
+                dict(
+                    name=call.name,
+                    cat="python",
+                    ph="X",
+                    ts=call.start * 1e6,
+                    dur=call.wall * 1e6,
+                    pid=pid,
+                    tid=call.thread,
+                    args=dict(npoints=call.npoints, nbytes=call.nbytes),
+                )
+            )
+            if call.depth > 0:
+                # The phases are already in the enclosing call.
+                continue
+            for p in call.phases:
+                events.append(
+                    dict(
+                        name=p.name,
+                        cat="libeaf",
+                        ph="X",
+                        ts=p.start * 1e6,
+                        dur=p.wall * 1e6,
+                        pid=pid,
+                        tid=call.thread,
+                        args=dict(npoints=p.npoints, nbytes=p.nbytes),
+                    )
+                )
+        trace = dict(traceEvents=events, displayTimeUnit="ms")
+        if filename is not None:
+            with open(filename, "w") as f:
+                json.dump(trace, f)
+        return trace
+
+
+def _start(profile):
+    with _lock:
+        _profiles.append(profile)
+        lib.eaf_profile_enable_(True)
+
+
+def _stop(profile):
+    with _lock:
+        _profiles.remove(profile)
+        lib.eaf_profile_enable_(len(_profiles) > 0)
+
+
+@contextlib.contextmanager
+def profiling(trace=None):
+    """Profile the calls to eafpy made inside a ``with`` block
+
+    Each call to a function of eafpy records its wall time, the number of points processed and the phases of the C \
+    library that it runs, such as parsing the input file, the sweep that computes the attainment surfaces and the \
+    copy of the result, with their wall time, points and bytes allocated. The wall time not spent in the C library \
+    is the time spent in Python validating, converting and grouping the data.
+
+    Setting the environment variable ``EAFPY_PROFILE`` before importing eafpy profiles the whole session: if its \
+    value ends with ``.json``, a Chrome trace is written to that file at exit, otherwise a report is printed to \
+    the standard error.
+
+    Parameters
+    ----------
+    trace : str, optional
+        Write a Chrome trace of the calls to this JSON file at the end of the block.
+
+    Returns
+    -------
+    Profile
+        The calls recorded, which are available after the block.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> with eaf.profiling() as prof:
+    ...     x = eaf.get_eaf(dataset)
+    >>> call = prof.calls[0]
+    >>> call.name, call.npoints
+    ('get_eaf', 100)
+    >>> [p.name for p in call.phases][:4]
+    ['group_sets', 'eaf2d', 'get_eaf.copy', 'eaf.copy']
+    >>> sorted(prof.summary()["get_eaf/eaf2d"])
+    ['c_time', 'calls', 'nbytes', 'npoints', 'python_time', 'wall']
+    """
+    profile = Profile()
+    _start(profile)
+    try:
+        yield profile
+    finally:
+        _stop(profile)
+        if trace is not None:
+            profile.to_chrome_trace(trace)
+
+
+def _npoints(args, result):
+    for x in args:
+        if isinstance(x, np.ndarray):
+            return x.shape[0] if x.ndim > 0 else 1
+        if isinstance(x, (list, tuple)) and x and isinstance(x[0], np.ndarray):
+            return sum(len(y) for y in x)
+    if isinstance(result, np.ndarray) and result.ndim > 0:
+        return result.shape[0]
+    return None
+
+
+def _profile_call(f, args, kwargs):
+    depth = getattr(_local, "depth", 0)
+    nevents = ffi.new("int *")
+    lib.eaf_profile_events_(nevents)
+    first = nevents[0]
+    _local.depth = depth + 1
+    c_start = lib.eaf_profile_now_()
+    start = time.perf_counter_ns()
+    result = None
+    try:
+        result = f(*args, **kwargs)
+        return result
+    finally:
+        end = time.perf_counter_ns()
+        _local.depth = depth
+        c_events = lib.eaf_profile_events_(nevents)
+        # The clock of libeaf is converted to the clock of perf_counter_ns.
+        events = [
+            (
+                ffi.string(e.name).decode(),
+                start + (e.start_ns - c_start),
+                (e.end_ns - e.start_ns) / 1e9,
+                e.npoints,
+                e.nbytes,
+                e.depth,
+            )
+            for e in (c_events[i] for i in range(first, nevents[0]))
+        ]
+        if depth == 0:
+            lib.eaf_profile_clear_()
+        npoints = _npoints(args, result)
+        thread = threading.get_ident()
+        for profile in list(_profiles):
+            profile._add(f.__name__, thread, start, end, npoints, events, depth)
+
+
+def profiled(f):
+    """Record the calls to `f` in the active profiles"""
+
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        if not _profiles:
+            return f(*args, **kwargs)
+        return _profile_call(f, args, kwargs)
+
+    return wrapper
+
+
+def _profile_session(destination):
+    profile = Profile()
+    _start(profile)
+
+    def finish():
+        _stop(profile)
+        if destination.endswith(".json"):
+            profile.to_chrome_trace(destination)
+        else:
+            profile.report(file=sys.stderr)
+
+    atexit.register(finish)
+
+
+if os.environ.get("EAFPY_PROFILE"):
+    _profile_session(os.environ["EAFPY_PROFILE"])
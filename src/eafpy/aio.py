@@ -0,0 +1,221 @@
+"""Awaitable versions of the functions of eafpy, for use with asyncio
+
+The computations run on a thread pool managed by this module, so they do not
+block the event loop.  The C library releases the GIL, so several of them run
+in parallel.  At most `max_concurrency` calls run at the same time in each
+event loop; the others wait without occupying the thread pool.  Concurrent
+calls of the same function with identical arguments are coalesced: the
+computation runs once and all callers receive the same result, so the result
+must not be modified in place.  Calls given an `out` array, or `inplace`, are
+never coalesced.
+
+Cancelling a call that has not started yet prevents it from running.  A call
+that has started runs in C until it finishes, but its result is discarded if
+all the callers waiting for it were cancelled.
+
+Examples
+--------
+>>> import asyncio
+>>> import eafpy.aio
+>>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+>>> async def main():
+...     return await asyncio.gather(
+...         eafpy.aio.get_eaf(dataset, percentiles=[50]),
+...         eafpy.aio.hypervolume(eaf.data_subset(dataset, set=1), ref=[10, 10]),
+...     )
+>>> median, hv = asyncio.run(main())
+>>> median.shape, round(hv, 6)
+((15, 3), 90.462728)
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import inspect
+import threading
+import weakref
+
+import numpy as np
+
+from . import eaf
+from ._cache import _key
+
+_lock = threading.Lock()
+_executor = None
+_max_workers = None
+_max_concurrency = None
+# State of each event loop: the semaphore that bounds the concurrency and the
+# calls in progress, by key.
+_loops = weakref.WeakKeyDictionary()
+
+# Inputs larger than this are hashed in the thread pool, to avoid blocking the
+# event loop while hashing.
+_HASH_INLINE_BYTES = 1 << 20
+
+
+def configure(max_workers=None, max_concurrency=None):
+    """Configure the thread pool and the bound of concurrent calls
+
+    Calls in progress are not affected.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of threads of the pool. By default, the default of :class:`concurrent.futures.ThreadPoolExecutor`.
+    max_concurrency : int, optional
+        Maximum number of calls running at the same time in each event loop. By default, `max_workers`.
+    """
+    global _executor, _max_workers, _max_concurrency
+    if max_workers is not None and max_workers < 1:
+        raise ValueError(f"'max_workers' must be at least 1 ({max_workers} given)")
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError(
+            f"'max_concurrency' must be at least 1 ({max_concurrency} given)"
+        )
+    with _lock:
+        old, _executor = _executor, None
+        _max_workers = max_workers
+        _max_concurrency = max_concurrency
+        _loops.clear()
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+def shutdown(wait=True):
+    """Shut down the thread pool, which is created again by the next call"""
+    global _executor
+    with _lock:
+        old, _executor = _executor, None
+        _loops.clear()
+    if old is not None:
+        old.shutdown(wait=wait)
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_max_workers, thread_name_prefix="eafpy-aio"
+            )
+        return _executor
+
+
+class _LoopState:
+    def __init__(self, executor):
+        self.semaphore = asyncio.Semaphore(_max_concurrency or executor._max_workers)
+        self.calls = {}
+
+
+def _loop_state(loop, executor):
+    with _lock:
+        state = _loops.get(loop)
+        if state is None:
+            state = _loops[loop] = _LoopState(executor)
+        return state
+
+
+def _call_key(name, signature, args, kwargs):
+    # Arguments given by position, by name or by default have the same key,
+    # and calls given `out` or `inplace`, in any way, have none.
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        return None  # The call itself reports the error.
+    bound.apply_defaults()
+    return _key(name, (), bound.arguments)
+
+
+def _nbytes(args, kwargs):
+    return sum(
+        x.nbytes
+        for x in list(args) + list(kwargs.values())
+        if isinstance(x, np.ndarray)
+    )
+
+
+class _Call:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+def _release(loop, semaphore):
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        pass  # The event loop is closed.
+
+
+async def _run(state, executor, f, args, kwargs):
+    loop = asyncio.get_running_loop()
+    await state.semaphore.acquire()
+    try:
+        # In the context of the caller, e.g., to use its eafpy.caching() block.
+        future = executor.submit(contextvars.copy_context().run, f, *args, **kwargs)
+    except BaseException:
+        state.semaphore.release()
+        raise
+    # The semaphore is released when the computation finishes, which may be
+    # after the call is cancelled, since C code cannot be interrupted.
+    future.add_done_callback(lambda _: _release(loop, state.semaphore))
+    return await asyncio.wrap_future(future, loop=loop)
+
+
+async def _call(f, signature, args, kwargs):
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    state = _loop_state(loop, executor)
+    key_args = (f.__name__, signature, args, kwargs)
+    if _nbytes(args, kwargs) <= _HASH_INLINE_BYTES:
+        key = _call_key(*key_args)
+    else:
+        key = await loop.run_in_executor(executor, _call_key, *key_args)
+
+    call = state.calls.get(key) if key is not None else None
+    if call is None:
+        call = _Call(loop.create_task(_run(state, executor, f, args, kwargs)))
+        if key is not None:
+            state.calls[key] = call
+            call.task.add_done_callback(lambda _: state.calls.pop(key, None))
+    call.waiters += 1
+    try:
+        # The computation is shared, so cancelling one caller must not cancel it.
+        return await asyncio.shield(call.task)
+    except asyncio.CancelledError:
+        if call.waiters == 1:
+            call.task.cancel()
+        raise
+    finally:
+        call.waiters -= 1
+
+
+def _awaitable(f):
+    signature = inspect.signature(f)
+
+    @functools.wraps(f, assigned=("__name__", "__qualname__"))
+    async def wrapper(*args, **kwargs):
+        return await _call(f, signature, args, kwargs)
+
+    wrapper.__doc__ = f"""Awaitable version of :func:`eafpy.{f.__name__}`
+
+    It runs on the thread pool of :mod:`eafpy.aio` and takes the same arguments.
+    """
+    return wrapper
+
+
+read_datasets = _awaitable(eaf.read_datasets)
+hypervolume = _awaitable(eaf.hypervolume)
+igd = _awaitable(eaf.igd)
+igd_plus = _awaitable(eaf.igd_plus)
+avg_hausdorff_dist = _awaitable(eaf.avg_hausdorff_dist)
+epsilon_additive = _awaitable(eaf.epsilon_additive)
+epsilon_mult = _awaitable(eaf.epsilon_mult)
+is_nondominated = _awaitable(eaf.is_nondominated)
+filter_dominated = _awaitable(eaf.filter_dominated)
+filter_dominated_sets = _awaitable(eaf.filter_dominated_sets)
+get_eaf = _awaitable(eaf.get_eaf)
+get_diff_eaf = _awaitable(eaf.get_diff_eaf)
+vorobev_threshold = _awaitable(eaf.vorobev_threshold)
+vorobev_expectation = _awaitable(eaf.vorobev_expectation)
+vorobev_deviation = _awaitable(eaf.vorobev_deviation)
@@ -15,16 +15,48 @@ ffibuilder = cffi.FFI()
 # FIXME: Can we generate this automatically or read it from a pyeaf.h file?
 ffibuilder.cdef(
     """
+    void free(void *);
     int read_datasets_(const char * filename, double **data_p, int *ncols_p, int *datasize_p);
     double fpli_hv(const double *data, int d, int n, const double *ref);
+    void hv_trajectory_ (double *hv, const double *data, int nobj, const int *cumsizes, int nsets, const double *ref, const int *counts, int ncounts);
+    double hv_subset_greedy_ (const double *data, int nobj, int npoints, const double *ref, int k, int *selected);
+    double hv_subset_exact2d_ (const double *data, int npoints, const double *ref, int k, int *selected);
     double igd_C (const double *data, int nobj, int npoints, const double *ref, int ref_size, const bool * maximise);
     double igd_plus_C (const double *data, int nobj, int npoints, const double *ref, int ref_size, const bool * maximise);
     double avg_Hausdorff_dist_C (const double *data, int nobj, int npoints, const double *ref, int ref_size, const bool * maximise, unsigned int p);
     bool * is_nondominated_(const double * data, int nobj, int npoint, const bool * maximise, bool keep_weakly);
     double epsilon_ (const double *data, int nobj, int data_npoints, const double *ref, int ref_npoints, const bool * maximise, bool is_add);
-    void normalise_(double *data, int nobj, int npoints, const bool * maximise, const double lower_range, const double upper_range, const double * lbounds, const double * ubounds);
-    double * get_eaf_(double *data, int ncols, int npoints, double * percentiles, int npercentiles, bool choose_percentiles, int nsets, int * eaf_npoints, int * sizeof_eaf, bool debug);
-    double * compute_eafdiff_(double *data, int ncols, int npoints, int nsets, int num_intervals, int *return_num_points, int * sizeof_return_vector, bool debug);
+    void normalise_sets_(const double *data, double *out, int nobj, int ncols, int npoints, const int *set_idx, int nsets, const bool * maximise, const double lower_range, const double upper_range, const double * lower, const double * upper, bool per_set);
+    void pipeline_sets_(const double *data, int nobj, int ncols, const int *order, const int *cumsizes, int nsets, const bool *maximise, const int *steps, int nsteps, const double *to_range, const double *lower, const double *upper, bool per_set, bool keep_weakly, const int *indicators, int nindicators, const double *ref, const double *ref_set, int ref_set_size, unsigned int p, double *result);
+    int group_sets_(const double *data, int ncols, int npoints, int *order, bool *grouped, int **cumsizes_p, double **labels_p);
+    double * get_eaf_(const double *data, int ncols, const int *order, const int *cumsizes, int nsets, const double * percentiles, int npercentiles, bool choose_percentiles, int * eaf_npoints, uint64_t **attained_p, bool debug);
+    typedef struct eaf_levels eaf_levels_t;
+    eaf_levels_t *eaf_levels_new_(const double *data, int ncols, const int *order, const int *cumsizes, int nsets, const double *percentiles, int npercentiles, bool choose_percentiles, bool store_attained, bool debug);
+    void eaf_levels_free(eaf_levels_t *levels);
+    int eaf_levels_nlevels(const eaf_levels_t *levels);
+    int eaf_levels_size(const eaf_levels_t *levels, int k);
+    void eaf_levels_copy_(eaf_levels_t *levels, int k, double *result, uint64_t *attained);
+    double * compute_eafdiff_rectangles_(const double *x, const int *order_x, const int *cumsizes_x, int nsets_x, const double *y, const int *order_y, const int *cumsizes_y, int nsets_y, int num_intervals, int *return_num_rectangles);
+    void eafdiff_max_(const uint64_t *attained, int npoints, int nwords, const uint64_t *masks, int nmasks, int nleft, int nright, double *result);
+    typedef struct eaf2d_incr eaf2d_incr_t;
+    eaf2d_incr_t * eaf2d_incr_new (void);
+    void eaf2d_incr_free (eaf2d_incr_t *state);
+    int eaf2d_incr_nruns (const eaf2d_incr_t *state);
+    void eaf2d_incr_add_ (eaf2d_incr_t *state, const double *data, int ncols, const int *order, const int *cumsizes, int nsets);
+    double * eaf2d_incr_get_ (eaf2d_incr_t *state, const double *percentiles, int npercentiles, bool choose_percentiles, int *eaf_npoints);
+    typedef struct attindex attindex_t;
+    attindex_t * attindex_new_ (const double *data, int ncols, const int *order, const int *cumsizes, int nsets, const bool *maximise);
+    void attindex_free (attindex_t *index);
+    int attindex_nruns (const attindex_t *index);
+    int attindex_nobj (const attindex_t *index);
+    void attindex_count_ (const attindex_t *index, const double *points, int npoints, int *count);
+    double * vorobev_ (const double *data, int ncols, const int *order, const int *cumsizes, int nsets, const double *ref, double *threshold, double *avg_hyp, double *deviation, int *ve_npoints);
+    double * compute_eafdiff_(const double *x, const int *order_x, const int *cumsizes_x, int nsets_x, const double *y, const int *order_y, const int *cumsizes_y, int nsets_y, int ncols, int num_intervals, int *return_num_points, bool debug);
+    typedef struct { const char *name; int64_t start_ns; int64_t end_ns; int64_t npoints; int64_t nbytes; int depth; } eaf_profile_event_t;
+    void eaf_profile_enable_(bool enable);
+    int64_t eaf_profile_now_(void);
+    const eaf_profile_event_t *eaf_profile_events_(int *nevents);
+    void eaf_profile_clear_(void);
     """
 )
 
@@ -41,13 +73,22 @@ ffibuilder.set_source(
     #include "nondominated.h"
     #include "epsilon.h"
     #include "eaf.h"
+    #include "pipeline.h"
+    #include "profile.h"
 """,
     sources=[
         "src/eafpy/libeaf/io.c",
         "src/eafpy/libeaf/hv.c",
+        "src/eafpy/libeaf/hv_trajectory.c",
+        "src/eafpy/libeaf/hv_subset.c",
         "src/eafpy/libeaf/avl.c",
         "src/eafpy/libeaf/eaf.c",
         "src/eafpy/libeaf/eaf3d.c",
+        "src/eafpy/libeaf/eafnd.c",
+        "src/eafpy/libeaf/eaf2d_incr.c",
+        "src/eafpy/libeaf/attindex.c",
+        "src/eafpy/libeaf/vorob.c",
+        "src/eafpy/libeaf/profile.c",
     ],
     include_dirs=[libeaf_path],
 )
@@ -0,0 +1,338 @@
+"""Command-line tool to process many dataset files in parallel
+
+Run ``python -m eafpy --help``, or ``eafpy --help`` once installed, for the
+list of commands.  Each input file is processed by a pool of worker
+processes and the results are written in the order of the inputs as soon as
+they are available, either in the text format of :func:`eafpy.read_datasets`
+(sets separated by empty lines) or as CSV.
+"""
+import argparse
+import concurrent.futures
+import glob
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+from . import eaf
+
+_FORMAT = "% 17.16g"
+
+
+def _floats(text):
+    try:
+        return [float(x) for x in text.replace(",", " ").split()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a list of numbers")
+
+
+def _expand_inputs(patterns):
+    """Expand the glob patterns that the shell did not expand"""
+    files = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise FileNotFoundError(f"no files match '{pattern}'")
+            files += matches
+        else:
+            files.append(pattern)
+    return files
+
+
+def _labels(dataset):
+    return eaf._group_sets(np.ascontiguousarray(dataset))[2]
+
+
+def _reference_set(filename):
+    return np.ascontiguousarray(eaf.read_datasets(filename)[:, :-1])
+
+
+def _objectives(data, *last):
+    return [f"f{i + 1}" for i in range(data.shape[1] - len(last))] + list(last)
+
+
+# Each command computes a result from the dataset of one file (or two files,
+# for eafdiff).  A result is a tuple (kind, columns, array), where columns are
+# the names of the columns of the array for CSV, and kind is "sets" if the last
+# column numbers the sets (or levels), which are separated by an empty line in
+# the text format, "values" if each row is the set number and value of a set,
+# and "rows" otherwise.
+
+
+def _cmd_filter(args, dataset):
+    result = eaf.filter_dominated_sets(
+        dataset, maximise=args.maximise, keep_weakly=args.keep_weakly
+    )
+    return "sets", _objectives(result, "set"), result
+
+
+def _cmd_normalise(args, dataset):
+    lower = args.lower if args.lower is not None else np.nan
+    upper = args.upper if args.upper is not None else np.nan
+    result = eaf.normalise_sets(
+        dataset,
+        range=args.range,
+        lower=lower,
+        upper=upper,
+        maximise=args.maximise,
+        per_set=not args.global_bounds,
+    )
+    return "sets", _objectives(result, "set"), result
+
+
+def _cmd_eaf(args, dataset):
+    result = eaf.get_eaf(dataset, percentiles=args.percentiles or [])
+    return "sets", _objectives(result, "percentile"), result
+
+
+def _indicator(args, dataset, name, **kwargs):
+    values = eaf.pipeline(dataset, maximise=args.maximise).indicators(name, **kwargs)
+    return "values", ["set", name], np.column_stack((_labels(dataset), values))
+
+
+def _cmd_hv(args, dataset):
+    return _indicator(args, dataset, "hv", ref=args.ref)
+
+
+def _cmd_igd(args, dataset):
+    name = "igd+" if args.plus else "avg_hausdorff_dist" if args.hausdorff else "igd"
+    return _indicator(
+        args, dataset, name, ref_set=_reference_set(args.reference), p=args.p
+    )
+
+
+def _cmd_eps(args, dataset):
+    name = "eps*" if args.mult else "eps+"
+    return _indicator(args, dataset, name, ref_set=_reference_set(args.reference))
+
+
+def _cmd_eafdiff(args, x, y):
+    result = eaf.get_diff_eaf(
+        x, y, intervals=args.intervals, rectangles=args.rectangles
+    )
+    if args.rectangles:
+        return "rows", ["xmin", "ymin", "xmax", "ymax", "diff"], result
+    return "rows", _objectives(result, "diff"), result
+
+
+_COMMANDS = {
+    "filter": _cmd_filter,
+    "normalise": _cmd_normalise,
+    "eaf": _cmd_eaf,
+    "hv": _cmd_hv,
+    "igd": _cmd_igd,
+    "eps": _cmd_eps,
+    "eafdiff": _cmd_eafdiff,
+}
+
+
+def _run(args, filenames):
+    """Process one job in a worker.  Returns its result and number of points."""
+    datasets = [eaf.read_datasets(f) for f in filenames]
+    kind, columns, result = _COMMANDS[args.command](args, *datasets)
+    return kind, columns, result, sum(len(d) for d in datasets)
+
+
+def _write_text(out, kind, result):
+    if kind == "values":
+        np.savetxt(out, result[:, 1:], fmt=_FORMAT, delimiter="\t")
+    elif kind == "rows":
+        np.savetxt(out, result, fmt=_FORMAT, delimiter="\t")
+        out.write("\n")
+    else:
+        # One set (or EAF level) after another, separated by an empty line.
+        last = result[:, -1]
+        starts = np.flatnonzero(np.r_[True, last[1:] != last[:-1], True])
+        for start, end in zip(starts[:-1], starts[1:]):
+            np.savetxt(out, result[start:end, :-1], fmt=_FORMAT, delimiter="\t")
+            out.write("\n")
+
+
+def _write_csv(out, name, columns, result, header):
+    if header:
+        out.write(",".join(["file"] + columns) + "\n")
+    rows = io.StringIO()
+    np.savetxt(rows, result, fmt="%.16g", delimiter=",")
+    prefix = name.replace(",", "_") + ","
+    out.writelines(prefix + row for row in rows.getvalue().splitlines(True))
+
+
+def _write_result(out, args, name, kind, columns, result, header, comment=False):
+    if args.format == "csv":
+        _write_csv(out, name, columns, result, header)
+    else:
+        if comment:
+            out.write(f"# {name}\n")
+        _write_text(out, kind, result)
+
+
+def _output_name(args, filenames):
+    stem = "-".join(os.path.splitext(os.path.basename(f))[0] for f in filenames)
+    ext = "csv" if args.format == "csv" else "txt"
+    return os.path.join(args.output, f"{stem}.{args.command}.{ext}")
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog="eafpy", description="Process dataset files with eafpy."
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "files",
+        nargs="+",
+        metavar="FILE",
+        help="input files (or glob patterns) in the format of read_datasets",
+    )
+    common.add_argument(
+        "-o",
+        "--output",
+        help="output file, or an existing directory to write one file per input (default: stdout)",
+    )
+    common.add_argument(
+        "--format", choices=["text", "csv"], default="text", help="output format"
+    )
+    common.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of worker processes (default: number of CPUs)",
+    )
+    common.add_argument(
+        "--maximise", action="store_true", help="maximise all objectives"
+    )
+    common.add_argument(
+        "-q", "--quiet", action="store_true", help="do not report the throughput"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser(
+        "filter", parents=[common], help="remove the dominated points of each set"
+    )
+    p.add_argument("--keep-weakly", action="store_true", help="keep duplicated points")
+
+    p = subparsers.add_parser(
+        "normalise", parents=[common], help="normalise the objectives of each set"
+    )
+    p.add_argument("--range", type=_floats, default=[0.0, 1.0], help="target range")
+    p.add_argument("--lower", type=_floats, help="lower bounds of the objectives")
+    p.add_argument("--upper", type=_floats, help="upper bounds of the objectives")
+    p.add_argument(
+        "--global-bounds",
+        action="store_true",
+        help="compute the bounds from all the sets of a file instead of from each set",
+    )
+
+    p = subparsers.add_parser(
+        "eaf", parents=[common], help="empirical attainment function of each file"
+    )
+    p.add_argument("--percentiles", type=_floats, help="percentiles (default: all)")
+
+    p = subparsers.add_parser("hv", parents=[common], help="hypervolume of each set")
+    p.add_argument("--ref", type=_floats, required=True, help="reference point")
+
+    p = subparsers.add_parser(
+        "igd", parents=[common], help="IGD (or a variant) of each set"
+    )
+    p.add_argument("--reference", required=True, help="file with the reference set")
+    variant = p.add_mutually_exclusive_group()
+    variant.add_argument("--plus", action="store_true", help="compute IGD+")
+    variant.add_argument(
+        "--hausdorff",
+        action="store_true",
+        help="compute the average Hausdorff distance",
+    )
+    p.add_argument(
+        "-p", type=float, default=1, help="parameter of the Hausdorff distance"
+    )
+
+    p = subparsers.add_parser(
+        "eps", parents=[common], help="epsilon indicator of each set"
+    )
+    p.add_argument("--reference", required=True, help="file with the reference set")
+    p.add_argument(
+        "--mult", action="store_true", help="multiplicative instead of additive"
+    )
+
+    p = subparsers.add_parser(
+        "eafdiff",
+        parents=[common],
+        help="differences between the EAFs of pairs of files (LEFT RIGHT [LEFT RIGHT ...])",
+    )
+    p.add_argument(
+        "--intervals", type=int, help="number of intervals of the difference"
+    )
+    p.add_argument(
+        "--rectangles",
+        action="store_true",
+        help="output the regions with differences as rectangles (2 objectives)",
+    )
+    return parser
+
+
+def main(argv=None):
+    """Entry point of the ``eafpy`` command"""
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    try:
+        files = _expand_inputs(args.files)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    if args.jobs < 1:
+        parser.error(f"'--jobs' must be at least 1 ({args.jobs} given)")
+    if args.command == "eafdiff":
+        if len(files) % 2 != 0:
+            parser.error("eafdiff requires pairs of files")
+        jobs = [tuple(files[i : i + 2]) for i in range(0, len(files), 2)]
+    else:
+        jobs = [(f,) for f in files]
+    per_file = args.output is not None and os.path.isdir(args.output)
+
+    start = time.perf_counter()
+    npoints = 0
+    out = None
+    if not per_file:
+        out = sys.stdout if args.output is None else open(args.output, "w")
+    workers = min(args.jobs, len(jobs))
+    # A single worker runs in this process, without the cost of a pool.
+    if workers > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_run, [args] * len(jobs), jobs)
+    else:
+        executor = None
+        results = map(_run, [args] * len(jobs), jobs)
+    try:
+        for k, (filenames, (kind, columns, result, n)) in enumerate(zip(jobs, results)):
+            npoints += n
+            name = " ".join(filenames)
+            if per_file:
+                with open(_output_name(args, filenames), "w") as f:
+                    _write_result(f, args, name, kind, columns, result, header=True)
+            else:
+                comment = len(jobs) > 1
+                _write_result(out, args, name, kind, columns, result, k == 0, comment)
+                out.flush()
+    except BrokenPipeError:
+        # The reader of stdout exited, e.g. "eafpy ... | head".
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError, eaf.ReadDatasetsError) as e:
+        print(f"eafpy {args.command}: error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if out is not None and out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        print(
+            f"eafpy {args.command}: {len(files)} files, {npoints} points in {elapsed:.3f} s "
+            f"({npoints / max(elapsed, 1e-9):.0f} points/s, {workers} workers)",
+            file=sys.stderr,
+        )
+    return 0
@@ -1,14 +1,18 @@
 import os
+import sys
 import numpy as np
 
 ## Libeaf contains wrapper functions for the EAF C library.
 ## The CFFI library is used to create C binding
 from eafpy.c_bindings import lib, ffi
 from ._utils import *
+from ._profiling import profiled
+from ._cache import cached
 import lzma
 import shutil
 import tempfile
 import random
+from concurrent.futures import ThreadPoolExecutor
 
 
 class ReadDatasetsError(Exception):
@@ -34,7 +38,13 @@ class ReadDatasetsError(Exception):
         self.message = self._error_strings[abs(error_code)]
         super().__init__(self.message)
 
+    def __reduce__(self):
+        # Pickled by error code, so that it can be raised in another process.
+        return (ReadDatasetsError, (self.error,))
 
+
+@profiled
+@cached(file_arg="filename")
 def read_datasets(filename):
     """Reads an input dataset file, parsing the file and returning a numpy array
 
@@ -127,6 +137,8 @@ def _unary_refset_common(data, ref, maximise):
     return data, ref, maximise
 
 
+@profiled
+@cached
 def igd(data, ref, maximise=False):
     """Inverted Generational Distance (IGD and IGD+) and Averaged Hausdorff Distance.
 
@@ -178,6 +190,8 @@ def igd(data, ref, maximise=False):
     return lib.igd_C(data_p, nobj, npoints, ref_p, ref_size, maximise_p)
 
 
+@profiled
+@cached
 def igd_plus(data, ref, maximise=False):
     """Calculate IGD+ indicator
 
@@ -190,6 +204,8 @@ def igd_plus(data, ref, maximise=False):
     return lib.igd_plus_C(data_p, nobj, npoints, ref_p, ref_size, maximise_p)
 
 
+@profiled
+@cached
 def avg_hausdorff_dist(data, ref, maximise=False, p=1):
     """Calculate average Hausdorff distance
 
@@ -208,6 +224,8 @@ def avg_hausdorff_dist(data, ref, maximise=False, p=1):
     )
 
 
+@profiled
+@cached
 def hypervolume(data, ref):
     """Hypervolume indicator
 
@@ -261,6 +279,251 @@ def hypervolume(data, ref):
     return hv
 
 
+def _hv_trajectory(points, times, cumsizes, ref, checkpoints):
+    # The points of each set are sorted by time.  Returns the hypervolume of
+    # each set at each checkpoint, as an array of shape (nsets, ncheckpoints).
+    ref = np.ascontiguousarray(ref, dtype=float)
+    cumsizes = np.ascontiguousarray(cumsizes, dtype=np.intc)
+    if points.shape[1] != ref.shape[0]:
+        raise ValueError(
+            f"data and ref need to have the same number of objectives ({points.shape[1]} != {ref.shape[0]})"
+        )
+    nsets = len(cumsizes)
+    starts = np.r_[0, cumsizes[:-1]]
+    counts = np.empty((nsets, len(checkpoints)), dtype=np.intc)
+    for s in range(nsets):
+        counts[s] = np.searchsorted(
+            times[starts[s] : cumsizes[s]], checkpoints, side="right"
+        )
+    hv = np.empty((nsets, len(checkpoints)))
+    lib.hv_trajectory_(
+        ffi.from_buffer("double []", hv),
+        ffi.from_buffer("double []", points),
+        points.shape[1],
+        ffi.from_buffer("int []", cumsizes),
+        nsets,
+        ffi.from_buffer("double []", ref),
+        ffi.from_buffer("int []", counts),
+        len(checkpoints),
+    )
+    return hv
+
+
+def _trajectory_checkpoints(times, checkpoints):
+    if checkpoints is None:
+        return np.unique(times)
+    return np.unique(np.asfarray(checkpoints))
+
+
+@profiled
+@cached
+def hypervolume_trajectory(data, time, ref, checkpoints=None):
+    """Hypervolume of a run as a function of time (anytime performance)
+
+    Computes the hypervolume of the points found up to each checkpoint, assuming minimization of all objectives. \
+    The points are added in time order and the hypervolume is updated incrementally, instead of computed again \
+    for every prefix: with 2 objectives, each point takes amortized logarithmic time; with 3 objectives, the \
+    volume gained by each point is computed by sweeping the nondominated points found before it. With more \
+    objectives, the nondominated points are updated with each point, but the hypervolume is computed again at \
+    each checkpoint where they changed.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        Numpy array of numerical values, where each row gives the coordinates of a point in objective space.
+    time : numpy.ndarray or list
+        Time (for example, the number of evaluations) at which each point was found. The points need not be \
+        sorted by time.
+    ref : numpy array or list
+        Reference point. Must be same length as a single point in the dataset
+    checkpoints : numpy array or list, optional
+        Times at which the hypervolume is reported. By default, each distinct value of `time`.
+
+    Returns
+    -------
+    numpy.ndarray
+        An array with a row for each checkpoint, in increasing order, with the checkpoint and the hypervolume of \
+        the points whose time is not larger than it.
+
+    See Also
+    --------
+    hypervolume_trajectory_sets : The same for each set of a dataset.
+
+    Examples
+    --------
+    >>> dat = np.array([[5,5],[4,6],[2,7], [7,4], [3,3]])
+    >>> eaf.hypervolume_trajectory(dat, time = [1, 2, 3, 4, 5], ref = [10, 10])
+    array([[ 1., 25.],
+           [ 2., 29.],
+           [ 3., 35.],
+           [ 4., 38.],
+           [ 5., 52.]])
+    >>> eaf.hypervolume_trajectory(dat, time = [1, 2, 3, 4, 5], ref = [10, 10], checkpoints = [2, 10])
+    array([[ 2., 29.],
+           [10., 52.]])
+
+    """
+    data = np.asfarray(data)
+    time = np.asfarray(time)
+    if time.shape != (data.shape[0],):
+        raise ValueError(
+            f"time must have one value per point (shape {time.shape} != ({data.shape[0]},))"
+        )
+    order = np.argsort(time, kind="stable")
+    points = np.ascontiguousarray(data[order])
+    times = time[order]
+    checkpoints = _trajectory_checkpoints(times, checkpoints)
+    hv = _hv_trajectory(points, times, [len(points)], ref, checkpoints)
+    return np.column_stack((checkpoints, hv[0]))
+
+
+@profiled
+@cached
+def hypervolume_trajectory_sets(dataset, time, ref, checkpoints=None):
+    """Hypervolume of each run of a dataset as a function of time (anytime performance)
+
+    Same as :func:`hypervolume_trajectory` for each set of a dataset, at the same checkpoints.
+
+    Parameters
+    ----------
+    dataset : numpy.ndarray
+        Points with the set number in the last column, as returned by :func:`read_datasets`.
+    time : numpy.ndarray or list
+        Time (for example, the number of evaluations) at which each point was found.
+    ref : numpy array or list
+        Reference point. Must have one value per objective.
+    checkpoints : numpy array or list, optional
+        Times at which the hypervolume is reported. By default, each distinct value of `time` in any set.
+
+    Returns
+    -------
+    numpy.ndarray
+        An array with a row for each set and checkpoint, with the checkpoint, the hypervolume and the set number. \
+        The rows are sorted by set number and by checkpoint.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> time = np.tile(np.arange(1, 11), 10)
+    >>> hv = eaf.hypervolume_trajectory_sets(dataset, time, ref = [10, 10], checkpoints = [5, 10])
+    >>> hv[:4]
+    array([[ 5.        , 86.8973637 ,  1.        ],
+           [10.        , 90.46272765,  1.        ],
+           [ 5.        , 49.45189044,  2.        ],
+           [10.        , 53.96970895,  2.        ]])
+
+    """
+    dataset = np.ascontiguousarray(dataset, dtype=float)
+    time = np.asfarray(time)
+    if time.shape != (dataset.shape[0],):
+        raise ValueError(
+            f"time must have one value per point (shape {time.shape} != ({dataset.shape[0]},))"
+        )
+    order, cumsizes, labels = _group_sets(dataset)
+    if order is None:
+        order = np.arange(len(dataset))
+    set_idx = np.repeat(np.arange(len(cumsizes)), np.diff(cumsizes, prepend=0))
+    # Sort the points of each set by time, keeping the sets grouped.
+    order = order[np.lexsort((time[order], set_idx))]
+    points = np.ascontiguousarray(dataset[order, :-1])
+    times = time[order]
+    checkpoints = _trajectory_checkpoints(times, checkpoints)
+    hv = _hv_trajectory(points, times, cumsizes, ref, checkpoints)
+    return np.column_stack(
+        (
+            np.tile(checkpoints, len(labels)),
+            hv.ravel(),
+            np.repeat(labels, len(checkpoints)),
+        )
+    )
+
+
+@profiled
+@cached
+def hv_subset_selection(data, ref, k, method="greedy"):
+    """Select a subset of points with maximum hypervolume
+
+    Selects `k` points with the largest hypervolume, assuming minimization of all objectives, for example to \
+    truncate an archive or to plot a representative subset.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        Numpy array of numerical values, where each row gives the coordinates of a point in objective space.
+    ref : numpy array or list
+        Reference point. Must be same length as a single point in the dataset
+    k : int
+        Number of points to select.
+    method : str
+        ``"greedy"`` adds, `k` times, the point with the largest hypervolume contribution to the points already \
+        selected. The contributions are updated lazily, since they can only decrease, so most points are not \
+        evaluated again after each selection. Its hypervolume is at least 63% (1 - 1/e) of the optimal one. \
+        ``"exact2d"`` selects the optimal subset of 2 objectives with a dynamic program, in time proportional to \
+        `k` times the number of points.
+
+    Returns
+    -------
+    numpy.ndarray
+        The indices of the selected rows of `data`, in increasing order. Only nondominated points that strictly \
+        dominate the reference point are selected, so fewer than `k` indices are returned if there are fewer \
+        of them.
+
+    Examples
+    --------
+    >>> dat = np.array([[1,9],[2,6],[4,4],[6,2],[9,1],[5,5]])
+    >>> greedy = eaf.hv_subset_selection(dat, ref = [10, 10], k = 2)
+    >>> greedy, eaf.hypervolume(dat[greedy], ref = [10, 10])
+    (array([1, 2]), 44.0)
+
+    The greedy selection starts with the point of largest hypervolume, which is not in the best subset of 2 points
+    >>> exact = eaf.hv_subset_selection(dat, ref = [10, 10], k = 2, method = "exact2d")
+    >>> exact, eaf.hypervolume(dat[exact], ref = [10, 10])
+    (array([1, 3]), 48.0)
+
+    """
+    data = np.ascontiguousarray(data, dtype=float)
+    ref = np.ascontiguousarray(ref, dtype=float)
+    if data.shape[1] != ref.shape[0]:
+        raise ValueError(
+            f"data and ref need to have the same number of objectives ({data.shape[1]} != {ref.shape[0]})"
+        )
+    if method not in ("greedy", "exact2d"):
+        raise ValueError(f"'method' must be 'greedy' or 'exact2d' ('{method}' given)")
+    if method == "exact2d" and data.shape[1] != 2:
+        raise ValueError(
+            f"method 'exact2d' requires 2 objectives ({data.shape[1]} given)"
+        )
+    if k < 0:
+        raise ValueError(f"'k' must be non-negative ({k} given)")
+
+    candidates = np.flatnonzero(np.all(data < ref, axis=1))
+    if data.shape[1] == 2:
+        # Sorted by the first objective, and then by the second, each point
+        # is nondominated if its second objective is smaller than those of
+        # the points before it.
+        candidates = candidates[np.lexsort((data[candidates, 1], data[candidates, 0]))]
+        y = data[candidates, 1]
+        candidates = candidates[y < np.minimum.accumulate(np.r_[np.inf, y[:-1]])]
+    else:
+        candidates = candidates[is_nondominated(data[candidates])]
+    k = min(k, len(candidates))
+    if k == 0:
+        return np.empty(0, dtype=int)
+    points = np.ascontiguousarray(data[candidates])
+    selected = np.empty(k, dtype=np.intc)
+    selected_p = ffi.from_buffer("int []", selected)
+    ref_buf = ffi.from_buffer("double []", ref)
+    points_p, npoints, nobj = np2d_to_double_array(points)
+    if method == "greedy":
+        volume = lib.hv_subset_greedy_(points_p, nobj, npoints, ref_buf, k, selected_p)
+    else:
+        volume = lib.hv_subset_exact2d_(points_p, npoints, ref_buf, k, selected_p)
+    if volume < 0:
+        raise MemoryError(f"not enough memory to select {k} of {npoints} points")
+    return np.sort(candidates[selected])
+
+
+@profiled
 def is_nondominated(data, maximise=False, keep_weakly=False):
     """Identify, and remove dominated points according to Pareto optimality.
 
@@ -314,6 +577,7 @@ def is_nondominated(data, maximise=False, keep_weakly=False):
     return np.frombuffer(nondom, dtype=bool)
 
 
+@profiled
 def filter_dominated(data, maximise=False, keep_weakly=False):
     """Remove dominated points according to Pareto optimality.
     See: :func:`is_nondominated` for details
@@ -321,6 +585,7 @@ def filter_dominated(data, maximise=False, keep_weakly=False):
     return data[is_nondominated(data, maximise, keep_weakly)]
 
 
+@profiled
 def filter_dominated_sets(dataset, maximise=False, keep_weakly=False):
     """Filter dominated sets for multiple sets
 
@@ -353,13 +618,18 @@ def filter_dominated_sets(dataset, maximise=False, keep_weakly=False):
     # FIXME: it will be faster to stack filter_set, then do:
     # dataset[filter_set, :]
     # to filter in one go.
+    dataset = np.ascontiguousarray(dataset, dtype=float)
+    order, cumsizes, labels = _group_sets(dataset)
     new_sets = []
-    for set in np.unique(dataset[:, -1]):
-        set_data = dataset[dataset[:, -1] == set, :-1]
+    start = 0
+    for set, end in zip(labels, cumsizes):
+        rows = slice(start, end) if order is None else order[start:end]
+        set_data = np.ascontiguousarray(dataset[rows, :-1])
         filter_set = filter_dominated(set_data, maximise, keep_weakly)
         set_nums = np.full(filter_set.shape[0], set).reshape(-1, 1)
         new_set = np.hstack((filter_set, set_nums))
         new_sets.append(new_set)
+        start = end
     return np.vstack(new_sets)
 
 
@@ -372,6 +642,8 @@ def _epsilon_select(data, ref, maximise, is_add):
     return lib.epsilon_(data_p, nobj, npoints, ref_p, ref_size, maximise_p, is_add)
 
 
+@profiled
+@cached
 def epsilon_additive(data, ref, maximise=False):
     """Computes the epsilon metric, either additive or multiplicative. 
 
@@ -408,6 +680,8 @@ def epsilon_additive(data, ref, maximise=False):
     return _epsilon_select(data, ref, maximise=maximise, is_add=True)
 
 
+@profiled
+@cached
 def epsilon_mult(data, ref, maximise=False):
     """multiplicative epsilon metric
 
@@ -417,7 +691,89 @@ def epsilon_mult(data, ref, maximise=False):
     return _epsilon_select(data, ref, maximise=maximise, is_add=False)
 
 
-def normalise(data, to_range=[0.0, 1.0], lower=np.nan, upper=np.nan, maximise=False):
+def _normalise_output(data, inplace, out):
+    # Select the array where the result of normalisation is written.
+    if inplace and out is not None:
+        raise ValueError("'inplace' and 'out' cannot be used at the same time")
+    if inplace:
+        if not (
+            isinstance(data, np.ndarray)
+            and data.dtype == np.float64
+            and data.flags.c_contiguous
+            and data.flags.writeable
+        ):
+            raise ValueError(
+                "'inplace = True' requires data to be a writeable C-contiguous numpy array of float64"
+            )
+        return data, data
+
+    data = np.ascontiguousarray(data, dtype=float)
+    if out is None:
+        out = np.empty_like(data)
+    elif not (
+        isinstance(out, np.ndarray)
+        and out.dtype == np.float64
+        and out.flags.c_contiguous
+        and out.flags.writeable
+    ):
+        raise ValueError(
+            "'out' must be a writeable C-contiguous numpy array of float64"
+        )
+    elif out.shape != data.shape:
+        raise ValueError(
+            f"'out' must have the same shape as the data ({out.shape} != {data.shape})"
+        )
+    return data, out
+
+
+def _normalise_common(
+    data, out, nobj, to_range, lower, upper, maximise, set_idx, nsets, per_set
+):
+    to_range = np.asfarray(to_range)
+    if to_range.shape[0] != 2:
+        raise ValueError("'to_range' must have length 2")
+    lower = atleast_1d_of_length_n(lower, nobj).astype(float)
+    upper = atleast_1d_of_length_n(upper, nobj).astype(float)
+    maximise = _parse_maximise(maximise, nobj)
+
+    npoints, ncols = data.shape
+    data_p = ffi.from_buffer("double []", data)
+    out_p = ffi.from_buffer("double []", out)
+    if set_idx is None:
+        set_idx_p = ffi.NULL
+    else:
+        set_idx_p = ffi.from_buffer("int []", set_idx)
+    maximise_p = ffi.from_buffer("bool []", maximise)
+    lower_p = ffi.from_buffer("double []", lower)
+    upper_p = ffi.from_buffer("double []", upper)
+    lib.normalise_sets_(
+        data_p,
+        out_p,
+        nobj,
+        ncols,
+        npoints,
+        set_idx_p,
+        nsets,
+        maximise_p,
+        to_range[0],
+        to_range[1],
+        lower_p,
+        upper_p,
+        bool(per_set),
+    )
+    return out
+
+
+@profiled
+def normalise(
+    data,
+    to_range=[0.0, 1.0],
+    lower=np.nan,
+    upper=np.nan,
+    maximise=False,
+    inplace=False,
+    out=None,
+):
     """Normalise points per coordinate to a range, e.g., `to_range = [1,2]`, where the minimum value will correspond to 1 and the maximum to 2.
 
     Parameters
@@ -437,6 +793,13 @@ def normalise(data, to_range=[0.0, 1.0], lower=np.nan, upper=np.nan, maximise=Fa
         Either a single boolean value that applies to all objectives or a list of booleans, with one value per objective. \
         Also accepts a 1D numpy array with values 0 or 1 for each objective
 
+    inplace : bool
+        If True, `data` is overwritten with the result instead of allocating a new array. \
+        `data` must then be a writeable C-contiguous numpy array of float64.
+
+    out : numpy.ndarray, optional
+        Array with the same shape as `data` where the result is written. Cannot be combined with `inplace`.
+
     Returns
     -------
     numpy array
@@ -457,43 +820,65 @@ def normalise(data, to_range=[0.0, 1.0], lower=np.nan, upper=np.nan, maximise=Fa
            [1.3 , 0.85],
            [2.  , 0.  ]])
 
+    Maximised objectives are normalised to the reversed range:
+
+    >>> eaf.normalise(dat, maximise = [False, True])
+    array([[0.   , 0.   ],
+           [0.05 , 0.35 ],
+           [0.3  , 0.575],
+           [1.   , 1.   ]])
+
     See Also
     --------
     This function for muliple sets - :func:`normalise_sets` 
 
     """
-    # Normalise modifies the data, so we need to create a copy.
-    data = np.asfarray(data).copy()
-    npoints, nobj = data.shape
+    data, out = _normalise_output(data, inplace, out)
+    nobj = data.shape[1]
     if nobj == 1:
         raise ValueError("'data' must have at least two columns")
-    to_range = np.asfarray(to_range)
-    if to_range.shape[0] != 2:
-        raise ValueError("'to_range' must have length 2")
-    lower = atleast_1d_of_length_n(lower, nobj).astype(float)
-    upper = atleast_1d_of_length_n(upper, nobj).astype(float)
-    if np.any(np.isnan(lower)):
-        lower = np.where(np.isnan(lower), data.min(axis=0), lower)
-    if np.any(np.isnan(upper)):
-        upper = np.where(np.isnan(upper), data.max(axis=0), upper)
-
-    maximise = _parse_maximise(maximise, data.shape[1])
-    data_p, npoints, nobj = np2d_to_double_array(data)
-    maximise_p = ffi.from_buffer("bool []", maximise)
-    lbound_p = ffi.from_buffer("double []", lower)
-    ubound_p = ffi.from_buffer("double []", upper)
-    lib.normalise_(
-        data_p, nobj, npoints, maximise_p, to_range[0], to_range[1], lbound_p, ubound_p
+    return _normalise_common(
+        data,
+        out,
+        nobj,
+        to_range,
+        lower,
+        upper,
+        maximise,
+        set_idx=None,
+        nsets=1,
+        per_set=False,
     )
-    data_buf = ffi.buffer(data_p, ffi.sizeof("double") * data.shape[0] * data.shape[1])
-    data = np.frombuffer(data_buf).reshape(data.shape)
-    return data
 
 
-def normalise_sets(dataset, range=[0, 1], lower="na", upper="na", maximise=False):
+@profiled
+def normalise_sets(
+    dataset,
+    range=[0, 1],
+    lower=np.nan,
+    upper=np.nan,
+    maximise=False,
+    per_set=True,
+    inplace=False,
+    out=None,
+):
     """Normalise dataset with multiple sets
 
-    Executes the :func:`normalise` function for every set in a dataset (Performs normalise on every set seperately)
+    Normalise the objectives of a dataset containing set numbers in its last column. \
+    See :func:`normalise` for the meaning of the arguments.
+
+    Parameters
+    ----------
+    per_set : bool
+        If True, the bounds that are not given by `lower` and `upper` are computed separately for each set \
+        (every set is normalised separately). Otherwise, they are computed from all the sets together.
+
+    inplace : bool
+        If True, `dataset` is overwritten with the result instead of allocating a new array, \
+        which avoids duplicating very large datasets.
+
+    out : numpy.ndarray, optional
+        Array with the same shape as `dataset` where the result (including the set numbers) is written.
 
     Examples
     --------
@@ -521,16 +906,301 @@ def normalise_sets(dataset, range=[0, 1], lower="na", upper="na", maximise=False
            [0.        , 0.98703813, 5.        ],
            [0.6229605 , 0.8613516 , 5.        ]])
 
+    Using the same bounds for all sets:
+
+    >>> eaf.normalise_sets(subset, per_set = False)[[0, 10]]
+    array([[1.        , 0.3523489 , 4.        ],
+           [0.81001244, 0.70565876, 5.        ]])
+
     See Also
     --------
     This function for data without set numbers - :func:`normalise`
     """
-    for set in np.unique(dataset[:, -1]):
-        setdata = dataset[dataset[:, -1] == set, :-1]
-        dataset[dataset[:, -1] == set, :-1] = normalise(
-            setdata, to_range=range, lower=np.nan, upper=np.nan, maximise=False
+    dataset, out = _normalise_output(dataset, inplace, out)
+    nobj = dataset.shape[1] - 1
+    if nobj < 2:
+        raise ValueError("'dataset' must have at least two objectives")
+    set_idx, nsets = _set_indices(dataset)
+    return _normalise_common(
+        dataset,
+        out,
+        nobj,
+        range,
+        lower,
+        upper,
+        maximise,
+        set_idx=set_idx,
+        nsets=nsets,
+        per_set=per_set,
+    )
+
+
+def _int_array_or_null(x):
+    return ffi.NULL if x is None else ffi.from_buffer("int []", x)
+
+
+def _group_sets(data):
+    # Group the rows of a C-contiguous dataset by set number.  Returns the row
+    # order (None if the rows of each set are already contiguous), the
+    # cumulative sizes and the sorted set numbers.  Integer set numbers are
+    # grouped in C in linear time with a counting sort, without sorting or
+    # copying the data; any other set numbers are sorted.
+    npoints, ncols = data.shape
+    order = np.empty(npoints, dtype=np.intc)
+    grouped = ffi.new("bool *")
+    cumsizes_p = ffi.new("int **")
+    labels_p = ffi.new("double **")
+    nsets = lib.group_sets_(
+        ffi.from_buffer("double []", data),
+        ncols,
+        npoints,
+        ffi.from_buffer("int []", order),
+        grouped,
+        cumsizes_p,
+        labels_p,
+    )
+    if nsets > 0:
+        cumsizes = np.frombuffer(
+            ffi.buffer(ffi.gc(cumsizes_p[0], lib.free), nsets * 4), dtype=np.intc
+        )
+        labels = np.frombuffer(ffi.buffer(ffi.gc(labels_p[0], lib.free), nsets * 8))
+        return (None if grouped[0] else order), cumsizes, labels
+
+    labels, set_idx, counts = np.unique(
+        data[:, -1], return_inverse=True, return_counts=True
+    )
+    if np.all(set_idx[1:] >= set_idx[:-1]):
+        order = None
+    else:
+        order = np.argsort(set_idx, kind="stable").astype(np.intc)
+    cumsizes = np.cumsum(counts).astype(np.intc)
+    return order, cumsizes, labels
+
+
+def _set_indices(data):
+    # The index of the set of each row of a C-contiguous dataset, in ascending
+    # order of set number, and the number of sets.
+    order, cumsizes, _ = _group_sets(data)
+    nsets = cumsizes.shape[0]
+    set_idx = np.repeat(np.arange(nsets, dtype=np.intc), np.diff(cumsizes, prepend=0))
+    if order is not None:
+        set_idx[order] = set_idx.copy()
+    return set_idx, nsets
+
+
+_PIPELINE_STEPS = {"normalise": 0, "filter_dominated": 1}
+
+_PIPELINE_INDICATORS = {
+    "hv": 0,
+    "hypervolume": 0,
+    "igd": 1,
+    "igd+": 2,
+    "igd_plus": 2,
+    "avg_hausdorff_dist": 3,
+    "eps+": 4,
+    "epsilon_additive": 4,
+    "eps*": 5,
+    "epsilon_mult": 5,
+}
+
+
+class Pipeline:
+    """Lazy sequence of operations applied to each set of a dataset.
+
+    Create it with :func:`pipeline`. Each step returns a new :class:`Pipeline`, and
+    nothing is computed until :meth:`indicators` is called. Then, all the steps are
+    executed in C one set at a time, without creating any intermediate dataset.
+    """
+
+    def __init__(self, dataset, maximise, steps=(), normalise_args=None):
+        self._dataset = dataset
+        self._maximise = maximise
+        self._steps = steps
+        self._normalise_args = normalise_args
+
+    def _add_step(self, step, normalise_args=None):
+        return Pipeline(
+            self._dataset,
+            self._maximise,
+            self._steps + (step,),
+            normalise_args if normalise_args is not None else self._normalise_args,
+        )
+
+    def normalise(self, to_range=[0.0, 1.0], lower=np.nan, upper=np.nan, per_set=True):
+        """Normalise the objectives of each set.
+
+        See :func:`normalise_sets`. Afterwards, all objectives are minimised. \
+        With `per_set = False`, the bounds are computed from the whole input dataset.
+        """
+        if "normalise" in self._steps:
+            raise ValueError("normalise() can only be applied once")
+        nobj = self._maximise.shape[0]
+        to_range = np.asfarray(to_range)
+        if to_range.shape[0] != 2:
+            raise ValueError("'to_range' must have length 2")
+        lower = atleast_1d_of_length_n(lower, nobj).astype(float)
+        upper = atleast_1d_of_length_n(upper, nobj).astype(float)
+        return self._add_step("normalise", (to_range, lower, upper, bool(per_set)))
+
+    def filter_dominated(self, keep_weakly=False):
+        """Remove the dominated points of each set.
+
+        See :func:`filter_dominated_sets`.
+        """
+        return self._add_step("filter_weakly" if keep_weakly else "filter_dominated")
+
+    def indicators(self, names, ref=None, ref_set=None, p=1):
+        """Compute quality indicators for each set.
+
+        Parameters
+        ----------
+        names : list of str
+            Indicators to compute. Any of ``"hv"``, ``"igd"``, ``"igd+"``, \
+            ``"avg_hausdorff_dist"``, ``"eps+"`` and ``"eps*"``. The names of the \
+            corresponding functions (e.g. ``"igd_plus"``) are also accepted.
+
+        ref : numpy.ndarray or list
+            Reference point for ``"hv"``. It must be given in the same space as \
+            the data after the previous steps, e.g., normalised.
+
+        ref_set : numpy.ndarray or list
+            Reference set for the other indicators, in the same space as the data \
+            after the previous steps.
+
+        p : float, default 1
+            Hausdorff distance parameter. See :func:`avg_hausdorff_dist`.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array with one row per set (sorted by set number) and one column per indicator. \
+            ``"eps*"`` is NaN for sets where the data or the reference set have non-positive values.
+
+        Examples
+        --------
+        >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+        >>> eaf.pipeline(eaf.subset(dataset, range = [1, 3])).normalise().filter_dominated().indicators(
+        ...     ["hv", "igd+"], ref = [1.1, 1.1], ref_set = [[0, 0]])
+        array([[1.20691219, 0.04447986],
+               [0.98504574, 0.33175316],
+               [0.81264874, 0.49561223]])
+        """
+        if isinstance(names, str):
+            names = [names]
+        unknown = [name for name in names if name not in _PIPELINE_INDICATORS]
+        if unknown:
+            raise ValueError(
+                f"unknown indicators {unknown}, allowed names are {list(_PIPELINE_INDICATORS)}"
+            )
+        codes = np.array([_PIPELINE_INDICATORS[name] for name in names], dtype=np.intc)
+        if p <= 0:
+            raise ValueError(f"'p' must be larger than zero")
+
+        dataset = self._dataset
+        nobj = dataset.shape[1] - 1
+        if np.any(codes == _PIPELINE_INDICATORS["hv"]):
+            if ref is None:
+                raise ValueError("'ref' is required to compute the hypervolume")
+            ref = np.asfarray(ref)
+            if ref.shape != (nobj,):
+                raise ValueError(
+                    f"'ref' must have one value per objective ({ref.shape[0]} != {nobj})"
+                )
+        else:
+            ref = np.zeros(nobj)
+        if np.any(codes != _PIPELINE_INDICATORS["hv"]):
+            if ref_set is None:
+                raise ValueError(f"'ref_set' is required to compute {names}")
+            ref_set = np.ascontiguousarray(np.atleast_2d(np.asfarray(ref_set)))
+            if ref_set.shape[1] != nobj:
+                raise ValueError(
+                    f"dataset and ref_set need to have the same number of objectives ({nobj} != {ref_set.shape[1]})"
+                )
+        else:
+            ref_set = np.zeros((1, nobj))
+
+        steps = []
+        keep_weakly = False
+        for step in self._steps:
+            if step == "filter_weakly":
+                keep_weakly = True
+                step = "filter_dominated"
+            steps.append(_PIPELINE_STEPS[step])
+        steps = np.array(steps, dtype=np.intc)
+        if self._normalise_args is None:
+            unused = np.full(nobj, np.nan)
+            to_range, lower, upper, per_set = np.zeros(2), unused, unused, True
+        else:
+            to_range, lower, upper, per_set = self._normalise_args
+
+        order, cumsizes, _ = _group_sets(dataset)
+        nsets = cumsizes.shape[0]
+        result = np.empty((nsets, codes.shape[0]))
+        lib.pipeline_sets_(
+            ffi.from_buffer("double []", dataset),
+            nobj,
+            dataset.shape[1],
+            _int_array_or_null(order),
+            ffi.from_buffer("int []", cumsizes),
+            nsets,
+            ffi.from_buffer("bool []", self._maximise),
+            ffi.from_buffer("int []", steps),
+            steps.shape[0],
+            ffi.from_buffer("double []", to_range),
+            ffi.from_buffer("double []", lower),
+            ffi.from_buffer("double []", upper),
+            per_set,
+            keep_weakly,
+            ffi.from_buffer("int []", codes),
+            codes.shape[0],
+            ffi.from_buffer("double []", ref),
+            ffi.from_buffer("double []", ref_set),
+            ref_set.shape[0],
+            ffi.cast("unsigned int", p),
+            ffi.from_buffer("double []", result),
         )
-    return dataset
+        return result
+
+
+@profiled
+def pipeline(dataset, maximise=False):
+    """Lazily normalise, filter and evaluate each set of a dataset
+
+    Chaining :func:`normalise_sets`, :func:`filter_dominated_sets` and a per-set \
+    indicator creates a full copy of the dataset at every step. Instead, the pipeline \
+    records the steps and executes them in C for one set at a time, reusing a single \
+    buffer for all sets.
+
+    Parameters
+    ----------
+    dataset : numpy.ndarray
+        Numpy array of numerical values and set numbers, containing multiple sets. \
+        For example the output of the :func:`read_datasets` function.
+
+    maximise : bool or list of bool
+        Whether the objectives must be maximised instead of minimised.
+
+    Returns
+    -------
+    Pipeline
+        Call :meth:`Pipeline.normalise` and :meth:`Pipeline.filter_dominated` to add \
+        steps, in any order, and :meth:`Pipeline.indicators` to compute the result.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> eaf.pipeline(dataset).filter_dominated().indicators("hv", ref = [10, 10])[:3]
+    array([[90.46272765],
+           [53.96970895],
+           [51.32968104]])
+    """
+    dataset = np.ascontiguousarray(dataset, dtype=float)
+    nobj = dataset.shape[1] - 1
+    if nobj < 2:
+        raise ValueError("'dataset' must have at least two objectives")
+    if dataset.shape[0] == 0:
+        raise ValueError("'dataset' must have at least one point")
+    return Pipeline(dataset, _parse_maximise(maximise, nobj))
 
 
 def subset(dataset, set=-2, range=[]):
@@ -659,10 +1329,16 @@ def data_subset(dataset, set):
     return np.ascontiguousarray(subset(dataset, set, range=[])[:, :-1])
 
 
-def get_eaf(data, percentiles=[], debug=False):
+@profiled
+@cached
+def get_eaf(data, percentiles=[], debug=False, return_attained=False, out=None):
     """Empiracal attainment function (EAF) calculation
     
-    Calculate EAF in 2d or 3d from the input dataset
+    Calculate the EAF of a dataset with any number of objectives. More than three objectives use a \
+    dimension sweep over the 3d algorithm, which is much slower: with `n` points in total, it computes the EAF \
+    of the projection of the points seen so far at each of the up to `n` distinct values of the last objective, \
+    so `d` objectives take up to ``n**(d - 3)`` computations of a 3-objective EAF of up to `n` points. \
+    See ``benchmarks/bench_eaf_nobj.py`` for timings.
 
     Parameters
     ----------
@@ -673,12 +1349,25 @@ def get_eaf(data, percentiles=[], debug=False):
         A list of percentiles to calculate. If empty, all possible percentiles are calculated. Note the maximum 
     debug : bool
         (For developers) print out debugging information in the C code
+    return_attained : bool
+        Also return which runs (sets) attain each EAF data point.
+    out : numpy array, str or path, optional
+        Where to write the EAF data points. Either a C-contiguous ``float64`` array with as many columns as `data` \
+        and at least as many rows as EAF data points, or the name of a ``.npy`` file, which is created as a \
+        :class:`numpy.memmap` of the right size. Each level of the EAF is freed as soon as it is written, so the \
+        result does not need to fit in memory together with the EAF. See also :func:`iter_eaf`.
 
     Returns
     -------
     numpy array
         Returns a numpy array containing the EAF data points, with the same number of columns as the input argument, \
-        but a different number of rows. The last column represents the EAF percentile for that data point
+        but a different number of rows. The last column represents the EAF percentile for that data point. \
+        If `out` is given, this is `out`, or the rows of `out` that were written.
+    numpy array
+        Only if `return_attained` is True. A packed bit matrix of ``uint8`` with one row per EAF data point, \
+        where bit k (in little bit order) is set if the k-th set, in ascending order of set number, attains the point. \
+        Use ``np.unpackbits(attained, axis=1, count=nsets, bitorder="little")`` to unpack it. \
+        It is a view of the buffer computed in C, so it is not copied.
 
     Examples
     --------
@@ -706,17 +1395,26 @@ def get_eaf(data, percentiles=[], debug=False):
            [  4.93663823,   6.20957074, 100.        ],
            [  7.92511295,   3.92669598, 100.        ]])
 
+    Which of the 4 sets attain the points of the median attainment surface:
+
+    >>> x, attained = eaf.get_eaf(subset, percentiles = [50], return_attained = True)
+    >>> np.unpackbits(attained, axis = 1, count = 4, bitorder = "little")
+    array([[0, 0, 1, 1],
+           [0, 0, 1, 1],
+           [0, 0, 1, 1],
+           [0, 0, 1, 1],
+           [0, 0, 1, 1],
+           [1, 0, 0, 1]], dtype=uint8)
     """
-    data = np.asfarray(data)
-    num_data_columns = data.shape[1]
-    if num_data_columns != 3:
-        assert NotImplementedError(
-            "Only 2d Datasets are currently supported for calculating eaf"
-        )
+    if out is not None:
+        return _get_eaf_out(data, percentiles, debug, return_attained, out)
 
-    percentiles = np.asfarray(percentiles)
-    # Get C pointers + matrix size for calling CFFI generated extension module
-    data_p, npoints, ncols = np2d_to_double_array(data)
+    data, percentiles = _eaf_args(data, percentiles)
+    num_data_columns = data.shape[1]
+    # The C code reads the objectives directly from data, visiting the rows
+    # of each set in order.
+    data_p, _, ncols = np2d_to_double_array(data)
+    order, cumsizes, _ = _group_sets(data)
 
     # If percentiles array is empty, calculate all the levels in C code from the data
     # Else use the percentiles argument to calculate the levels
@@ -725,66 +1423,805 @@ def get_eaf(data, percentiles=[], debug=False):
 
     percentile_p, npercentiles = np1d_to_double_array(percentiles)
     eaf_npoints = ffi.new("int *", 0)
-    sizeof_eaf = ffi.new("int *", 0)
-    nsets = ffi.cast("int", len(np.unique(data[:, -1])))  # Get nu,m of sets from data
+    attained_p = ffi.new("uint64_t **") if return_attained else ffi.NULL
     debug = ffi.cast("bool", debug)
     eaf_data = lib.get_eaf_(
         data_p,
         ncols,
-        npoints,
+        _int_array_or_null(order),
+        ffi.from_buffer("int []", cumsizes),
+        cumsizes.shape[0],
         percentile_p,
         npercentiles,
         choose_percentiles,
-        nsets,
         eaf_npoints,
-        sizeof_eaf,
+        attained_p,
         debug,
     )
 
-    eaf_buf = ffi.buffer(eaf_data, sizeof_eaf[0])
+    # The buffer keeps eaf_data alive, which is freed by the garbage collector.
+    eaf_buf = ffi.buffer(
+        ffi.gc(eaf_data, lib.free), eaf_npoints[0] * num_data_columns * 8
+    )
     eaf_arr = np.frombuffer(eaf_buf)
-    return np.reshape(eaf_arr, (-1, num_data_columns))
+    eaf_arr = np.reshape(eaf_arr, (-1, num_data_columns))
+    if not return_attained:
+        return eaf_arr
+
+    nsets = cumsizes.shape[0]
+    nwords = (nsets + 63) // 64
+    attained_buf = ffi.buffer(
+        ffi.gc(attained_p[0], lib.free), eaf_npoints[0] * nwords * 8
+    )
+    attained = np.frombuffer(attained_buf, dtype=np.uint64)
+    return eaf_arr, _attained_bits(attained, nsets)
 
 
-def get_diff_eaf(x, y, intervals=None, debug=False):
-    x = np.asfarray(x)
-    y = np.asfarray(y)
+def _check_percentiles(percentiles):
+    percentiles = np.asfarray(percentiles)
+    if not np.all((percentiles >= 0) & (percentiles <= 100)):
+        raise ValueError(
+            f"percentiles must be between 0 and 100 ({percentiles.tolist()} given)"
+        )
+    return percentiles
+
+
+def _eaf_args(data, percentiles):
+    data = np.ascontiguousarray(data, dtype=float)
+    num_data_columns = data.shape[1]
+    if num_data_columns < 3:
+        raise ValueError(
+            f"Calculating the EAF requires at least 2 objectives ({num_data_columns - 1} given)"
+        )
+    if data.shape[0] == 0:
+        raise ValueError("Calculating the EAF requires at least one point")
+    return data, _check_percentiles(percentiles)
+
+
+def _attained_bits(words, nsets):
+    # Bit k of each point is in 64-bit word k // 64.
+    nwords = (nsets + 63) // 64
+    if sys.byteorder == "big":
+        words = words.byteswap()
+    return words.view(np.uint8).reshape(-1, nwords * 8)[:, : (nsets + 7) // 8]
+
+
+def _eaf_levels(data, percentiles, store_attained=False, debug=False):
+    """Compute the levels of the EAF in C, to be copied one by one with lib.eaf_levels_copy_"""
+    data, percentiles = _eaf_args(data, percentiles)
+    order, cumsizes, _ = _group_sets(data)
+    percentile_p, npercentiles = np1d_to_double_array(percentiles)
+    levels = lib.eaf_levels_new_(
+        ffi.from_buffer("double []", data),
+        data.shape[1],
+        _int_array_or_null(order),
+        ffi.from_buffer("int []", cumsizes),
+        cumsizes.shape[0],
+        percentile_p,
+        npercentiles,
+        len(percentiles) != 0,
+        store_attained,
+        debug,
+    )
+    return ffi.gc(levels, lib.eaf_levels_free), data.shape[1], cumsizes.shape[0]
+
+
+def _get_eaf_out(data, percentiles, debug, return_attained, out):
+    levels, ncols, nsets = _eaf_levels(data, percentiles, return_attained, debug)
+    sizes = [
+        lib.eaf_levels_size(levels, k) for k in range(lib.eaf_levels_nlevels(levels))
+    ]
+    npoints = sum(sizes)
+    if isinstance(out, (str, os.PathLike)):
+        out = np.lib.format.open_memmap(out, mode="w+", shape=(npoints, ncols))
+    elif not (
+        isinstance(out, np.ndarray)
+        and out.dtype == np.float64
+        and out.flags.c_contiguous
+        and out.flags.writeable
+        and out.ndim == 2
+        and out.shape[1] == ncols
+        and out.shape[0] >= npoints
+    ):
+        raise ValueError(
+            f"out must be a writeable C-contiguous float64 array of at least {npoints} rows and {ncols} columns"
+        )
+
+    result = out[:npoints]
+    nwords = (nsets + 63) // 64
+    attained = np.empty((npoints, nwords), dtype=np.uint64) if return_attained else None
+    start = 0
+    for k, size in enumerate(sizes):
+        lib.eaf_levels_copy_(
+            levels,
+            k,
+            ffi.from_buffer("double []", result[start:], require_writable=True),
+            ffi.from_buffer("uint64_t []", attained[start:], require_writable=True)
+            if return_attained
+            else ffi.NULL,
+        )
+        start += size
+    if isinstance(out, np.memmap):
+        out.flush()
+    result = out if result.shape == out.shape else result
+    if not return_attained:
+        return result
+    return result, _attained_bits(attained.reshape(-1), nsets)
+
+
+def iter_eaf(data, percentiles=[]):
+    """Empirical attainment function (EAF), one level at a time
+
+    The EAF is computed like :func:`get_eaf`, but each of its levels is only copied when the iterator reaches it, \
+    and then freed, so the levels can be processed or saved without keeping the whole EAF in memory twice.
+
+    Parameters
+    ----------
+    data : numpy array
+        Numpy array of numerical values and set numbers, containing multiple sets.
+    percentiles : list
+        A list of percentiles to calculate. If empty, all possible percentiles are calculated.
+
+    Returns
+    -------
+    iterator of numpy arrays
+        The EAF data points of each level, in the same format as the result of :func:`get_eaf`, which is their \
+        concatenation. A level may have no points.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> subset = eaf.subset(dataset, range = [7,10])
+    >>> for level in eaf.iter_eaf(subset, percentiles = [25, 100]):
+    ...     print(level.shape, level[0])
+    (4, 3) [ 0.62230271  3.56945324 25.        ]
+    (4, 3) [  1.06855707   8.84691923 100.        ]
+    """
+    # The EAF is computed now, so errors are not delayed until iteration.
+    levels, ncols, _ = _eaf_levels(data, percentiles)
+
+    def levels_iter():
+        for k in range(lib.eaf_levels_nlevels(levels)):
+            level = np.empty((lib.eaf_levels_size(levels, k), ncols))
+            lib.eaf_levels_copy_(
+                levels,
+                k,
+                ffi.from_buffer("double []", level, require_writable=True),
+                ffi.NULL,
+            )
+            yield level
+
+    return levels_iter()
+
+
+@profiled
+def get_eaf_many(datasets, percentiles=[], threads=None):
+    """Calculate the EAF of several datasets concurrently
+
+    The EAF computations do not share any state and release the GIL, \
+    so they run in parallel on a pool of threads without copying the data to other processes.
+
+    Parameters
+    ----------
+    datasets : list of numpy.ndarray
+        Datasets with set numbers, e.g., one per algorithm or problem instance. See :func:`get_eaf`.
+    percentiles : list
+        Percentiles to calculate for every dataset. See :func:`get_eaf`.
+    threads : int, optional
+        Maximum number of threads. By default, the default of :class:`concurrent.futures.ThreadPoolExecutor`.
+
+    Returns
+    -------
+    list of numpy.ndarray
+        The EAF of each dataset, in the same order as `datasets`.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> eafs = eaf.get_eaf_many([eaf.subset(dataset, range = [1, 5]), eaf.subset(dataset, range = [6, 10])], threads = 2)
+    >>> [x.shape for x in eafs]
+    [(38, 3), (31, 3)]
+    """
+    if threads is not None and threads < 1:
+        raise ValueError(f"'threads' must be at least 1 ({threads} given)")
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(lambda x: get_eaf(x, percentiles), datasets))
+
+
+class EAF:
+    """Empirical attainment function of two objectives that is updated as runs are added
+
+    Adding runs updates the attainment surfaces of all levels in time linear in the \
+    size of the EAF, instead of computing the EAF of all the runs again with :func:`get_eaf`. \
+    Each set of the data given to :meth:`add` is a new run, even if its set number was \
+    used by a previous call.
+
+    Parameters
+    ----------
+    data : numpy array, optional
+        Initial runs, with two objectives and set numbers. See :func:`get_eaf`.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> x = eaf.EAF(eaf.subset(dataset, range = [7,8]))
+    >>> x.nruns
+    2
+    >>> x.add(eaf.subset(dataset, range = [9,10])).nruns
+    4
+    >>> np.array_equal(x.get([25, 50]), eaf.get_eaf(eaf.subset(dataset, range = [7,10]), [25, 50]))
+    True
+    """
+
+    def __init__(self, data=None):
+        self._state = ffi.gc(lib.eaf2d_incr_new(), lib.eaf2d_incr_free)
+        if data is not None:
+            self.add(data)
+
+    @property
+    def nruns(self):
+        """Number of runs added so far"""
+        return lib.eaf2d_incr_nruns(self._state)
+
+    def add(self, data):
+        """Add the sets of `data` as new runs
+
+        Parameters
+        ----------
+        data : numpy array
+            Numpy array with two objectives and set numbers.
+
+        Returns
+        -------
+        EAF
+            This object, so that calls can be chained.
+        """
+        data = np.ascontiguousarray(data, dtype=float)
+        if data.ndim != 2 or data.shape[1] != 3:
+            raise ValueError(
+                f"EAF requires data with 2 objectives and set numbers ({data.shape[-1] - 1} objectives given)"
+            )
+        if data.shape[0] == 0:
+            return self
+        data_p, _, ncols = np2d_to_double_array(data)
+        order, cumsizes, _ = _group_sets(data)
+        lib.eaf2d_incr_add_(
+            self._state,
+            data_p,
+            ncols,
+            _int_array_or_null(order),
+            ffi.from_buffer("int []", cumsizes),
+            cumsizes.shape[0],
+        )
+        return self
+
+    def get(self, percentiles=[]):
+        """Current attainment surfaces
+
+        Parameters
+        ----------
+        percentiles : list
+            A list of percentiles to calculate. If empty, all possible percentiles are calculated.
+
+        Returns
+        -------
+        numpy array
+            The EAF data points in the same format as :func:`get_eaf`.
+        """
+        if self.nruns == 0:
+            raise ValueError("No runs have been added to the EAF")
+        percentiles = _check_percentiles(percentiles)
+        choose_percentiles = ffi.cast("bool", len(percentiles) != 0)
+        percentile_p, npercentiles = np1d_to_double_array(percentiles)
+        eaf_npoints = ffi.new("int *", 0)
+        eaf_data = lib.eaf2d_incr_get_(
+            self._state,
+            percentile_p,
+            npercentiles,
+            choose_percentiles,
+            eaf_npoints,
+        )
+        eaf_buf = ffi.buffer(ffi.gc(eaf_data, lib.free), eaf_npoints[0] * 3 * 8)
+        return np.frombuffer(eaf_buf).reshape(-1, 3)
+
+
+class AttainmentIndex:
+    """Index of the runs of a dataset to compute the attainment probability of arbitrary points
+
+    The index keeps the nondominated front of each run sorted, so that the fraction of runs \
+    that attain (weakly dominate) each of many points is computed in C without computing the EAF. \
+    With two objectives, each point is checked against each run by binary search. With three objectives, \
+    the points are sorted and each run is swept once while keeping a balanced search tree, so both take \
+    O(runs · log n) time per point, where n is the size of each front.
+
+    Parameters
+    ----------
+    data : numpy array
+        Numpy array of two or three objectives and set numbers. Each set is a run. See :func:`get_eaf`.
+    maximise : bool or list of bool
+        Whether the objectives must be maximised instead of minimised. \
+        Either a single boolean value that applies to all objectives or a list of boolean values, with one value per objective.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> index = eaf.AttainmentIndex(dataset)
+    >>> index.nruns
+    10
+    >>> index.attainment([[1, 5], [5, 5], [0.1, 0.1]])
+    array([0.2, 0.9, 0. ])
+    """
+
+    def __init__(self, data, maximise=False):
+        data = np.ascontiguousarray(data, dtype=float)
+        nobj = data.shape[1] - 1
+        if nobj not in (2, 3):
+            raise ValueError(
+                f"AttainmentIndex requires 2 or 3 objectives ({nobj} given)"
+            )
+        if data.shape[0] == 0:
+            raise ValueError("AttainmentIndex requires at least one point")
+        maximise = _parse_maximise(maximise, nobj)
+        data_p, _, ncols = np2d_to_double_array(data)
+        order, cumsizes, _ = _group_sets(data)
+        self._index = ffi.gc(
+            lib.attindex_new_(
+                data_p,
+                ncols,
+                _int_array_or_null(order),
+                ffi.from_buffer("int []", cumsizes),
+                cumsizes.shape[0],
+                ffi.from_buffer("bool []", maximise),
+            ),
+            lib.attindex_free,
+        )
+
+    @property
+    def nobj(self):
+        """Number of objectives"""
+        return lib.attindex_nobj(self._index)
+
+    @property
+    def nruns(self):
+        """Number of runs (sets) in the index"""
+        return lib.attindex_nruns(self._index)
+
+    def attainment_counts(self, points):
+        """Number of runs that attain each point
+
+        Parameters
+        ----------
+        points : numpy array
+            Points, one per row, with one column per objective.
+
+        Returns
+        -------
+        numpy array
+            Array of ``int`` with the number of runs that attain each point.
+        """
+        points = np.ascontiguousarray(np.atleast_2d(points), dtype=float)
+        if points.ndim != 2 or points.shape[1] != self.nobj:
+            raise ValueError(
+                f"points must have {self.nobj} columns ({points.shape[-1]} given)"
+            )
+        counts = np.empty(points.shape[0], dtype=np.intc)
+        lib.attindex_count_(
+            self._index,
+            ffi.from_buffer("double []", points),
+            points.shape[0],
+            ffi.from_buffer("int []", counts),
+        )
+        return counts
+
+    def attainment(self, points):
+        """Fraction of runs that attain each point
+
+        A run attains a point if any point of the run weakly dominates it.
+
+        Parameters
+        ----------
+        points : numpy array
+            Points, one per row, with one column per objective.
+
+        Returns
+        -------
+        numpy array
+            The attainment probability of each point.
+        """
+        return self.attainment_counts(points) / self.nruns
+
+
+def _vorobev(data, ref, maximise, deviation):
+    data = np.asfarray(data)
+    nobj = data.shape[1] - 1
+    if nobj < 2:
+        raise ValueError(f"Vorob'ev requires at least 2 objectives ({nobj} given)")
+    if data.shape[0] == 0:
+        raise ValueError("Vorob'ev requires at least one point")
+    ref = np.asfarray(ref)
+    if ref.shape != (nobj,):
+        raise ValueError(
+            f"data and ref need to have the same number of objectives ({nobj} != {ref.shape[0]})"
+        )
+    # The hypervolume assumes minimisation.
+    sign = np.where(_parse_maximise(maximise, nobj), -1.0, 1.0)
+    if np.any(sign < 0):
+        data = np.column_stack((data[:, :-1] * sign, data[:, -1]))
+        ref = ref * sign
+    data = np.ascontiguousarray(data)
+    ref = np.ascontiguousarray(ref)
+    data_p, _, ncols = np2d_to_double_array(data)
+    order, cumsizes, _ = _group_sets(data)
+    threshold = ffi.new("double *")
+    avg_hyp = ffi.new("double *")
+    deviation_p = ffi.new("double *") if deviation else ffi.NULL
+    ve_npoints = ffi.new("int *")
+    ve_data = lib.vorobev_(
+        data_p,
+        ncols,
+        _int_array_or_null(order),
+        ffi.from_buffer("int []", cumsizes),
+        cumsizes.shape[0],
+        ffi.from_buffer("double []", ref),
+        threshold,
+        avg_hyp,
+        deviation_p,
+        ve_npoints,
+    )
+    ve_buf = ffi.buffer(ffi.gc(ve_data, lib.free), ve_npoints[0] * nobj * 8)
+    ve = np.frombuffer(ve_buf).reshape(-1, nobj)
+    if np.any(sign < 0):
+        ve = ve * sign
+    return threshold[0], ve, avg_hyp[0], deviation_p[0] if deviation else None
+
+
+@profiled
+@cached
+def vorobev_threshold(data, ref, maximise=False):
+    """Vorob'ev threshold
+
+    The Vorob'ev threshold is the largest percentile whose attainment surface has a hypervolume \
+    not smaller than the average hypervolume of the sets (runs) of the dataset (Binois et al., 2015). \
+    All the attainment surfaces are computed once in C and the threshold is found by binary search \
+    over their hypervolumes.
+
+    Parameters
+    ----------
+    data : numpy array
+        Numpy array of numerical values and set numbers, containing multiple sets. For example the output \
+         of the :func:`read_datasets` function
+    ref : numpy array or list
+        Reference point of the hypervolume.
+    maximise : bool or list of bool
+        Whether the objectives must be maximised instead of minimised. \
+        Either a single boolean value that applies to all objectives or a list of boolean values, with one value per objective.
 
-    if np.min(x[:, -1]) != 1 or np.min(y[:, -1]) != 1:
-        raise ValueError("x and y should contain set numbers starting from 1")
-    ycopy = np.copy(
-        y
-    )  # Do hard copy so that the matrix is not corrupted. This could be optimised
-    ycopy[:, -1] = ycopy[:, -1] + np.max(
-        x[:, -1]
-    )  # Make Y sets start from end of X sets
-
-    data = np.vstack((x, ycopy))  # Combine X and Y datasets to one matrix
-    nsets = len(np.unique(data[:, -1]))
+    Returns
+    -------
+    float
+        The Vorob'ev threshold, as a percentile.
+
+    References
+    ----------
+    M. Binois, D. Ginsbourger and O. Roustant. Quantifying uncertainty on Pareto fronts with Gaussian \
+    process conditional simulations. European Journal of Operational Research, 243(2):386–394, 2015.
+
+    See Also
+    --------
+    vorobev_expectation, vorobev_deviation
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> eaf.vorobev_threshold(dataset, ref = [10, 10])
+    50.0
+    """
+    return _vorobev(data, ref, maximise, deviation=False)[0]
+
+
+@profiled
+@cached
+def vorobev_expectation(data, ref, maximise=False):
+    """Vorob'ev expectation
+
+    The Vorob'ev expectation is the attainment surface at the Vorob'ev threshold (see :func:`vorobev_threshold`).
+
+    Parameters
+    ----------
+    data : numpy array
+        Numpy array of numerical values and set numbers, containing multiple sets.
+    ref : numpy array or list
+        Reference point of the hypervolume.
+    maximise : bool or list of bool
+        Whether the objectives must be maximised instead of minimised.
+
+    Returns
+    -------
+    numpy array
+        The points of the Vorob'ev expectation, with one column per objective.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> ve = eaf.vorobev_expectation(dataset, ref = [10, 10])
+    >>> ve.shape
+    (15, 2)
+
+    It is the median attainment surface in this case:
+
+    >>> eaf_points = eaf.get_eaf(dataset, percentiles = [50])
+    >>> np.array_equal(ve, eaf_points[:, :2])
+    True
+    """
+    return _vorobev(data, ref, maximise, deviation=False)[1]
+
+
+@profiled
+@cached
+def vorobev_deviation(data, ref, maximise=False):
+    """Vorob'ev deviation
+
+    The Vorob'ev deviation is the average, over the sets of the dataset, of the volume of the symmetric \
+    difference between the region attained by each set and the region attained by the Vorob'ev expectation \
+    (see :func:`vorobev_expectation`), bounded by the reference point.
+
+    Parameters
+    ----------
+    data : numpy array
+        Numpy array of numerical values and set numbers, containing multiple sets.
+    ref : numpy array or list
+        Reference point of the hypervolume.
+    maximise : bool or list of bool
+        Whether the objectives must be maximised instead of minimised.
+
+    Returns
+    -------
+    float
+        The Vorob'ev deviation.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> round(eaf.vorobev_deviation(dataset, ref = [10, 10]), 6)
+    17.221689
+    """
+    return _vorobev(data, ref, maximise, deviation=True)[3]
+
+
+@profiled
+@cached
+def get_diff_eaf(x, y, intervals=None, debug=False, rectangles=False):
+    """Differences between the EAFs of two datasets
+
+    Parameters
+    ----------
+    x, y : numpy array
+        Numpy arrays of numerical values and set numbers, with the same number of objectives, \
+        which may be two, three or more.
+    intervals : int, optional
+        The differences, which are between -1 and 1, are multiplied by `intervals`. \
+        By default, and at most, half the total number of sets.
+    debug : bool
+        (For developers) print out debugging information in the C code
+    rectangles : bool
+        Return the regions where the difference is not zero as rectangles instead of the EAF points. \
+        Only for two objectives.
+
+    Returns
+    -------
+    numpy array
+        If `rectangles` is False, the points of the EAF of all the sets, with the difference between the fraction of \
+        the sets of `x` and the fraction of the sets of `y` that attain each point in the last column. \
+        If `rectangles` is True, one row ``(xmin, ymin, xmax, ymax, diff)`` per rectangle, where `diff` is the \
+        difference in the whole rectangle. Rectangles that are not bounded have ``inf`` coordinates. \
+        The rectangles do not overlap.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> x = eaf.subset(dataset, range = [1, 5])
+    >>> y = eaf.subset(dataset, range = [6, 10])
+    >>> rects = eaf.get_diff_eaf(x, y, rectangles = True)
+    >>> rects[:3]
+    array([[0.17470556, 8.89066343, 0.20816431,        inf, 1.        ],
+           [0.20816431, 8.32259412, 0.2901393 , 8.89066343, 1.        ],
+           [0.20816431, 4.62275469, 0.62230271, 8.32259412, 1.        ]])
+
+    Weighting the area of the rectangles, bounded by the reference point ``(10, 10)``, by their difference gives \
+    the difference between the average hypervolume of the sets of `x` and of `y`:
+
+    >>> clipped = np.minimum(rects[:, :4], 10)
+    >>> area = (clipped[:, 2] - clipped[:, 0]) * (clipped[:, 3] - clipped[:, 1])
+    >>> round(np.sum(area * rects[:, 4]) / 5, 6)
+    7.396897
+
+    With three objectives, the last column of each point is the difference:
+
+    >>> dataset = eaf.read_datasets("./doc/examples/spherical-250-10-3d.txt")
+    >>> diff = eaf.get_diff_eaf(eaf.subset(dataset, range = [1, 5]), eaf.subset(dataset, range = [6, 10]))
+    >>> diff.shape
+    (73295, 4)
+    """
+    x = np.ascontiguousarray(x, dtype=float)
+    y = np.ascontiguousarray(y, dtype=float)
+    if x.shape[1] != y.shape[1]:
+        raise ValueError(
+            f"x and y need to have the same number of columns ({x.shape[1]} != {y.shape[1]})"
+        )
+    if x.shape[0] == 0 or y.shape[0] == 0:
+        raise ValueError("x and y need to have at least one point each")
+
+    # x and y are passed separately to the C code, which reads the objectives
+    # directly from them, so no combined copy of the data is needed.
+    order_x, cumsizes_x, _ = _group_sets(x)
+    order_y, cumsizes_y, _ = _group_sets(y)
+    nsets = cumsizes_x.shape[0] + cumsizes_y.shape[0]
     if intervals is None:
         intervals = nsets / 2.0
     else:
         intervals = min(intervals, nsets / 2.0)
     intervals = int(intervals)
 
-    data = np.ascontiguousarray(
-        np.asfarray(data)
-    )  # C function requires contiguous data
-    num_data_columns = data.shape[1]
-    data_p, npoints, ncols = np2d_to_double_array(data)
+    num_data_columns = x.shape[1]
+    if rectangles:
+        if num_data_columns != 3:
+            raise ValueError(
+                f"EAF difference rectangles require 2 objectives ({num_data_columns - 1} given)"
+            )
+        nrects = ffi.new("int *", 0)
+        rects_data = lib.compute_eafdiff_rectangles_(
+            ffi.from_buffer("double []", x),
+            _int_array_or_null(order_x),
+            ffi.from_buffer("int []", cumsizes_x),
+            cumsizes_x.shape[0],
+            ffi.from_buffer("double []", y),
+            _int_array_or_null(order_y),
+            ffi.from_buffer("int []", cumsizes_y),
+            cumsizes_y.shape[0],
+            intervals,
+            nrects,
+        )
+        rects_buf = ffi.buffer(ffi.gc(rects_data, lib.free), nrects[0] * 5 * 8)
+        return np.frombuffer(rects_buf).reshape(-1, 5)
+
     eaf_npoints = ffi.new("int *", 0)
-    sizeof_eaf = ffi.new("int *", 0)
-    nsets = ffi.cast("int", nsets)  # Get num of sets from data
     intervals = ffi.cast("int", intervals)
     debug = ffi.cast("bool", debug)
     eaf_diff_data = lib.compute_eafdiff_(
-        data_p, ncols, npoints, nsets, intervals, eaf_npoints, sizeof_eaf, debug
+        ffi.from_buffer("double []", x),
+        _int_array_or_null(order_x),
+        ffi.from_buffer("int []", cumsizes_x),
+        cumsizes_x.shape[0],
+        ffi.from_buffer("double []", y),
+        _int_array_or_null(order_y),
+        ffi.from_buffer("int []", cumsizes_y),
+        cumsizes_y.shape[0],
+        num_data_columns,
+        intervals,
+        eaf_npoints,
+        debug,
     )
 
-    eaf_buf = ffi.buffer(eaf_diff_data, sizeof_eaf[0])
-    eaf_arr = np.frombuffer(eaf_buf)
-    # The C code gets diff EAF in Column Major order so I return it in column major order than transpose to fix into row major order
-    return np.reshape(eaf_arr, (num_data_columns, -1)).T
+    eaf_buf = ffi.buffer(
+        ffi.gc(eaf_diff_data, lib.free), eaf_npoints[0] * num_data_columns * 8
+    )
+    return np.frombuffer(eaf_buf).reshape(-1, num_data_columns)
+
+
+def _relabel_sets(data, first):
+    # Replace the set numbers of data by first, first + 1, ...
+    set_idx, nsets = _set_indices(np.ascontiguousarray(data, dtype=float))
+    return np.column_stack((data[:, :-1], set_idx + first)), nsets
+
+
+def _packbits_words(bits):
+    # Pack each row of a boolean matrix into 64-bit words.  The bit order
+    # within a word does not matter as long as it is the same for all rows.
+    packed = np.packbits(bits, axis=1, bitorder="little")
+    nbytes = -(-packed.shape[1] // 8) * 8
+    packed = np.pad(packed, ((0, 0), (0, nbytes - packed.shape[1])))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+@profiled
+def eaf_permutation_test(x, y, n_permutations=1000, seed=None, workers=None):
+    """Permutation test of the difference between the EAFs of two datasets
+
+    The test statistic is the maximum absolute difference between the EAF of the sets of `x` \
+    and the EAF of the sets of `y`. Its distribution under the null hypothesis that both EAFs are \
+    equal is estimated by randomly reassigning the sets (runs) of both datasets to `x` and `y`.
+
+    The EAF of all the sets is computed once, together with which sets attain each of its points \
+    (see :func:`get_eaf`). The maximum difference is always reached at one of these points, so each \
+    permutation only counts, in C, the sets assigned to `x` that attain each point. The permutations \
+    are split among threads, which share the attainment data.
+
+    Parameters
+    ----------
+    x, y : numpy array
+        Numpy arrays of numerical values and set numbers, with the same number of objectives.
+    n_permutations : int
+        Number of random permutations.
+    seed : int or numpy.random.Generator, optional
+        Seed of the random permutations. The result only depends on the seed, not on the number of `workers`.
+    workers : int, optional
+        Number of threads. By default, the number of CPUs.
+
+    Returns
+    -------
+    statistic : float
+        The maximum absolute difference between the EAFs of `x` and `y`.
+    pvalue : float
+        The fraction of permutations, counting the observed assignment, whose statistic is at least as large.
+
+    Examples
+    --------
+    >>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+    >>> x = eaf.subset(dataset, range = [1, 5])
+    >>> y = eaf.subset(dataset, range = [6, 10])
+    >>> statistic, pvalue = eaf.eaf_permutation_test(x, y, n_permutations = 100, seed = 42)
+    >>> statistic
+    1.0
+    >>> round(pvalue, 3)
+    0.129
+    """
+    x = np.asfarray(x)
+    y = np.asfarray(y)
+    if x.shape[1] != y.shape[1]:
+        raise ValueError(
+            f"x and y need to have the same number of columns ({x.shape[1]} != {y.shape[1]})"
+        )
+    if x.shape[0] == 0 or y.shape[0] == 0:
+        raise ValueError("x and y need to have at least one point each")
+    if n_permutations < 1:
+        raise ValueError(
+            f"'n_permutations' must be at least 1 ({n_permutations} given)"
+        )
+    if workers is not None and workers < 1:
+        raise ValueError(f"'workers' must be at least 1 ({workers} given)")
+
+    x, nleft = _relabel_sets(x, 0)
+    y, nright = _relabel_sets(y, nleft)
+    nruns = nleft + nright
+    _, attained = get_eaf(np.vstack((x, y)), return_attained=True)
+    # Points attained by the same sets give the same difference.
+    attained = np.unique(attained, axis=0)
+    attained = _packbits_words(
+        np.unpackbits(attained, axis=1, count=nruns, bitorder="little")
+    )
+    nwords = attained.shape[1]
+
+    # The first assignment is the observed one.
+    rng = np.random.default_rng(seed)
+    left = np.zeros((n_permutations + 1, nruns), dtype=bool)
+    left[0, :nleft] = True
+    runs = rng.permuted(np.tile(np.arange(nruns), (n_permutations, 1)), axis=1)
+    np.put_along_axis(left[1:], runs[:, :nleft], True, axis=1)
+    masks = _packbits_words(left)
+
+    stats = np.empty(n_permutations + 1)
+    attained_p = ffi.from_buffer("uint64_t []", attained)
+
+    def run(chunk):
+        lib.eafdiff_max_(
+            attained_p,
+            attained.shape[0],
+            nwords,
+            ffi.from_buffer("uint64_t []", masks[chunk]),
+            chunk.stop - chunk.start,
+            nleft,
+            nright,
+            ffi.from_buffer("double []", stats[chunk]),
+        )
+
+    nchunks = min(workers or os.cpu_count() or 1, n_permutations + 1)
+    with ThreadPoolExecutor(max_workers=nchunks) as executor:
+        bounds = np.linspace(0, n_permutations + 1, nchunks + 1).astype(int)
+        list(executor.map(run, [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:])]))
+
+    statistic = stats[0]
+    pvalue = np.count_nonzero(stats >= statistic) / (n_permutations + 1)
+    return statistic, pvalue
 
 
 def rand_non_dominated_sets(num_points, num_sets=10, shape=3, scale=1):
@@ -806,6 +2243,10 @@ def rand_non_dominated_sets(num_points, num_sets=10, shape=3, scale=1):
     -------
     np.ndarray (n, 3)
         An (n, 3) numpy array containing non dominated points and set numbers. The last column represents the set numbers
+
+    See Also
+    --------
+    :func:`generate_nondominated_sets` - Faster generator with any number of objectives
     """
     if num_points % num_sets != 0:
         raise ValueError("Number of points should be divisible by number of sets")
@@ -829,3 +2270,162 @@ def rand_non_dominated_sets(num_points, num_sets=10, shape=3, scale=1):
     points = np.array(points)
     set_nums = np.arange(0, num_points) // num_sets + 1
     return np.column_stack((points, set_nums))
+
+
+_NONDOMINATED_SETS_METHODS = ("linear", "sphere", "convex", "degenerate")
+
+
+def _front_points(rng, npoints, nobj, method, shape):
+    # Random points on the front of the method.  Normalising exponential
+    # variables gives points uniformly distributed on the simplex, and
+    # normalising absolute normal variables gives points uniformly
+    # distributed on the sphere.
+    ndirs = 2 if method == "degenerate" else nobj
+    if shape is not None:
+        # Gamma variables with a small shape underflow to zero, so they are
+        # sampled as logarithms, using Gamma(a) = Gamma(a + 1) * U^(1/a), and
+        # scaled by the largest one before leaving the log space.
+        points = np.log(rng.gamma(shape + 1, size=(npoints, ndirs)))
+        points += np.log1p(-rng.random((npoints, ndirs))) / shape
+        points = np.exp(points - points.max(axis=1, keepdims=True))
+    elif method == "linear":
+        points = rng.exponential(size=(npoints, ndirs))
+    else:
+        points = np.abs(rng.standard_normal((npoints, ndirs)))
+
+    if method == "linear":
+        points /= points.sum(axis=1, keepdims=True)
+    else:
+        points /= np.linalg.norm(points, axis=1, keepdims=True)
+    if method == "convex":
+        points = 1 - points
+    elif method == "degenerate":
+        points = np.column_stack(
+            (
+                points[:, 0],
+                np.repeat(points[:, 1:] / np.sqrt(nobj - 1), nobj - 1, axis=1),
+            )
+        )
+    return points
+
+
+def _rounding_dominated(points, method):
+    # The points of a set on a front that rounding made dominated by, or equal
+    # to, another point.  Exactly, no point dominates another, so this only
+    # happens to points whose coordinates round to the same values.
+    npoints, nobj = points.shape
+    if nobj == 2 or method == "degenerate":
+        # All the objectives but the first are equal on the degenerate front.
+        order = np.lexsort((points[:, 1], points[:, 0]))
+        y = points[order, 1]
+        dominated = np.empty(npoints, dtype=bool)
+        dominated[order] = y >= np.minimum.accumulate(np.r_[np.inf, y[:-1]])
+        return dominated
+    # A point can only be dominated by a point with some coordinate within
+    # the rounding error of its own, so only those points are compared.
+    close = np.zeros(npoints, dtype=bool)
+    for j in range(nobj):
+        order = np.argsort(points[:, j])
+        x = points[order, j]
+        tolerance = 1e-9 if method == "convex" else 1e-9 * x[1:] + 1e-300
+        tied = np.diff(x) <= tolerance
+        close[order[:-1][tied]] = True
+        close[order[1:][tied]] = True
+    dominated = np.zeros(npoints, dtype=bool)
+    if np.any(close):
+        dominated[close] = ~is_nondominated(np.ascontiguousarray(points[close]))
+    return dominated
+
+
+def generate_nondominated_sets(
+    n, nobj=2, nsets=None, method="linear", shape=None, seed=None
+):
+    """Generate random sets of mutually nondominated points
+
+    The points of each set are mutually nondominated, because they lie on a front where no point dominates \
+    another, so any number of points is generated at once. The few points that rounding makes dominated by, \
+    or equal to, another point of their set, which happens near the boundary of the front when `shape` is small, \
+    are sampled again.
+
+    Parameters
+    ----------
+    n : int or list of int
+        Number of points of each set, or a list with the number of points of each set.
+    nobj : int
+        Number of objectives, at least 2.
+    nsets : int, optional
+        Number of sets. By default, 1 if `n` is an int and ``len(n)`` if it is a list.
+    method : str
+        Shape of the front, all of them within ``[0, 1]`` in every objective:
+
+        * ``"linear"``: the simplex where the objectives sum to 1.
+        * ``"sphere"``: the positive orthant of the unit sphere (a concave front).
+        * ``"convex"``: one minus the points of ``"sphere"``.
+        * ``"degenerate"``: a curve on the unit sphere where all objectives but the first are equal.
+    shape : float, optional
+        By default, the points are uniformly distributed on the front (along the angle for ``"degenerate"``). \
+        Otherwise, the point in each direction is obtained from ``nobj`` gamma-distributed variables with this \
+        shape, so points concentrate towards the middle of the front if `shape` is large, and towards its \
+        boundary if it is small.
+    seed : int or numpy.random.Generator, optional
+        Seed or random number generator, passed to :func:`numpy.random.default_rng`.
+
+    Returns
+    -------
+    numpy array
+        An array with ``nobj + 1`` columns, with the points of each set followed by the points of the next one, \
+        and the set number, from 1 to `nsets`, in the last column.
+
+    Examples
+    --------
+    >>> eaf.generate_nondominated_sets(3, nsets = 2, method = "sphere", seed = 42)
+    array([[0.28118049, 0.9596549 , 1.        ],
+           [0.62368072, 0.78167919, 1.        ],
+           [0.83175713, 0.5551397 , 1.        ],
+           [0.37478326, 0.92711246, 2.        ],
+           [0.01969172, 0.9998061 , 2.        ],
+           [0.74905449, 0.66250839, 2.        ]])
+
+    A million points in 5 objectives split in 1000 sets of different size:
+
+    >>> sizes = np.random.default_rng(1).integers(500, 1500, 1000)
+    >>> data = eaf.generate_nondominated_sets(sizes, nobj = 5, method = "convex", shape = 0.5, seed = 1)
+    >>> data.shape
+    (1001716, 6)
+    """
+    sizes = np.atleast_1d(np.asarray(n))
+    if sizes.ndim != 1 or not np.issubdtype(sizes.dtype, np.integer):
+        raise ValueError("'n' must be an int or a list of int")
+    if nsets is None:
+        nsets = 1 if np.ndim(n) == 0 else len(sizes)
+    if np.ndim(n) == 0:
+        sizes = np.full(nsets, sizes[0])
+    elif len(sizes) != nsets:
+        raise ValueError(f"'n' has {len(sizes)} sizes but 'nsets' is {nsets}")
+    if nsets < 1 or np.any(sizes < 1):
+        raise ValueError("there must be at least one set and one point per set")
+    if nobj < 2:
+        raise ValueError(f"'nobj' must be at least 2 ({nobj} given)")
+    if method not in _NONDOMINATED_SETS_METHODS:
+        raise ValueError(
+            f"unknown method '{method}', allowed methods are {list(_NONDOMINATED_SETS_METHODS)}"
+        )
+    if shape is not None and shape <= 0:
+        raise ValueError("'shape' must be larger than zero")
+
+    rng = np.random.default_rng(seed)
+    points = _front_points(rng, int(sizes.sum()), nobj, method, shape)
+    bounds = np.r_[0, np.cumsum(sizes)]
+    pending = list(range(nsets))
+    while pending:
+        resampled = []
+        for s in pending:
+            rows = points[bounds[s] : bounds[s + 1]]
+            dominated = _rounding_dominated(rows, method)
+            if np.any(dominated):
+                rows[dominated] = _front_points(
+                    rng, np.count_nonzero(dominated), nobj, method, shape
+                )
+                resampled.append(s)
+        pending = resampled
+    return np.column_stack((points, np.repeat(np.arange(1.0, nsets + 1), sizes)))
@@ -0,0 +1,297 @@
+/*************************************************************************
+
+ attindex: Attainment probability of arbitrary points (two and three
+           objectives)
+
+ ---------------------------------------------------------------------
+
+ This program is free software; you can redistribute it and/or
+ modify it under the terms of the GNU General Public License
+ as published by the Free Software Foundation; either version 2
+ of the License, or (at your option) any later version.
+
+ This program is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ General Public License for more details.
+
+ ----------------------------------------------------------------------
+
+ The index keeps the nondominated front of each run, with all objectives
+ minimised and sorted by the first objective.  A run attains a point q iff
+ some point of its front weakly dominates q.
+
+ With two objectives, the front is a staircase with decreasing second
+ objective, so a binary search for the last point with first objective
+ <= q[0] answers the query for one run in O(log n).
+
+ With three objectives, the queries are sorted by their first objective and,
+ for each run, the points of the front are swept in the same order while
+ the nondominated (y, z) staircase of the points seen so far is kept in an
+ AVL tree, so each query is answered by a search for the last point with
+ y <= q[1] in O(log n).
+
+*************************************************************************/
+
+#include "eaf.h"
+#include "avl.h"
+
+struct attindex {
+    int nobj;
+    int nruns;
+    int *cumsize;        /* Cumulative sizes of the fronts.  */
+    objective_t *points; /* The fronts, minimised and sorted by the first
+                            objective.  */
+    bool *maximise;
+};
+
+static inline const objective_t *
+node_point (const avl_node_t *node)
+{
+    return (const objective_t *) node->item;
+}
+
+static int compare_lex (const void *p1, const void *p2, int nobj)
+{
+    const objective_t *x1 = p1;
+    const objective_t *x2 = p2;
+    for (int d = 0; d < nobj; d++) {
+        if (x1[d] < x2[d]) return -1;
+        if (x1[d] > x2[d]) return 1;
+    }
+    return 0;
+}
+
+static int compare_lex_2d (const void *p1, const void *p2)
+{
+    return compare_lex (p1, p2, 2);
+}
+
+static int compare_lex_3d (const void *p1, const void *p2)
+{
+    return compare_lex (p1, p2, 3);
+}
+
+static int compare_y (const void *p1, const void *p2)
+{
+    const objective_t y1 = ((const objective_t *) p1)[1];
+    const objective_t y2 = ((const objective_t *) p2)[1];
+    return (y1 < y2) ? -1 : ((y1 > y2) ? 1 : 0);
+}
+
+/* Whether the (y, z) staircase in TREE weakly dominates (Q[1], Q[2]).  */
+static bool
+staircase_attains (const avl_tree_t *tree, const objective_t *q)
+{
+    avl_node_t *node;
+    if (avl_search_closest(tree, q, &node) < 0)
+        node = node->prev;
+    return node != NULL && node_point(node)[2] <= q[2];
+}
+
+/* Insert NODE into the (y, z) staircase in TREE, unless it is weakly
+   dominated.  Returns whether it was inserted.  */
+static bool
+staircase_insert (avl_tree_t *tree, avl_node_t *node)
+{
+    const objective_t *p = node->item;
+    if (staircase_attains (tree, p))
+        return false;
+
+    /* Remove the points dominated by P, which have y >= p[1] and are
+       consecutive since z decreases with y.  */
+    avl_node_t *next;
+    if (avl_search_closest(tree, p, &next) > 0)
+        next = next->next;
+    while (next != NULL && node_point(next)[2] >= p[2]) {
+        avl_node_t *dominated = next;
+        next = next->next;
+        avl_unlink_node(tree, dominated);
+    }
+    avl_insert_node(tree, node);
+    return true;
+}
+
+/* Sort the SIZE points in POINTS lexicographically and keep only the
+   nondominated ones, removing duplicates.  Returns the new size.  */
+static int
+nondominated_front (objective_t *points, int nobj, int size)
+{
+    qsort(points, size, nobj * sizeof(objective_t),
+          (nobj == 2) ? compare_lex_2d : compare_lex_3d);
+    int n = 0;
+    if (nobj == 2) {
+        objective_t min_y = INFINITY;
+        for (int i = 0; i < size; i++) {
+            if (points[2 * i + 1] >= min_y) continue;
+            min_y = points[2 * i + 1];
+            memmove(points + 2 * n, points + 2 * i, 2 * sizeof(objective_t));
+            n++;
+        }
+        return n;
+    }
+    /* A point is dominated by a previous one iff the (y, z) staircase of the
+       previous points attains it.  */
+    avl_tree_t tree;
+    avl_init_tree(&tree, compare_y, NULL);
+    avl_node_t *nodes = malloc(size * sizeof(avl_node_t));
+    objective_t *kept = malloc(size * nobj * sizeof(objective_t));
+    for (int i = 0; i < size; i++) {
+        const objective_t *p = points + nobj * i;
+        if (staircase_attains (&tree, p)) continue;
+        memcpy(kept + nobj * n, p, nobj * sizeof(objective_t));
+        avl_init_node(&nodes[n], kept + nobj * n);
+        staircase_insert (&tree, &nodes[n]);
+        n++;
+    }
+    memcpy(points, kept, n * nobj * sizeof(objective_t));
+    free(kept);
+    free(nodes);
+    return n;
+}
+
+static void
+copy_minimised (objective_t *dest, const double *src, int nobj,
+                const bool *maximise)
+{
+    for (int d = 0; d < nobj; d++)
+        dest[d] = (maximise[d]) ? -src[d] : src[d];
+}
+
+/* Build the index of the runs of a matrix with NCOLS = NOBJ + 1 columns,
+   grouped as in get_eaf_().  */
+attindex_t *
+attindex_new_ (const double *data, int ncols, const int *order,
+               const int *cumsizes, int nsets, const bool *maximise)
+{
+    const int nobj = ncols - 1;
+    if (nobj != 2 && nobj != 3)
+        fatal_error("%s:%d: attindex requires 2 or 3 objectives (%d given)\n",
+                    __FILE__, __LINE__, nobj);
+
+    attindex_t *index = malloc(sizeof(attindex_t));
+    index->nobj = nobj;
+    index->nruns = nsets;
+    index->cumsize = malloc(nsets * sizeof(int));
+    index->maximise = malloc(nobj * sizeof(bool));
+    memcpy(index->maximise, maximise, nobj * sizeof(bool));
+    index->points = malloc(cumsizes[nsets - 1] * nobj * sizeof(objective_t));
+
+    int n = 0;
+    for (int k = 0, start = 0; k < nsets; start = cumsizes[k], k++) {
+        objective_t *front = index->points + n * nobj;
+        for (int i = start; i < cumsizes[k]; i++) {
+            const double *row = data + ((order) ? order[i] : i) * (size_t) ncols;
+            copy_minimised (front + (i - start) * nobj, row, nobj, maximise);
+        }
+        n += nondominated_front (front, nobj, cumsizes[k] - start);
+        index->cumsize[k] = n;
+    }
+    index->points = realloc(index->points, MAX(n, 1) * nobj * sizeof(objective_t));
+    return index;
+}
+
+void
+attindex_free (attindex_t *index)
+{
+    free(index->points);
+    free(index->maximise);
+    free(index->cumsize);
+    free(index);
+}
+
+int
+attindex_nruns (const attindex_t *index)
+{
+    return index->nruns;
+}
+
+int
+attindex_nobj (const attindex_t *index)
+{
+    return index->nobj;
+}
+
+/* The last point of the 2D FRONT of SIZE points with first objective <= X,
+   or -1 if there is none.  */
+static int
+search_2d (const objective_t *front, int size, objective_t x)
+{
+    int lo = 0, hi = size;
+    while (lo < hi) {
+        int mid = lo + (hi - lo) / 2;
+        if (front[2 * mid] <= x)
+            lo = mid + 1;
+        else
+            hi = mid;
+    }
+    return lo - 1;
+}
+
+typedef struct {
+    objective_t x;
+    int index;
+} query_ref_t;
+
+static int compare_query_x (const void *p1, const void *p2)
+{
+    const objective_t x1 = ((const query_ref_t *) p1)->x;
+    const objective_t x2 = ((const query_ref_t *) p2)->x;
+    return (x1 < x2) ? -1 : ((x1 > x2) ? 1 : 0);
+}
+
+/* Store in COUNT[i] the number of runs that attain the i-th of the NPOINTS
+   rows of POINTS, which has NOBJ columns.  */
+void
+attindex_count_ (const attindex_t *index, const double *points, int npoints,
+                 int *count)
+{
+    const int nobj = index->nobj;
+    objective_t *queries = malloc(MAX(npoints, 1) * nobj * sizeof(objective_t));
+    for (int i = 0; i < npoints; i++) {
+        copy_minimised (queries + i * nobj, points + i * nobj, nobj,
+                        index->maximise);
+        count[i] = 0;
+    }
+
+    if (nobj == 2) {
+        for (int k = 0, start = 0; k < index->nruns; start = index->cumsize[k], k++) {
+            const objective_t *front = index->points + 2 * start;
+            const int size = index->cumsize[k] - start;
+            for (int i = 0; i < npoints; i++) {
+                const int j = search_2d (front, size, queries[2 * i]);
+                count[i] += (j >= 0 && front[2 * j + 1] <= queries[2 * i + 1]);
+            }
+        }
+        free(queries);
+        return;
+    }
+
+    query_ref_t *sorted = malloc(MAX(npoints, 1) * sizeof(query_ref_t));
+    for (int i = 0; i < npoints; i++) {
+        sorted[i].x = queries[3 * i];
+        sorted[i].index = i;
+    }
+    qsort(sorted, npoints, sizeof(query_ref_t), compare_query_x);
+
+    avl_node_t *nodes = malloc(MAX(index->cumsize[index->nruns - 1], 1)
+                               * sizeof(avl_node_t));
+    avl_tree_t tree;
+    for (int k = 0, start = 0; k < index->nruns; start = index->cumsize[k], k++) {
+        const objective_t *front = index->points + 3 * start;
+        const int size = index->cumsize[k] - start;
+        avl_init_tree(&tree, compare_y, NULL);
+        int j = 0;
+        for (int i = 0; i < npoints; i++) {
+            const objective_t *q = queries + 3 * sorted[i].index;
+            for (; j < size && front[3 * j] <= q[0]; j++) {
+                avl_init_node(&nodes[start + j], (void *) (front + 3 * j));
+                staircase_insert (&tree, &nodes[start + j]);
+            }
+            count[sorted[i].index] += staircase_attains (&tree, q);
+        }
+    }
+    free(nodes);
+    free(sorted);
+    free(queries);
+}
@@ -111,6 +111,29 @@ bit_array_copy(bit_array * dest, const bit_array *src, size_t n) {
     memcpy(dest, src, sizeof(bit_array_word_t) * bit_nwords(n));
 }
 
+static inline int
+bit_array_word_popcount(bit_array_word_t x)
+{
+#if defined(__GNUC__)
+    return __builtin_popcountll(x);
+#else
+    int count = 0;
+    for (; x; count++)
+        x &= x - 1;
+    return count;
+#endif
+}
+
+/* The number of bits set in both A and B, of NWORDS words.  */
+static inline int
+bit_array_popcount_and(const bit_array *a, const bit_array *b, size_t nwords)
+{
+    int count = 0;
+    for (size_t k = 0; k < nwords; k++)
+        count += bit_array_word_popcount(a[k] & b[k]);
+    return count;
+}
+
 static inline void
 bit_array_fprintf(FILE *stream, bit_array *b, size_t n)
 {
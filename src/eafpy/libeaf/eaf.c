@@ -55,16 +55,16 @@
 
 static int compare_x_asc (const void *p1, const void *p2)
 {
-    objective_t x1 = **(objective_t **)p1;
-    objective_t x2 = **(objective_t **)p2;
+    objective_t x1 = ((const eaf_row_t *)p1)->x[0];
+    objective_t x2 = ((const eaf_row_t *)p2)->x[0];
 	
     return (x1 < x2) ? -1 : ((x1 > x2) ? 1 : 0);
 }
 
 static int compare_y_desc (const void *p1, const void *p2)
 {
-    objective_t y1 = *(*(objective_t **)p1+1);
-    objective_t y2 = *(*(objective_t **)p2+1);
+    objective_t y1 = ((const eaf_row_t *)p1)->x[1];
+    objective_t y2 = ((const eaf_row_t *)p2)->x[1];
 	
     return (y1 > y2) ? -1 : ((y1 < y2) ? 1 : 0);
 }
@@ -84,6 +84,12 @@ point_printf(FILE *stream, const objective_t *p, int nobj)
 }
 
 eaf_t * eaf_create (int nobj, int nruns, int npoints)
+{
+    return eaf_create_store (nobj, nruns, npoints, EAF_STORE_BITS, nruns / 2);
+}
+
+eaf_t * eaf_create_store (int nobj, int nruns, int npoints,
+                          eaf_store_t store, int division)
 {
     eaf_t *eaf;
     EAF_MALLOC (eaf, 1, eaf_t);
@@ -97,7 +103,12 @@ eaf_t * eaf_create (int nobj, int nruns, int npoints)
     /* fprintf(stderr,"maxsize %ld = %d npoints, %d nruns\n", */
     /*         eaf->maxsize, npoints, nruns); */
     EAF_MALLOC (eaf->data, nobj * eaf->maxsize, objective_t);
-    eaf->bit_attained = malloc (bit_array_bytesize(nruns) * eaf->maxsize);
+    eaf->store = store;
+    eaf->division = division;
+    eaf->bit_attained = (store == EAF_STORE_BITS)
+        ? malloc (bit_array_bytesize(nruns) * eaf->maxsize) : NULL;
+    eaf->left_right = (store == EAF_STORE_LEFT_RIGHT)
+        ? malloc (2 * sizeof(int) * eaf->maxsize) : NULL;
     eaf->attained = NULL;
     OLD_ATTAINED(eaf->attained = malloc(sizeof(bool) * nruns * eaf->maxsize));
     return eaf;
@@ -108,6 +119,7 @@ void eaf_delete (eaf_t * eaf)
     free (eaf->data);
     OLD_ATTAINED(free (eaf->attained));
     free (eaf->bit_attained);
+    free (eaf->left_right);
     free (eaf);
 }
 void eaf_realloc(eaf_t * eaf, size_t nobj)
@@ -115,15 +127,21 @@ void eaf_realloc(eaf_t * eaf, size_t nobj)
     const int nruns = eaf->nruns;
     eaf->data = realloc (eaf->data,
                          sizeof(objective_t) * nobj * eaf->maxsize);
-    eaf_assert(eaf->data);
+    eaf_assert(eaf->data || eaf->maxsize == 0);
     OLD_ATTAINED(
         eaf->attained = realloc (eaf->attained, 
                                  sizeof(bool) * nruns * eaf->maxsize);
         eaf_assert(eaf->attained);
         );
-    eaf->bit_attained = realloc (eaf->bit_attained, 
-                                 bit_array_bytesize(nruns) * eaf->maxsize);
-    eaf_assert(eaf->bit_attained);
+    if (eaf->store == EAF_STORE_BITS) {
+        eaf->bit_attained = realloc (eaf->bit_attained, 
+                                     bit_array_bytesize(nruns) * eaf->maxsize);
+        eaf_assert(eaf->bit_attained || eaf->maxsize == 0);
+    } else if (eaf->store == EAF_STORE_LEFT_RIGHT) {
+        eaf->left_right = realloc (eaf->left_right,
+                                   2 * sizeof(int) * eaf->maxsize);
+        eaf_assert(eaf->left_right || eaf->maxsize == 0);
+    }
 }
 
 objective_t *
@@ -143,15 +161,36 @@ eaf_store_point_help (eaf_t * eaf, int nobj,
         // FIXME: We could save memory by only storing eaf->attained per point if requested.
         eaf_realloc(eaf, nobj);
     }
-    // FIXME: provide a bit_array function to do this.
-    for (int k = 0; k < nruns; k++) {
-        bit_array_set(bit_array_offset(eaf->bit_attained, eaf->size, nruns), k, (bool) save_attained[k]);
-        OLD_ATTAINED(eaf->attained[nruns * eaf->size + k] = (bool) save_attained[k]);
+    /* save_attained may be NULL if the caller stores the attainment itself.  */
+    if (save_attained == NULL)
+        return eaf->data + nobj * eaf->size;
+
+    switch (eaf->store) {
+      case EAF_STORE_BITS:
+          // FIXME: provide a bit_array function to do this.
+          // Zero the whole words first so the bits after the last run are 0.
+          bit_array_zero_all(bit_array_offset(eaf->bit_attained, eaf->size, nruns), nruns);
+          for (int k = 0; k < nruns; k++) {
+              bit_array_set(bit_array_offset(eaf->bit_attained, eaf->size, nruns), k, (bool) save_attained[k]);
+              OLD_ATTAINED(eaf->attained[nruns * eaf->size + k] = (bool) save_attained[k]);
+          }
+          OLD_ATTAINED(
+              bitset_check(bit_array_offset(eaf->bit_attained, eaf->size, eaf->nruns),
+                           eaf->attained + eaf->size * eaf->nruns, eaf->nruns));
+          break;
+      case EAF_STORE_LEFT_RIGHT: {
+          int count_left = 0, count_right = 0;
+          for (int k = 0; k < eaf->division; k++)
+              count_left += (save_attained[k] != 0);
+          for (int k = eaf->division; k < nruns; k++)
+              count_right += (save_attained[k] != 0);
+          eaf->left_right[2 * eaf->size] = count_left;
+          eaf->left_right[2 * eaf->size + 1] = count_right;
+          break;
+      }
+      case EAF_STORE_NONE:
+          break;
     }
-    OLD_ATTAINED(
-    bitset_check(bit_array_offset(eaf->bit_attained, eaf->size, eaf->nruns),
-                 eaf->attained + eaf->size * eaf->nruns, eaf->nruns));
- 
     return eaf->data + nobj * eaf->size;
 }
 
@@ -167,6 +206,20 @@ eaf_adjust_memory (eaf_t * eaf, int nobj)
         bit_array_check(eaf->bit_attained, eaf->attained, eaf->size, eaf->nruns));
 }
 
+/* The number of runs that attain point K before and after the division.  */
+static inline void
+eaf_left_right (const eaf_t * eaf, size_t k, int *count_left, int *count_right)
+{
+    if (eaf->store == EAF_STORE_LEFT_RIGHT) {
+        *count_left = eaf->left_right[2 * k];
+        *count_right = eaf->left_right[2 * k + 1];
+    } else {
+        eaf_assert (eaf->store == EAF_STORE_BITS);
+        attained_left_right (bit_array_offset(eaf->bit_attained, k, eaf->nruns),
+                             eaf->division, eaf->nruns, count_left, count_right);
+    }
+}
+
 static void
 eaf_store_point_2d (eaf_t * eaf, objective_t x, objective_t y, 
                     const int *save_attained)
@@ -234,11 +287,11 @@ eaf_print_attsurf (eaf_t * eaf, FILE *coord_file,  FILE *indic_file, FILE *diff_
 }
 
 __unused static void
-fprint_set2d (FILE *stream, const objective_t * const *data, int ntotal)
+fprint_set2d (FILE *stream, const eaf_row_t *data, int ntotal)
 {
     for (int k = 0; k < ntotal; k++)
         fprintf (stream, "%6d: " point_printf_format " " point_printf_format "\n", k,
-                 data[k][0], data[k][1]);
+                 data[k].x[0], data[k].x[1]);
 }
 
 /* 
@@ -246,8 +299,8 @@ fprint_set2d (FILE *stream, const objective_t * const *data, int ntotal)
           using dimension sweeping.
 
    Input arguments:
-        data : a pointer to the data matrix, stored as a linear array of 
-               objective_t in row major order.
+        rows : an array of pointers to the objective vectors of each point,
+               grouped by non-dominated front.
         cumsize : an array containing the cumulative number of rows in each 
                   non-dominated front (must be non-decreasing).
         nruns :	the number of independent non-dominated fronts.
@@ -260,27 +313,28 @@ fprint_set2d (FILE *stream, const objective_t * const *data, int ntotal)
 */
 
 eaf_t **
-eaf2d (const objective_t *data, const int *cumsize, int nruns,
-       const int *attlevel, const int nlevels)
+eaf2d (const objective_t **rows, const int *cumsize, int nruns,
+       const int *attlevel, const int nlevels, eaf_store_t store, int division)
 {
-    const int nobj = 2;
-    eaf_t **eaf;
-    const objective_t **datax, **datay; /* used to access the data sorted
-                                           according to x or y */
+    eaf_row_t *datax, *datay; /* used to access the data sorted
+                                 according to x or y */
     
     const int ntotal = cumsize[nruns - 1]; /* total number of points in data */
-    int *runtab;	
-    int *attained, *save_attained;
-    int k, j, l;
+    int k, j;
 
     /* Access to the data is made via two arrays of pointers: ix, iy
-       These are sorted, to allow for dimension sweeping */
+       These are sorted, to allow for dimension sweeping.  Each pointer
+       remembers the approximation set (run) to which the point belongs.  */
 
-    datax = malloc (ntotal * sizeof(objective_t *));
-    datay = malloc (ntotal * sizeof(objective_t *));
+    datax = malloc (ntotal * sizeof(eaf_row_t));
+    datay = malloc (ntotal * sizeof(eaf_row_t));
 
-    for (k = 0; k < ntotal ; k++)
-        datax[k] = datay[k] = data + nobj * k;
+    for (k = 0, j = 0; k < ntotal ; k++) {
+        if (k == cumsize[j])
+            j++;
+        datax[k].x = datay[k].x = rows[k];
+        datax[k].run = datay[k].run = j;
+    }
 
 #if DEBUG > 1
     fprintf (stderr, "Original data:\n");
@@ -297,21 +351,25 @@ eaf2d (const objective_t *data, const int *cumsize, int nruns,
     fprint_set2d (stderr, datay, ntotal);
 #endif
 
-    /* Setup a lookup table to go from a point to the approximation
-       set (run) to which it belongs.  */
-
-    runtab = malloc (ntotal * sizeof(int));
-    for (k = 0, j = 0; k < ntotal; k++) {
-        if (k == cumsize[j])
-            j++;
-        runtab[k] = j;
-    }
+    eaf_t **eaf = eaf2d_sorted (datax, datay, ntotal, nruns, attlevel, nlevels,
+                                store, division);
+    free(datay);
+    free(datax);
+    return eaf;
+}
 
-#if DEBUG > 1
-    fprintf (stderr, "Runtab:\n");
-    for (k = 0; k < ntotal; k++) 
-        fprintf (stderr, "%6d: %6d\n", k, runtab[k]);
-#endif
+/* The sweep of eaf2d() over DATAX, sorted by ascending first objective, and
+   DATAY, sorted by descending second objective, which contain the same
+   NTOTAL points.  */
+eaf_t **
+eaf2d_sorted (const eaf_row_t *datax, const eaf_row_t *datay, int ntotal,
+              int nruns, const int *attlevel, const int nlevels,
+              eaf_store_t store, int division)
+{
+    const int nobj = 2;
+    eaf_t **eaf;
+    int *attained, *save_attained;
+    int k, l;
 
     /* Setup tables to keep attainment statistics. In particular,
        save_attained is needed to cope with repeated values on the same
@@ -322,7 +380,7 @@ eaf2d (const objective_t *data, const int *cumsize, int nruns,
     eaf = malloc(nlevels * sizeof(eaf_t*));
 
     for (l = 0; l < nlevels; l++) {
-        eaf[l] = eaf_create (nobj, nruns, ntotal);
+        eaf[l] = eaf_create_store (nobj, nruns, ntotal, store, division);
         int level = attlevel[l];
         int x = 0;
         int y = 0;
@@ -331,17 +389,17 @@ eaf2d (const objective_t *data, const int *cumsize, int nruns,
         for (k = 0; k < nruns; k++) attained[k] = 0;
 
         /* Start at upper-left corner */
-        int run = runtab[(datax[x] - data) / nobj];
+        int run = datax[x].run;
         attained[run]++;
         nattained++;
 
         do {
             /* Move right until desired attainment level is reached */
             while (x < ntotal - 1 && 
-                   (nattained < level || datax[x][0] == datax[x+1][0])) {
+                   (nattained < level || datax[x].x[0] == datax[x+1].x[0])) {
                 x++;
-                if (datax[x][1] <= datay[y][1]) {
-                    run = runtab[(datax[x] - data)/nobj];
+                if (datax[x].x[1] <= datay[y].x[1]) {
+                    run = datax[x].run;
                     if (!attained[run])
                         nattained++;
                     attained[run]++;
@@ -365,8 +423,8 @@ eaf2d (const objective_t *data, const int *cumsize, int nruns,
                 memcpy (save_attained, attained, nruns * sizeof(*attained));
 
                 do {
-                    if (datay[y][0] <= datax[x][0]) {
-                        run = runtab[(datay[y] - data)/nobj];
+                    if (datay[y].x[0] <= datax[x].x[0]) {
+                        run = datay[y].run;
                         attained[run]--;
                         if (!attained[run])
                             nattained--;
@@ -377,12 +435,12 @@ eaf2d (const objective_t *data, const int *cumsize, int nruns,
                     fprintf (stderr, "\n");
 #endif
                     y++;
-                } while (y < ntotal && datay[y][1] == datay[y - 1][1]);
+                } while (y < ntotal && datay[y].x[1] == datay[y - 1].x[1]);
             } while (nattained >= level && y < ntotal);
 
             eaf_assert (nattained < level);
 
-            eaf_store_point_2d (eaf[l], datax[x][0], datay[y - 1][1],
+            eaf_store_point_2d (eaf[l], datax[x].x[0], datay[y - 1].x[1],
                                 save_attained);
 
         } while (x < ntotal - 1 && y < ntotal);
@@ -390,9 +448,6 @@ eaf2d (const objective_t *data, const int *cumsize, int nruns,
     }
     free(save_attained);
     free(attained);
-    free(runtab);
-    free(datay);
-    free(datax);
 
     return eaf;
 }
@@ -419,15 +474,31 @@ eaf_max_size(eaf_t * const * eaf, int nlevels)
 }
 
 static int
-eaf_diff_color(const eaf_t * eaf, size_t k, int nruns)
+gcd(int a, int b)
+{
+    while (b != 0) {
+        int t = a % b;
+        a = b;
+        b = t;
+    }
+    return a;
+}
+
+/* The difference between the fraction of the left runs and the fraction of
+   the right runs that attain point K, multiplied by the least common
+   multiple of the number of left and right runs, so it is an integer.  With
+   as many left as right runs, this is count_left - count_right.  */
+static int
+eaf_diff_color(const eaf_t * eaf, size_t k, __unused int nruns)
 {
-    const bit_array *bit_attained = bit_array_offset(eaf->bit_attained, k, nruns);
     OLD_ATTAINED(
         const bool *attained = eaf->attained + k * nruns;
-        bitset_check(bit_attained, attained, nruns););
+        bitset_check(bit_array_offset(eaf->bit_attained, k, nruns), attained, nruns););
     int count_left, count_right;
-    attained_left_right (bit_attained, nruns/2, nruns, &count_left, &count_right);
-    return count_left - count_right;
+    eaf_left_right (eaf, k, &count_left, &count_right);
+    const int nleft = eaf->division, nright = eaf->nruns - eaf->division;
+    const int g = gcd(nleft, nright);
+    return count_left * (nright / g) - count_right * (nleft / g);
 }
 
 static void
@@ -593,7 +664,6 @@ eaf_compute_polygon (eaf_t **eaf, int nlevels)
     int nruns = eaf[0]->nruns;
     int nobj = eaf[0]->nobj;
 
-    eaf_assert(nruns % 2 == 0);
 
     int max_size = eaf_max_size(eaf, nlevels);
     int *color;
@@ -788,7 +858,6 @@ eaf_compute_polygon_old (eaf_t **eaf, int nlevels)
     int nruns = eaf[0]->nruns;
     int nobj = eaf[0]->nobj;
 
-    eaf_assert(nruns % 2 == 0);
 
     EAF_MALLOC (color, max_size, int);
     EAF_MALLOC(polygon, 1, eaf_polygon_t);
@@ -964,7 +1033,6 @@ eaf_compute_rectangles (eaf_t **eaf, int nlevels)
     int nruns = eaf[0]->nruns;
     const int nobj = eaf[0]->nobj;
 
-    eaf_assert(nruns % 2 == 0);
 
     int max_size = eaf_max_size(eaf, nlevels);
     int *color;
@@ -1033,6 +1101,7 @@ eaf_compute_rectangles (eaf_t **eaf, int nlevels)
     next_eaf:
         continue;
     }
+    free(color);
     return regions;
 #undef eaf_point
 }
@@ -1061,33 +1130,98 @@ int *get_cumsizes_(double *data, int ncols, int npoints, int nsets){
     return cumsizes;
 }
 
-// Take data including data + set number columns and return array of only data
-double * copy_data_no_setnums(double * data, int ncols, int npoints){
-    int data_ncols = ncols-1;
-    double *data_no_sets = malloc(sizeof(double)* data_ncols*npoints);
-    
-    for(int i=0;i<npoints;i++){ 
-        for(int k=0; k<data_ncols; k++){
-            data_no_sets[data_ncols*i+k] = data[ncols*i+k];
-        }
+/* Group the NPOINTS rows of DATA, a row-major matrix of NCOLS columns whose
+   last column is the set number, by set number, in linear time with a
+   counting sort.  This requires the set numbers to be integers in a range
+   not much larger than NPOINTS; otherwise, nothing is stored and 0 is
+   returned.  Returns the number of sets, and stores in *CUMSIZES_P and
+   *LABELS_P the cumulative sizes of the sets and their set numbers in
+   ascending order.  ORDER receives the rows of each set in turn, keeping
+   their relative order, unless *GROUPED is set to true, in which case the
+   rows are already grouped in ascending order of set number.  */
+static int
+group_sets_counting(const double *data, int ncols, int npoints, int *order, bool *grouped,
+                    int **cumsizes_p, double **labels_p)
+{
+#define set_of(i) (data[(size_t) (i) * ncols + ncols - 1])
+    if (npoints == 0)
+        return 0;
+    double min = set_of(0), max = set_of(0);
+    bool sorted = true;
+    for (int i = 0; i < npoints; i++) {
+        const double set = set_of(i);
+        if (!isfinite(set) || set != floor(set))
+            return 0;
+        if (set < min) min = set;
+        if (set > max) max = set;
+        if (i > 0 && set < set_of(i - 1))
+            sorted = false;
+    }
+    if (max - min >= 4.0 * npoints + 1024)
+        return 0;
+
+    const size_t range = (size_t) (max - min) + 1;
+    int *start = calloc(range, sizeof(int));
+    for (int i = 0; i < npoints; i++)
+        start[(size_t) (set_of(i) - min)]++;
+    int nsets = 0;
+    for (size_t v = 0; v < range; v++)
+        nsets += (start[v] > 0);
+    int *cumsizes = malloc(sizeof(int) * nsets);
+    double *labels = malloc(sizeof(double) * nsets);
+    /* Replace the size of each set by the position of its first row.  */
+    int k = 0, pos = 0;
+    for (size_t v = 0; v < range; v++) {
+        if (start[v] == 0) continue;
+        labels[k] = min + v;
+        const int size = start[v];
+        start[v] = pos;
+        pos += size;
+        cumsizes[k++] = pos;
+    }
+    if (!sorted) {
+        for (int i = 0; i < npoints; i++)
+            order[start[(size_t) (set_of(i) - min)]++] = i;
     }
-    return data_no_sets;
+    free(start);
+    *grouped = sorted;
+    *cumsizes_p = cumsizes;
+    *labels_p = labels;
+    return nsets;
+#undef set_of
 }
 
-static eaf_t **
-compute_eaf_helper (double *data, int npoints, int nobj, int nsets, int * levels, int nlevels, bool debug)
+int group_sets_(const double *data, int ncols, int npoints, int *order, bool *grouped,
+                int **cumsizes_p, double **labels_p)
 {
-    // Calculated cumsizes matrix from Data + set number data
-    int * cumsizes = get_cumsizes_(data, nobj+1, npoints, nsets);
-    // Remove set numbers from data. Attsurf function takes data without set numbers
-    double * data_no_setnums = copy_data_no_setnums(data, nobj+1, npoints);
+    int phase = EAF_PROFILE_BEGIN("group_sets");
+    int nsets = group_sets_counting(data, ncols, npoints, order, grouped, cumsizes_p, labels_p);
+    EAF_PROFILE_END(phase, npoints, nsets * (sizeof(int) + sizeof(double)));
+    return nsets;
+}
 
+/* Fill ROWS with pointers to the objectives of the points of DATA, a row-major
+   matrix whose rows are NCOLS doubles apart.  ROWS[i] points to row ORDER[i]
+   of DATA, or to row i if ORDER is NULL.  */
+static void
+eaf_rows_(const objective_t **rows, const double *data, int ncols,
+          const int *order, int npoints)
+{
+    for (int i = 0; i < npoints; i++)
+        rows[i] = data + ((order) ? order[i] : i) * (size_t) ncols;
+}
+
+static eaf_t **
+compute_eaf_helper (const objective_t **rows, int nobj, const int *cumsizes, int nsets,
+                    const int *levels, int nlevels, eaf_store_t store, int division,
+                    bool debug)
+{
     int k;
 
     if(debug == TRUE){
-        printf ("attsurf ({(%f, %f", data[0], data[1]);
+        printf ("attsurf ({(%f, %f", rows[0][0], rows[0][1]);
         for (k = 2; k < nobj; k++) {
-            printf (", %f", data_no_setnums[k]);
+            printf (", %f", rows[0][k]);
         }
         printf (")...}, %d, { %d", nobj, cumsizes[0]);
         for (k = 1; k < nsets; k++) {
@@ -1098,156 +1232,293 @@ compute_eaf_helper (double *data, int npoints, int nobj, int nsets, int * levels
             printf (", %d", levels[k]);
         }
         printf ("}, %d)\n", nlevels);
-        printf("Data: \n");
-        for(int i=0;i<cumsizes[nlevels-1]/2+1;i++){
-            printf("%f %f\n", data_no_setnums[2*i], data_no_setnums[2*i+1]);
-        }
     }
-    eaf_t **eaf = attsurf (data_no_setnums, nobj, cumsizes, nsets, levels, nlevels);
+    int phase = EAF_PROFILE_BEGIN(attsurf_phase(nobj));
+    eaf_t **eaf = attsurf (rows, nobj, cumsizes, nsets, levels, nlevels, store, division);
+    EAF_PROFILE_END(phase, cumsizes[nsets - 1],
+                    eaf_totalpoints(eaf, nlevels) * nobj * sizeof(objective_t));
     if(debug == TRUE){
         for (k = 0; k < nlevels; k++) {
                 printf ("Points in level: eaf[%d] = %lu\n", k, eaf[k]->size);
         };
     }
-    free(data_no_setnums);
-    free(levels);
-    free(cumsizes);
     return eaf;
 }
 
-// Wrapper function for getting array of EAF data, for use in python wrapper. See header for more comments
-double *get_eaf_(double *data, int ncols, int npoints, double * percentiles, int npercentiles,
-                bool choose_percentiles, int nsets, int * eaf_npoints, int * sizeof_eaf, bool debug
-    ){
-    int nobj = ncols -1;
-    int number_levels_selected = 0;
-    int *levels;
-    double *percentiles_selected;
-
-    if(choose_percentiles == FALSE){
-        // Calculate the percentiles based on number of sets -> Number of levels = number of sets
-        levels = malloc(sizeof(int) * nsets);
-        for (int k = 0; k < nsets; k++){
-            levels[k] = k + 1;
-        }
-        number_levels_selected = nsets;
-        percentiles_selected = malloc(sizeof(double) * nsets);
-        for(int i = 0;i<nsets;i++){
-            percentiles_selected[i] = ((i+1) * 100)/nsets;
-        }
-    }else{
-        // Use the percentiles array to select the percentiles
-        levels = malloc(sizeof(int) * npercentiles);
-        for (int k = 0; k < npercentiles; k++){
-            levels[k] = percentile2level(percentiles[k], nsets);
+struct eaf_levels {
+    int nobj;
+    int nsets;
+    int nlevels;
+    eaf_t **eaf;         /* Levels not copied yet, NULL once copied.  */
+    double *percentiles; /* Percentile of each level.  */
+};
+
+// The levels of the EAF of the data, like get_eaf_, to be copied one by one. See header for more comments
+eaf_levels_t *eaf_levels_new_(const double *data, int ncols, const int *order, const int *cumsizes, int nsets,
+                              const double *percentiles, int npercentiles, bool choose_percentiles,
+                              bool store_attained, bool debug)
+{
+    eaf_levels_t *levels = malloc(sizeof(eaf_levels_t));
+    levels->nobj = ncols - 1;
+    levels->nsets = nsets;
+    // Without runs, there are no levels.
+    levels->nlevels = (nsets == 0) ? 0 : (choose_percentiles) ? npercentiles : nsets;
+    levels->percentiles = malloc(sizeof(double) * MAX(levels->nlevels, 1));
+    int *attlevel = malloc(sizeof(int) * MAX(levels->nlevels, 1));
+    for (int k = 0; k < levels->nlevels; k++) {
+        if (choose_percentiles) {
+            attlevel[k] = percentile2level(percentiles[k], nsets);
+            levels->percentiles[k] = percentiles[k];
+        } else {
+            // Calculate the percentiles based on number of sets -> Number of levels = number of sets
+            attlevel[k] = k + 1;
+            levels->percentiles[k] = ((k + 1) * 100) / nsets;
         }
-        number_levels_selected = npercentiles; // 1 percentile maps to one level
-        percentiles_selected = percentiles;
     }
-    
-    eaf_t **eaf = compute_eaf_helper(data, npoints, nobj, nsets, levels, number_levels_selected, debug);
 
-    int totalpoints = eaf_totalpoints(eaf, number_levels_selected);
+    if (nsets == 0) {
+        levels->eaf = NULL;
+        free(attlevel);
+        return levels;
+    }
+    const int npoints = cumsizes[nsets - 1];
+    const objective_t **rows = malloc(sizeof(objective_t *) * npoints);
+    eaf_rows_(rows, data, ncols, order, npoints);
+    // The runs attaining each point are only stored if they are returned.
+    levels->eaf = compute_eaf_helper(rows, levels->nobj, cumsizes, nsets, attlevel, levels->nlevels,
+                                     (store_attained) ? EAF_STORE_BITS : EAF_STORE_NONE, 0, debug);
+    free(rows);
+    free(attlevel);
+    return levels;
+}
+
+void eaf_levels_free(eaf_levels_t *levels)
+{
+    for (int k = 0; k < levels->nlevels; k++)
+        if (levels->eaf[k])
+            eaf_delete(levels->eaf[k]);
+    free(levels->eaf);
+    free(levels->percentiles);
+    free(levels);
+}
+
+int eaf_levels_nlevels(const eaf_levels_t *levels)
+{
+    return levels->nlevels;
+}
+
+int eaf_levels_size(const eaf_levels_t *levels, int k)
+{
+    return (levels->eaf[k]) ? levels->eaf[k]->size : 0;
+}
+
+/* Copy the points of level K to the row-major matrix RESULT, with the
+   percentile of the level in the last column, and, if ATTAINED is not NULL,
+   the runs attaining each point, then free the level.  */
+void eaf_levels_copy_(eaf_levels_t *levels, int k, double *result, uint64_t *attained)
+{
+    eaf_t *eaf = levels->eaf[k];
+    if (eaf == NULL)
+        return;
+    const int nobj = levels->nobj;
+    const int size = eaf->size;
+    int phase = EAF_PROFILE_BEGIN("eaf.copy");
+    if (attained)
+        memcpy(attained, eaf->bit_attained, sizeof(bit_array) * bit_nwords(levels->nsets) * size);
+    for (int i = 0; i < size; i++) {
+        memcpy(result + i * (nobj + 1), eaf->data + i * nobj, sizeof(double) * nobj);
+        result[i * (nobj + 1) + nobj] = levels->percentiles[k];
+    }
+    eaf_delete(eaf);
+    levels->eaf[k] = NULL;
+    EAF_PROFILE_END(phase, size, 0);
+}
+
+// Wrapper function for getting array of EAF data, for use in python wrapper. See header for more comments
+double *get_eaf_(const double *data, int ncols, const int *order, const int *cumsizes, int nsets,
+                 const double * percentiles, int npercentiles, bool choose_percentiles,
+                 int * eaf_npoints, uint64_t **attained_p, bool debug
+    ){
+    eaf_levels_t *levels = eaf_levels_new_(data, ncols, order, cumsizes, nsets, percentiles, npercentiles,
+                                           choose_percentiles, attained_p != NULL, debug);
+    const size_t nwords = bit_nwords(nsets);
+    int totalpoints = eaf_totalpoints(levels->eaf, levels->nlevels);
     if(debug==TRUE) printf("Total points %d \n", totalpoints);
-    
-    int sizeof_eaf_ = sizeof(double) * totalpoints * (nobj + 1);
-    
-    double * return_matrix = malloc(sizeof_eaf_);
 
+    int phase = EAF_PROFILE_BEGIN("get_eaf.copy");
+    double *return_matrix = malloc(sizeof(double) * ncols * (size_t) MAX(totalpoints, 1));
+    bit_array *attained = (attained_p)
+        ? malloc(sizeof(bit_array) * nwords * MAX(totalpoints, 1)) : NULL;
     int point_count = 0;
-    for (int k = 0; k < number_levels_selected; k++) {
-        
-        int this_level_npoints = eaf[k]->size;
+    for (int k = 0; k < levels->nlevels; k++) {
+        const int this_level_npoints = levels->eaf[k]->size;
         if(debug==TRUE){
-            int totalsize = this_level_npoints * nobj;
+            int totalsize = this_level_npoints * (ncols - 1);
             printf ("totalpoints eaf[%d] = %d\n", k, totalsize);
         }
-        for (int i = 0; i < this_level_npoints; i++) {
-            for (int j = 0; j < nobj; j++) {
-                // Add EAF co-oordinates to flat array in row major order
-                return_matrix[point_count*ncols+j] = eaf[k]->data[j + i * nobj];
-            }
-            // After every (number of objective) co-ordinates, add the relevant percentile
-            return_matrix[point_count*ncols+ncols-1] = percentiles_selected[k];
-            point_count++;
-        }
-        eaf_delete(eaf[k]);
-    } 
-    
-    free(eaf);
-    *sizeof_eaf = sizeof_eaf_;
+        eaf_levels_copy_(levels, k, return_matrix + point_count * (size_t) ncols,
+                         (attained_p) ? attained + point_count * nwords : NULL);
+        point_count += this_level_npoints;
+    }
+    eaf_levels_free(levels);
+    EAF_PROFILE_END(phase, totalpoints,
+                    (sizeof(double) * ncols + ((attained_p) ? sizeof(bit_array) * nwords : 0))
+                    * (size_t) totalpoints);
+
     *eaf_npoints = totalpoints;
+    if (attained_p)
+        *attained_p = attained;
     return return_matrix;
 }
 
  
-double *compute_eafdiff_(double *data, int ncols, int npoints, int nsets, int num_intervals, int *return_num_points, int * sizeof_return_vector, bool debug)
+/* All the levels of the EAF of the runs of x followed by the runs of y,
+   storing the number of runs of x and y that attain each point.  */
+static eaf_t **
+eafdiff_levels(const double *x, const int *order_x, const int *cumsizes_x, int nsets_x,
+               const double *y, const int *order_y, const int *cumsizes_y, int nsets_y,
+               int ncols, bool debug)
 {
-
     int nobj = ncols -1;
-    int *levels;
-    double *calculated_percentiles = malloc(sizeof(double) * nsets);;
-    int number_levels_selected = nsets;
-    for(int i = 1;i<nsets+1;i++){
-        calculated_percentiles[i-1] = (i * 100)/nsets;
-    }
-    // Convert the selected percentiles to levels
-    levels = malloc(sizeof(int) * nsets);
-    for (int k = 0; k < number_levels_selected; k++){
-        levels[k] = percentile2level(calculated_percentiles[k], nsets);    }
-    free(calculated_percentiles);
-    
-    eaf_t **eaf = compute_eaf_helper(data, npoints, nobj, nsets, levels, number_levels_selected, debug);
-
-    int nsets1 = nsets / 2;
-    int nsets2 = nsets - nsets1;
-    int totalpoints = eaf_totalpoints (eaf, number_levels_selected);
-    if(debug==TRUE) printf("Total points %d \n", totalpoints);
-
-    int sizeof_eaf_ = sizeof(double) * totalpoints * (nobj + 1);
-    double * return_matrix = malloc(sizeof_eaf_);
+    const int nsets = nsets_x + nsets_y;
+    const int npoints_x = cumsizes_x[nsets_x - 1];
+    const int npoints = npoints_x + cumsizes_y[nsets_y - 1];
+
+    /* The runs of x are followed by the runs of y.  */
+    const objective_t **rows = malloc(sizeof(objective_t *) * npoints);
+    eaf_rows_(rows, x, ncols, order_x, npoints_x);
+    eaf_rows_(rows + npoints_x, y, ncols, order_y, npoints - npoints_x);
+    int *cumsizes = malloc(sizeof(int) * nsets);
+    memcpy(cumsizes, cumsizes_x, sizeof(int) * nsets_x);
+    for (int k = 0; k < nsets_y; k++)
+        cumsizes[nsets_x + k] = npoints_x + cumsizes_y[k];
 
-    int k;
+    int number_levels_selected = nsets;
+    int *levels = malloc(sizeof(int) * nsets);
+    for (int k = 0; k < number_levels_selected; k++)
+        levels[k] = k + 1;
 
-    int pos = 0;
-    for (k = 0; k < nsets; k++) {
-        int npoints = eaf[k]->size;
-        int i, j;
+    eaf_t **eaf = compute_eaf_helper(rows, nobj, cumsizes, nsets, levels, number_levels_selected,
+                                     EAF_STORE_LEFT_RIGHT, nsets_x, debug);
+    free(levels);
+    free(cumsizes);
+    free(rows);
+    return eaf;
+}
 
-        // FIXME: Find the most efficient order of the loop.
-        for (i = 0; i < npoints; i++) {
-            for (j = 0; j < nobj; j++) {
-                return_matrix[pos + j * totalpoints] = eaf[k]->data[j + i * nobj];
-            }
-            pos++;
-        }
+/* The EAF of all the runs of x and y.  Returns a row-major matrix of
+   *RETURN_NUM_POINTS rows and NCOLS columns, with the coordinates of each
+   point followed by the difference between the fraction of the runs of x and
+   the fraction of the runs of y that attain it, times NUM_INTERVALS.  */
+double *compute_eafdiff_(const double *x, const int *order_x, const int *cumsizes_x, int nsets_x,
+                         const double *y, const int *order_y, const int *cumsizes_y, int nsets_y,
+                         int ncols, int num_intervals, int *return_num_points, bool debug)
+{
+    const int nobj = ncols - 1;
+    const int nsets = nsets_x + nsets_y;
+    /* The difference is not defined unless both x and y have runs.  */
+    if (nsets_x == 0 || nsets_y == 0) {
+        *return_num_points = 0;
+        return malloc(sizeof(double) * ncols);
     }
-   
-    pos += (nobj - 1) * totalpoints;
-    for (k = 0; k < nsets; k++) {
-        int i;
-        int npoints = eaf[k]->size;
-        if(debug==TRUE){
-            int totalsize = npoints * nobj;
-            printf ("totalpoints eaf[%d] = %d\n", k, totalsize);
-        }
-        for (i = 0; i < npoints; i++) {
-            int count_left;
-            int count_right;
-            /* bit_array_check(bit_array_offset(eaf[k]->bit_attained,i, eaf[k]->nruns), */
-            /*                 eaf[k]->attained + i * eaf[k]->nruns, npoints, nruns); */
-            attained_left_right (bit_array_offset(eaf[k]->bit_attained, i, eaf[k]->nruns),
-                                 nsets1, nsets, &count_left, &count_right);
-            return_matrix[pos] = (double) num_intervals * (double) ((count_left / (double) nsets1) - 
-                                              (count_right / (double) nsets2));
-            pos++;
+    eaf_t **eaf = eafdiff_levels(x, order_x, cumsizes_x, nsets_x, y, order_y, cumsizes_y, nsets_y,
+                                 ncols, debug);
+
+    const int totalpoints = eaf_totalpoints (eaf, nsets);
+    if (debug == TRUE) printf("Total points %d \n", totalpoints);
+
+    int phase = EAF_PROFILE_BEGIN("eafdiff.copy");
+    double *return_matrix = malloc(sizeof(double) * MAX(totalpoints, 1) * (size_t) ncols);
+    double *row = return_matrix;
+    /* Each level is freed as soon as it is copied, so the memory of the levels
+       is released while the result is filled.  */
+    for (int k = 0; k < nsets; k++) {
+        const int npoints = eaf[k]->size;
+        if (debug == TRUE)
+            printf ("totalpoints eaf[%d] = %d\n", k, npoints * nobj);
+        for (int i = 0; i < npoints; i++) {
+            int count_left, count_right;
+            eaf_left_right (eaf[k], i, &count_left, &count_right);
+            memcpy(row, eaf[k]->data + i * nobj, nobj * sizeof(double));
+            row[nobj] = (double) num_intervals * ((count_left / (double) nsets_x) -
+                                                  (count_right / (double) nsets_y));
+            row += ncols;
         }
         eaf_delete (eaf[k]);
     }
-    
     free(eaf);
-    *sizeof_return_vector = sizeof_eaf_;
+    EAF_PROFILE_END(phase, totalpoints, sizeof(double) * ncols * (size_t) totalpoints);
     *return_num_points = totalpoints;
     return return_matrix;
 }
 
+double *compute_eafdiff_rectangles_(const double *x, const int *order_x, const int *cumsizes_x, int nsets_x,
+                                    const double *y, const int *order_y, const int *cumsizes_y, int nsets_y,
+                                    int num_intervals, int *return_num_rectangles)
+{
+    const int ncols = 3;
+    const int nsets = nsets_x + nsets_y;
+    if (nsets_x == 0 || nsets_y == 0) {
+        *return_num_rectangles = 0;
+        return malloc(sizeof(double) * 5);
+    }
+    eaf_t **eaf = eafdiff_levels(x, order_x, cumsizes_x, nsets_x, y, order_y, cumsizes_y, nsets_y,
+                                 ncols, FALSE);
+    int phase = EAF_PROFILE_BEGIN("eafdiff.rectangles");
+    eaf_polygon_t *rects = eaf_compute_rectangles(eaf, nsets);
+    for (int k = 0; k < nsets; k++)
+        eaf_delete (eaf[k]);
+    free(eaf);
+
+    /* The colors are the difference times lcm(nsets_x, nsets_y).  Regions
+       where the difference is zero are skipped.  */
+    const double lcm = (double) nsets_x * (nsets_y / gcd(nsets_x, nsets_y));
+    const int size = vector_int_size(&rects->col);
+    const objective_t *xy = rects->xy._begin;
+    double *result = malloc(sizeof(double) * MAX(size, 1) * 5);
+    int nrects = 0;
+    for (int i = 0; i < size; i++) {
+        const int color = vector_int_at(&rects->col, i);
+        if (color == 0) continue;
+        memcpy(result + 5 * nrects, xy + 4 * i, 4 * sizeof(double));
+        result[5 * nrects + 4] = num_intervals * color / lcm;
+        nrects++;
+    }
+    vector_objective_dtor (&rects->xy);
+    vector_int_dtor (&rects->col);
+    free(rects);
+    EAF_PROFILE_END(phase, nrects, sizeof(double) * 5 * (size_t) nrects);
+    *return_num_rectangles = nrects;
+    return result;
+}
+
+/* Store in RESULT[m] the maximum, over the NPOINTS points whose attaining runs
+   are given by the NWORDS words of ATTAINED, of the absolute difference
+   between the fraction of the NLEFT runs in mask m that attain the point and
+   the fraction of the other NRIGHT runs that attain it, for each of the
+   NMASKS masks of NWORDS words in MASKS.  */
+void
+eafdiff_max_(const uint64_t *attained, int npoints, int nwords,
+             const uint64_t *masks, int nmasks, int nleft, int nright,
+             double *result)
+{
+    int *total = malloc(MAX(npoints, 1) * sizeof(int));
+    for (int i = 0; i < npoints; i++) {
+        total[i] = 0;
+        for (int k = 0; k < nwords; k++)
+            total[i] += bit_array_word_popcount(attained[i * nwords + k]);
+    }
+    for (int m = 0; m < nmasks; m++) {
+        const uint64_t *mask = masks + m * (size_t) nwords;
+        double max_diff = 0;
+        for (int i = 0; i < npoints; i++) {
+            const int left = bit_array_popcount_and(attained + i * (size_t) nwords,
+                                                    mask, nwords);
+            const double diff = fabs((double) left / nleft
+                                     - (double) (total[i] - left) / nright);
+            if (diff > max_diff) max_diff = diff;
+        }
+        result[m] = max_diff;
+    }
+    free(total);
+}
@@ -55,6 +55,7 @@
 #endif // R_PACKAGE
 
 #include "io.h"
+#include "profile.h"
 
 /* If the input are always integers, adjusting this type will
    certainly improve performance.  */
@@ -79,13 +80,30 @@ to something else for integer */
 
 #include "bit_array.h"
 
+/* A point of the input data and the run it belongs to.  */
+typedef struct {
+    const objective_t *x;
+    int run;
+} eaf_row_t;
+
+/* What is stored about the runs that attain each point.  */
+typedef enum {
+    EAF_STORE_BITS = 0,   /* One bit per run (bit_attained).  */
+    EAF_STORE_NONE,       /* Only the coordinates.  */
+    EAF_STORE_LEFT_RIGHT, /* The number of runs before and after a division
+                             (left_right).  */
+} eaf_store_t;
+
 typedef struct {
     int nobj; /* FIXME: there is no point to store this here.  */
     int nruns;
     size_t size;
     size_t maxsize;
     int nreallocs;
+    eaf_store_t store;
+    int division; /* Runs [0, division) are left, the others are right.  */
     bit_array *bit_attained;
+    int *left_right; /* count_left, count_right of each point.  */
     bool *attained;
     objective_t *data;
 } eaf_t;
@@ -98,7 +116,10 @@ eaf_print_attsurf (eaf_t *,
                    FILE *diff_file); /* output file (difference nruns/2)    */
 
 eaf_t * eaf_create (int nobj, int nruns, int npoints);
+eaf_t * eaf_create_store (int nobj, int nruns, int npoints,
+                          eaf_store_t store, int division);
 void eaf_delete (eaf_t * eaf);
+void eaf_realloc (eaf_t * eaf, size_t nobj);
 objective_t *
 eaf_store_point_help (eaf_t * eaf, int nobj, const int *save_attained);
 
@@ -113,35 +134,84 @@ static inline int eaf_totalpoints (eaf_t **eaf, int n)
 }
 
 eaf_t **
-eaf2d (const objective_t *data,    /* the objective vectors            */
+eaf2d (const objective_t **rows,   /* pointers to the objective vectors */
        const int *cumsize,         /* the cumulative sizes of the runs */
        int nruns,		   /* the number of runs               */
        const int *attlevel,        /* the desired attainment levels    */
-       int nlevels                 /* the number of att levels         */
+       int nlevels,                /* the number of att levels         */
+       eaf_store_t store,          /* what to store about the runs     */
+       int division                /* division for EAF_STORE_LEFT_RIGHT */
     );
 
 eaf_t **
-eaf3d (objective_t *data, const int *cumsize, int nruns,
-       const int *attlevel, const int nlevels);
+eaf2d_sorted (const eaf_row_t *datax, const eaf_row_t *datay, int ntotal,
+              int nruns, const int *attlevel, const int nlevels,
+              eaf_store_t store, int division);
+
+eaf_t **
+eaf3d (const objective_t **rows, const int *cumsize, int nruns,
+       const int *attlevel, const int nlevels, eaf_store_t store, int division);
+
+eaf_t **
+eafnd (const objective_t **rows, int nobj, const int *cumsize, int nruns,
+       const int *attlevel, const int nlevels, eaf_store_t store, int division);
+
+/* The EAF of two objectives, updated incrementally as runs are added.  */
+typedef struct eaf2d_incr eaf2d_incr_t;
+eaf2d_incr_t * eaf2d_incr_new (void);
+void eaf2d_incr_free (eaf2d_incr_t *state);
+int eaf2d_incr_nruns (const eaf2d_incr_t *state);
+void eaf2d_incr_add_ (eaf2d_incr_t *state, const double *data, int ncols,
+                      const int *order, const int *cumsizes, int nsets);
+double * eaf2d_incr_get_ (eaf2d_incr_t *state, const double *percentiles,
+                          int npercentiles, bool choose_percentiles,
+                          int *eaf_npoints);
+
+/* The attainment probability of arbitrary points (2 or 3 objectives).  */
+typedef struct attindex attindex_t;
+attindex_t * attindex_new_ (const double *data, int ncols, const int *order,
+                            const int *cumsizes, int nsets, const bool *maximise);
+void attindex_free (attindex_t *index);
+int attindex_nruns (const attindex_t *index);
+int attindex_nobj (const attindex_t *index);
+void attindex_count_ (const attindex_t *index, const double *points, int npoints,
+                      int *count);
+
+/* Vorob'ev expectation, threshold and (if DEVIATION is not NULL) deviation.  */
+double * vorobev_ (const double *data, int ncols, const int *order,
+                   const int *cumsizes, int nsets, const double *ref,
+                   double *threshold, double *avg_hyp, double *deviation,
+                   int *ve_npoints);
+
+/* Name of the phase of attsurf() in the profile.  */
+static inline const char *
+attsurf_phase (int nobj)
+{
+    return (nobj == 2) ? "eaf2d" : (nobj == 3) ? "eaf3d" : "eafnd";
+}
 
 static inline eaf_t **
-attsurf (objective_t *data,    /* the objective vectors            */
+attsurf (const objective_t **rows, /* pointers to the objective vectors */
          int nobj,                   /* the number of objectives         */
          const int *cumsize,         /* the cumulative sizes of the runs */
          int nruns,		     /* the number of runs               */
          const int *attlevel,        /* the desired attainment levels    */
-         int nlevels                 /* the number of att levels         */
+         int nlevels,                /* the number of att levels         */
+         eaf_store_t store,          /* what to store about the runs     */
+         int division                /* division for EAF_STORE_LEFT_RIGHT */
     )
 {
     switch (nobj) {
       case 2:
-          return eaf2d (data, cumsize, nruns, attlevel, nlevels);
+          return eaf2d (rows, cumsize, nruns, attlevel, nlevels, store, division);
           break;
       case 3:
-          return eaf3d (data, cumsize, nruns, attlevel, nlevels);
+          return eaf3d (rows, cumsize, nruns, attlevel, nlevels, store, division);
           break;    
       default:
-          fatal_error("this implementation only supports two or three dimensions.\n");
+          if (nobj < 2)
+              fatal_error("this implementation requires at least two dimensions.\n");
+          return eafnd (rows, nobj, cumsize, nruns, attlevel, nlevels, store, division);
     }
 }
 
@@ -196,16 +266,42 @@ void eaf_print_polygon (FILE* stream, eaf_t **eaf, int nlevels);
 eaf_polygon_t * eaf_compute_rectangles (eaf_t **eaf, int nlevels);
 
 // Wrapper function for getting array of EAF data, for use in python wrapper
-double * get_eaf_(double *data, /*Flat row major order data matrix input, including objectives and set numbers */
+double * get_eaf_(const double *data, /*Flat row major order data matrix input, including objectives and set numbers */
                 int ncols,  /*Number of columns in the input data array (ncols = number of objectives + 1) */
-                int npoints, /*Number of data points (rows) in input data column */
-                double * percentiles, /*array of percentiles to calculate EAF for, if choose_percentiles argument is true */
+                const int *order, /*Row of data of each point, such that the points of each set are contiguous, or NULL if they already are */
+                const int *cumsizes, /*Cumulative number of points of each set */
+                int nsets, /*Number of different sets in the data input matrix */
+                const double * percentiles, /*array of percentiles to calculate EAF for, if choose_percentiles argument is true */
                 int npercentiles, /*Length of percentiles array */
                 bool choose_percentiles, /*If true,  */
-                int nsets, /*Number of different sets in the data input matrix */
                 int * eaf_npoints, /*Return single integer containing the number of rows in the output matrix  */
-                int * sizeof_eaf, /*Size in bytes of the returned matrix of EAF data points */
+                uint64_t ** attained_p, /*If not NULL, return the runs attaining each point, as bit_nwords(nsets) words per point, where bit k is set if run k attains the point */
                 bool debug /*Print out debugging information */
                 );  /*-> Returns pointer to row major order array containing the EAF data points and relevant percentiles  */
-double *compute_eafdiff_(double *data, int ncols, int npoints, int nsets, int num_intervals, int *return_num_points, int * sizeof_return_vector, bool debug);
-int *get_cumsizes_(double *data, int ncols, int npoints, int nsets);
\ No newline at end of file
+// The levels of the EAF, computed like get_eaf_, to be copied and freed one at a time
+typedef struct eaf_levels eaf_levels_t;
+eaf_levels_t *eaf_levels_new_(const double *data, int ncols, const int *order, const int *cumsizes, int nsets,
+                              const double *percentiles, int npercentiles, bool choose_percentiles,
+                              bool store_attained, /*Store the runs attaining each point */
+                              bool debug);
+void eaf_levels_free(eaf_levels_t *levels);
+int eaf_levels_nlevels(const eaf_levels_t *levels);
+int eaf_levels_size(const eaf_levels_t *levels, int k); /*0 once the level has been copied */
+// Copy level k as eaf_levels_size() rows of ncols values, and bit_nwords(nsets) words per row to attained if not NULL, then free it
+void eaf_levels_copy_(eaf_levels_t *levels, int k, double *result, uint64_t *attained);
+// The EAF differences between the sets of x (left) and the sets of y (right), each given like the data of get_eaf_
+double *compute_eafdiff_(const double *x, const int *order_x, const int *cumsizes_x, int nsets_x,
+                         const double *y, const int *order_y, const int *cumsizes_y, int nsets_y,
+                         int ncols, int num_intervals, int *return_num_points, bool debug);
+// The rectangles of the EAF differences of two objectives as rows (xmin, ymin, xmax, ymax, diff)
+double *compute_eafdiff_rectangles_(const double *x, const int *order_x, const int *cumsizes_x, int nsets_x,
+                                    const double *y, const int *order_y, const int *cumsizes_y, int nsets_y,
+                                    int num_intervals, int *return_num_rectangles);
+// The maximum EAF difference of each assignment of runs to the left (bits set in a mask) and to the right
+void eafdiff_max_(const uint64_t *attained, int npoints, int nwords,
+                  const uint64_t *masks, int nmasks, int nleft, int nright,
+                  double *result);
+int *get_cumsizes_(double *data, int ncols, int npoints, int nsets);
+// Group the rows of data by set number with a counting sort, or return 0 if the set numbers are not suitable
+int group_sets_(const double *data, int ncols, int npoints, int *order, bool *grouped,
+                int **cumsizes_p, double **labels_p);
\ No newline at end of file
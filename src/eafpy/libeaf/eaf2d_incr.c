@@ -0,0 +1,334 @@
+/*************************************************************************
+
+ eaf2d_incr: Incremental computation of the empirical attainment function
+             of two objectives
+
+ ---------------------------------------------------------------------
+
+ This program is free software; you can redistribute it and/or
+ modify it under the terms of the GNU General Public License
+ as published by the Free Software Foundation; either version 2
+ of the License, or (at your option) any later version.
+
+ This program is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ General Public License for more details.
+
+ ----------------------------------------------------------------------
+
+ The state keeps the points of all the runs sorted as needed by the sweep
+ of eaf2d(), so adding runs only sorts the new points and merges them with
+ the previous ones.
+
+ Once the surfaces of all levels have been computed, they are also kept
+ and updated as runs are added.  Each 2D attainment surface is a
+ non-increasing step function y = f_k(x), where f_k(x) is the k-th smallest
+ value among the runs of the minimum y of the points of the run with first
+ objective <= x, and the points of the surface are the points where f_k
+ decreases.  When a run with step function g is added, the new level-k
+ surface is
+
+     min(f_k, max(f_{k-1}, g))    (f_0 = -inf, f_{nruns+1} = +inf)
+
+ so all the surfaces are updated by merging each one with the surface below
+ it and with the new run, which takes time linear in the size of the EAF.
+ Computing all the surfaces again with the sweep takes time proportional to
+ the number of runs times the number of points, which is also the order of
+ the size of the EAF, so the surfaces are dropped instead when more than a
+ few runs are added at once.
+
+*************************************************************************/
+
+#include "eaf.h"
+
+/* Updating the surfaces of all levels with one run takes about a third of
+   the time of computing them again, so they are updated when adding at most
+   this number of runs, and computed again when needed otherwise.  */
+#define EAF2D_INCR_MAX_UPDATE_RUNS 2
+
+struct eaf2d_incr {
+    int nruns;
+    int ntotal;
+    eaf_row_t *datax; /* The points sorted by ascending x.  */
+    eaf_row_t *datay; /* The points sorted by descending y.  */
+    objective_t **blocks; /* The points of each call to eaf2d_incr_add_().  */
+    int nblocks;
+    eaf_t **level; /* level[k] is the attainment surface of level k + 1, or
+                      NULL if the surfaces have not been computed.  */
+};
+
+eaf2d_incr_t *
+eaf2d_incr_new (void)
+{
+    eaf2d_incr_t *state = malloc(sizeof(eaf2d_incr_t));
+    state->nruns = 0;
+    state->ntotal = 0;
+    state->datax = NULL;
+    state->datay = NULL;
+    state->blocks = NULL;
+    state->nblocks = 0;
+    state->level = NULL;
+    return state;
+}
+
+static void
+free_levels (eaf2d_incr_t *state, int nruns)
+{
+    if (state->level == NULL) return;
+    for (int k = 0; k < nruns; k++)
+        eaf_delete(state->level[k]);
+    free(state->level);
+    state->level = NULL;
+}
+
+void
+eaf2d_incr_free (eaf2d_incr_t *state)
+{
+    free_levels (state, state->nruns);
+    for (int k = 0; k < state->nblocks; k++)
+        free(state->blocks[k]);
+    free(state->blocks);
+    free(state->datay);
+    free(state->datax);
+    free(state);
+}
+
+int
+eaf2d_incr_nruns (const eaf2d_incr_t *state)
+{
+    return state->nruns;
+}
+
+static int compare_row_x_asc (const void *p1, const void *p2)
+{
+    objective_t x1 = ((const eaf_row_t *)p1)->x[0];
+    objective_t x2 = ((const eaf_row_t *)p2)->x[0];
+    return (x1 < x2) ? -1 : ((x1 > x2) ? 1 : 0);
+}
+
+static int compare_row_y_desc (const void *p1, const void *p2)
+{
+    objective_t y1 = ((const eaf_row_t *)p1)->x[1];
+    objective_t y2 = ((const eaf_row_t *)p2)->x[1];
+    return (y1 > y2) ? -1 : ((y1 < y2) ? 1 : 0);
+}
+
+/* Merge the sorted arrays A and B into a new array.  */
+static eaf_row_t *
+merge_rows (const eaf_row_t *a, int na, const eaf_row_t *b, int nb,
+            int (*compare)(const void *, const void *))
+{
+    eaf_row_t *out = malloc((na + nb) * sizeof(eaf_row_t));
+    int i = 0, j = 0, k = 0;
+    while (i < na && j < nb)
+        out[k++] = (compare(&b[j], &a[i]) < 0) ? b[j++] : a[i++];
+    while (i < na) out[k++] = a[i++];
+    while (j < nb) out[k++] = b[j++];
+    return out;
+}
+
+/* Store in RUN the points of ROWS, sorted by ascending x, where the minimum
+   of the second objective decreases, that is, its attainment surface.
+   Returns its size.  */
+static int
+run_surface (objective_t *run, const eaf_row_t *rows, int size)
+{
+    int n = 0;
+    objective_t min_y = INFINITY;
+    for (int i = 0; i < size; i++) {
+        const objective_t *x = rows[i].x;
+        if (x[1] >= min_y) continue;
+        /* Points with the same x are not sorted by y.  */
+        if (n > 0 && x[0] == run[2 * (n - 1)])
+            n--;
+        min_y = x[1];
+        run[2 * n] = x[0];
+        run[2 * n + 1] = min_y;
+        n++;
+    }
+    return n;
+}
+
+/* The surface min(A, max(B, C)).  A == NULL means +inf and B == NULL means
+   -inf.  */
+static eaf_t *
+merge_surfaces (const eaf_t *a, const eaf_t *b, const objective_t *c, int nc,
+                int nruns)
+{
+    const int nobj = 2;
+    const size_t na = (a) ? a->size : 0;
+    const size_t nb = (b) ? b->size : 0;
+    /* The surface has at most one point per x of A, B and C.  */
+    eaf_t *out = eaf_create_store (nobj, nruns, 0, EAF_STORE_NONE, 0);
+    out->maxsize = MAX(out->maxsize, na + nb + nc);
+    eaf_realloc (out, nobj);
+    objective_t va = INFINITY, vb = (b) ? INFINITY : -INFINITY, vc = INFINITY;
+    objective_t last = INFINITY;
+    size_t ia = 0, ib = 0;
+    int ic = 0;
+
+    while (ia < na || ib < nb || ic < nc) {
+        objective_t x = INFINITY;
+        if (ia < na) x = MIN(x, a->data[2 * ia]);
+        if (ib < nb) x = MIN(x, b->data[2 * ib]);
+        if (ic < nc) x = MIN(x, c[2 * ic]);
+        if (ia < na && a->data[2 * ia] == x) va = a->data[2 * ia++ + 1];
+        if (ib < nb && b->data[2 * ib] == x) vb = b->data[2 * ib++ + 1];
+        if (ic < nc && c[2 * ic] == x) vc = c[2 * ic++ + 1];
+        const objective_t v = MIN(va, MAX(vb, vc));
+        if (v < last) {
+            objective_t *pos = eaf_store_point_help (out, nobj, NULL);
+            pos[0] = x;
+            pos[1] = v;
+            out->size++;
+            last = v;
+        }
+    }
+    return out;
+}
+
+/* Update the surfaces of all levels with the runs in ROWS, sorted by
+   ascending x, with run numbers FIRST_RUN, ..., FIRST_RUN + NSETS - 1.  */
+static void
+update_levels (eaf2d_incr_t *state, const eaf_row_t *rows, int size,
+               int first_run, int nsets)
+{
+    const int nobj = 2;
+    int *run_start = calloc(nsets + 1, sizeof(int));
+    for (int i = 0; i < size; i++)
+        run_start[rows[i].run - first_run + 1]++;
+    for (int k = 0; k < nsets; k++)
+        run_start[k + 1] += run_start[k];
+    eaf_row_t *by_run = malloc(size * sizeof(eaf_row_t));
+    int *next = malloc(nsets * sizeof(int));
+    memcpy(next, run_start, nsets * sizeof(int));
+    /* A stable counting sort by run, so each run remains sorted by x.  */
+    for (int i = 0; i < size; i++)
+        by_run[next[rows[i].run - first_run]++] = rows[i];
+    objective_t *run = malloc(size * nobj * sizeof(objective_t));
+
+    state->level = realloc(state->level,
+                           (first_run + nsets) * sizeof(eaf_t *));
+    eaf_t **level = state->level;
+    for (int k = 0; k < nsets; k++) {
+        const int nrun = run_surface (run, by_run + run_start[k],
+                                      run_start[k + 1] - run_start[k]);
+        const int nruns = first_run + k + 1;
+        /* From the top, so that level[l - 1] is still the old surface.  */
+        for (int l = nruns - 1; l >= 0; l--) {
+            eaf_t *new_level = merge_surfaces ((l < nruns - 1) ? level[l] : NULL,
+                                               (l > 0) ? level[l - 1] : NULL,
+                                               run, nrun, nruns);
+            if (l < nruns - 1)
+                eaf_delete(level[l]);
+            level[l] = new_level;
+        }
+    }
+    free(run);
+    free(next);
+    free(by_run);
+    free(run_start);
+}
+
+/* Add the runs of a matrix with NCOLS == 3 columns, grouped as in get_eaf_(),
+   to STATE.  */
+void
+eaf2d_incr_add_ (eaf2d_incr_t *state, const double *data, int ncols,
+                 const int *order, const int *cumsizes, int nsets)
+{
+    const int nobj = 2;
+    eaf_assert(ncols == nobj + 1);
+    const int size = cumsizes[nsets - 1];
+    const int first_run = state->nruns;
+
+    /* Keep a copy of the objectives, since DATA is owned by the caller.  */
+    objective_t *points = malloc(size * nobj * sizeof(objective_t));
+    eaf_row_t *newx = malloc(size * sizeof(eaf_row_t));
+    for (int k = 0, i = 0; k < nsets; k++) {
+        for (; i < cumsizes[k]; i++) {
+            const double *row = data + ((order) ? order[i] : i) * (size_t) ncols;
+            points[nobj * i] = row[0];
+            points[nobj * i + 1] = row[1];
+            newx[i].x = points + nobj * i;
+            newx[i].run = first_run + k;
+        }
+    }
+    state->blocks = realloc(state->blocks, (state->nblocks + 1) * sizeof(objective_t *));
+    state->blocks[state->nblocks++] = points;
+
+    eaf_row_t *newy = malloc(size * sizeof(eaf_row_t));
+    memcpy(newy, newx, size * sizeof(eaf_row_t));
+    qsort(newx, size, sizeof(eaf_row_t), compare_row_x_asc);
+    qsort(newy, size, sizeof(eaf_row_t), compare_row_y_desc);
+
+    eaf_row_t *datax = merge_rows (state->datax, state->ntotal, newx, size,
+                                   compare_row_x_asc);
+    eaf_row_t *datay = merge_rows (state->datay, state->ntotal, newy, size,
+                                   compare_row_y_desc);
+    free(state->datax);
+    free(state->datay);
+    state->datax = datax;
+    state->datay = datay;
+    state->ntotal += size;
+
+    if (state->level != NULL) {
+        if (nsets <= EAF2D_INCR_MAX_UPDATE_RUNS)
+            update_levels (state, newx, size, first_run, nsets);
+        else
+            free_levels (state, first_run);
+    }
+    state->nruns += nsets;
+    free(newy);
+    free(newx);
+}
+
+/* The current EAF of STATE, in the same format as get_eaf_().  */
+double *
+eaf2d_incr_get_ (eaf2d_incr_t *state, const double *percentiles,
+                 int npercentiles, bool choose_percentiles,
+                 int *eaf_npoints)
+{
+    const int nobj = 2, ncols = nobj + 1;
+    const int nruns = state->nruns;
+    const int nlevels = (choose_percentiles) ? npercentiles : nruns;
+    int *levels = malloc(nlevels * sizeof(int));
+    for (int l = 0; l < nlevels; l++)
+        levels[l] = (choose_percentiles)
+            ? percentile2level(percentiles[l], nruns) : l + 1;
+
+    eaf_t **eaf;
+    if (state->level == NULL && !choose_percentiles) {
+        /* Keep the surfaces of all levels to update them later.  */
+        state->level = eaf2d_sorted (state->datax, state->datay, state->ntotal,
+                                     nruns, levels, nlevels, EAF_STORE_NONE, 0);
+    }
+    if (state->level != NULL) {
+        eaf = malloc(nlevels * sizeof(eaf_t *));
+        for (int l = 0; l < nlevels; l++)
+            eaf[l] = state->level[levels[l] - 1];
+    } else {
+        eaf = eaf2d_sorted (state->datax, state->datay, state->ntotal,
+                            nruns, levels, nlevels, EAF_STORE_NONE, 0);
+    }
+
+    const int totalpoints = eaf_totalpoints(eaf, nlevels);
+    double *result = malloc(sizeof(double) * MAX(totalpoints, 1) * ncols);
+    int point_count = 0;
+    for (int l = 0; l < nlevels; l++) {
+        const double percentile = (choose_percentiles)
+            ? percentiles[l] : (double) (((l + 1) * 100) / nruns);
+        for (size_t i = 0; i < eaf[l]->size; i++) {
+            result[point_count * ncols] = eaf[l]->data[nobj * i];
+            result[point_count * ncols + 1] = eaf[l]->data[nobj * i + 1];
+            result[point_count * ncols + 2] = percentile;
+            point_count++;
+        }
+        if (state->level == NULL)
+            eaf_delete(eaf[l]);
+    }
+    free(eaf);
+    free(levels);
+    *eaf_npoints = totalpoints;
+    return result;
+}
@@ -56,8 +56,6 @@ typedef struct removed_list {
     avl_node_t *head;
 } removed_list_t;
 
-static removed_list_t * removed_list;
-
 /*
 static bool avl_tree_is_empty (const avl_tree_t *avltree)
 {
@@ -84,11 +82,10 @@ static int compare_node(const void *p1, const void *p2)
   Create a list of points, ordered by the third coordinate.
 */
 static dlnode_t *
-setup_cdllist(objective_t *data, int d, const int *cumsize, int nsets)
+setup_cdllist(const objective_t **rows, int d, const int *cumsize, int nsets)
 {
     int n = cumsize[nsets - 1];
     dlnode_t *head = malloc ((n + 1) * sizeof(dlnode_t));
-    head->x = data;
     head[0].set = 0;
     
     int i, k;
@@ -96,8 +93,9 @@ setup_cdllist(objective_t *data, int d, const int *cumsize, int nsets)
         if (i == cumsize[k]) k++;
 
         head[i+1].set = k;
-        // ->x points to the first coordinate of each point.
-        head[i+1].x = head[i].x + d ;// this will be fixed a few lines below... 
+        // ->x points to the last coordinate of each point.  The points are
+        // never modified.
+        head[i+1].x = (objective_t *) rows[i] + d - 1;
         head[i+1].next = head[i].next;
         head[i+1].prev = head[i].prev;
     }
@@ -107,10 +105,6 @@ setup_cdllist(objective_t *data, int d, const int *cumsize, int nsets)
     for (i = 0; i < n; i++) 
         scratch[i] = head + i + 1; 
 
-    // ->x points to the last coordinate of each point.
-    for (i = 0; i < n; i++)
-        scratch[i]->x--;
-    
     // Sort according to the last coordinate.
     qsort(scratch, n, sizeof(dlnode_t*), compare_node);
     
@@ -438,14 +432,18 @@ static void avl_add_promoter(avl_node_t *avlnode, int set, avl_node_t *promoter)
 }
 
 
-static void add_removed(avl_node_t *node)
+/* Nodes removed from a level are kept until the EAF has been built because
+   other nodes may still point to them.  The list is owned by each call to
+   eaf3d() so that several calls may run concurrently.  */
+static void add_removed(removed_list_t *removed_list, avl_node_t *node)
 {
     node->next = removed_list->head;
     removed_list->head = node;
 }
 
 static avl_node_t *
-add2level(avl_tree_t *tree, objective_t *item, avl_tree_t *output, int set, avl_node_t * promoter)
+add2level(avl_tree_t *tree, objective_t *item, avl_tree_t *output, int set,
+          avl_node_t * promoter, removed_list_t *removed_list)
 {
     avl_node_t *prevnode;
     avl_node_t *aux;
@@ -482,7 +480,7 @@ add2level(avl_tree_t *tree, objective_t *item, avl_tree_t *output, int set, avl_
                 add2output(output, aux);
             else{
                 free(aux->item);
-                add_removed(aux);
+                add_removed(removed_list, aux);
                 aux->remover = newnode;
             }
             /* Each point that is removed from this level,
@@ -545,8 +543,8 @@ static objective_t * new_point(objective_t x1, objective_t x2, objective_t x3)
 
 
 void 
-eaf3df(dlnode_t *list, avl_tree_t **set, avl_tree_t **level, 
-       avl_tree_t **output, int nset)
+eaf3df(dlnode_t *list, avl_tree_t **set, avl_tree_t **level,
+       avl_tree_t **output, int nset, removed_list_t *removed_list)
 {
     // point from some level immediately at new's left, corresponds to r in pseudocode
     avl_node_t *leftNodeL; 
@@ -646,7 +644,7 @@ eaf3df(dlnode_t *list, avl_tree_t **set, avl_tree_t **level,
                         aux[k].promoter = aux[k].levelNode;
                     } else {
                         objective_t *value = new_point(node_point(aux[k].levelNode)[0], node_point(aux[k].levelNode)[1], new->x[2]);
-                        tnode = add2level(level[k+1], value, output[k+1], new->set, aux[k].promoter);
+                        tnode = add2level(level[k+1], value, output[k+1], new->set, aux[k].promoter, removed_list);
                         if(tnode != NULL && new->x[2] == node_point(aux[k].promoter)[2] && node_point(aux[k].levelNode)[0] == node_point(aux[k].promoter)[0]){
                             aux[k].promoter->equal = tnode;
                         }
@@ -666,7 +664,7 @@ eaf3df(dlnode_t *list, avl_tree_t **set, avl_tree_t **level,
             if(node_point(aux[k].levelNode)[0] < node_point(setNode)[0]){
                 
                 objective_t *value =new_point(node_point(aux[k].levelNode)[0], new->x[1], new->x[2]);
-                tnode = add2level(level[k+1], value, output[k+1], new->set, aux[k].promoter);
+                tnode = add2level(level[k+1], value, output[k+1], new->set, aux[k].promoter, removed_list);
                 if (tnode != NULL && new->x[2] == node_point(aux[k].levelNode)[2] && new->x[1] == node_point(aux[k].levelNode)[1]){
                     aux[k].promoter->equal = tnode;
                 }
@@ -678,7 +676,7 @@ eaf3df(dlnode_t *list, avl_tree_t **set, avl_tree_t **level,
         add2set(set[new->set], newPrev, tnode, new->x);
         
         //add new to the lowest level where it isn't dominated by any point from that level
-        tnode = add2level(level[stop_at], copy_point(new->x), output[stop_at], new->set, dom_new);
+        tnode = add2level(level[stop_at], copy_point(new->x), output[stop_at], new->set, dom_new, removed_list);
         if(stop_at > 0 && tnode != NULL && new->x[2] == node_point(dom_new)[2] &&
            new->x[1] == node_point(dom_new)[1] && new->x[0] == node_point(dom_new)[0]){
             dom_new->equal = tnode;
@@ -746,8 +744,8 @@ static void free_removed(removed_list_t * removed_list)
     free(removed_list);
 }
 
-__unused static void
-freeoutput(avl_tree_t **output, int nset)
+static void
+freeoutput(avl_tree_t **output, int nset, removed_list_t *removed_list)
 {
     int i;
     for(i = 0; i < nset; i++){
@@ -789,8 +787,8 @@ eaf_store_point_3d (eaf_t * eaf, objective_t x, objective_t y, objective_t z,
 
 
 eaf_t **
-eaf3d (objective_t *data, const int *cumsize, int nruns,
-       const int *attlevel, const int nlevels)
+eaf3d (const objective_t **rows, const int *cumsize, int nruns,
+       const int *attlevel, const int nlevels, eaf_store_t store, int division)
 {
     const int nobj = 3;
     const int ntotal = cumsize[nruns - 1]; /* total number of points in data */
@@ -810,10 +808,10 @@ eaf3d (objective_t *data, const int *cumsize, int nruns,
     
     }
     
-    removed_list = (removed_list_t *) malloc(sizeof(removed_list_t));
+    removed_list_t *removed_list = malloc(sizeof(removed_list_t));
     removed_list->head = NULL;
-    dlnode_t *list = setup_cdllist(data, nobj, cumsize, nruns);
-    eaf3df(list, set, level, output, nruns);
+    dlnode_t *list = setup_cdllist(rows, nobj, cumsize, nruns);
+    eaf3df(list, set, level, output, nruns, removed_list);
    
     for (i = 0; i < nruns; i++) {
         add2output_all(output[i], level[i]);
@@ -834,19 +832,23 @@ eaf3d (objective_t *data, const int *cumsize, int nruns,
     eaf_t **eaf = malloc(nlevels * sizeof(eaf_t*));
     int * attained = malloc(nruns * sizeof(int));
     for (int l = 0; l < nlevels; l++) {
-        eaf[l] = eaf_create (nobj, nruns, ntotal);
+        eaf[l] = eaf_create_store (nobj, nruns, ntotal, store, division);
         int k = attlevel[l] - 1;
         avl_node_t * aux = output[k]->head;
         while (aux) {
             objective_t * val = aux->item;
-            for(int j = 0; j < nruns; j++)
-                attained[j] = 0;
-            find_all_promoters(aux, attained, nruns);
+            if (store != EAF_STORE_NONE) {
+                for(int j = 0; j < nruns; j++)
+                    attained[j] = 0;
+                find_all_promoters(aux, attained, nruns);
+            }
             eaf_store_point_3d (eaf[l], val[0], val[1], val[2],
-                                attained);
+                                (store != EAF_STORE_NONE) ? attained : NULL);
             aux = aux->next;
         }
     }
+    free(attained);
+    freeoutput(output, nruns, removed_list);
     return eaf;
 }
 
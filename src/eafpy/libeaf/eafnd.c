@@ -0,0 +1,216 @@
+/*************************************************************************
+
+ eafnd: Compute the empirical attainment function from a sequence of
+        non-dominated point sets (more than three objectives)
+
+ ---------------------------------------------------------------------
+
+ This program is free software; you can redistribute it and/or
+ modify it under the terms of the GNU General Public License
+ as published by the Free Software Foundation; either version 2
+ of the License, or (at your option) any later version.
+
+ This program is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ General Public License for more details.
+
+ ----------------------------------------------------------------------
+
+ Dimension sweep over the last objective.  Points are processed in
+ ascending order of their last objective.  After adding all the points
+ whose last objective is equal to z, the attainment surfaces of the
+ (nobj-1)-dimensional projection of the points seen so far are computed
+ recursively (eaf3d() at the bottom of the recursion).  A point s of the
+ level-k surface at z is a point (s, z) of the nobj-dimensional level-k
+ surface iff s was not attained at level k at the previous value of z.
+ Since the attained region only grows with z, s was attained iff it was
+ already a point of the previous level-k surface, so the new points are
+ found by merging the two surfaces sorted lexicographically.  The runs
+ that attain (s, z) are the runs that attain s in the projection.
+
+ The surfaces of the projection are computed from scratch at each of the
+ up to n distinct values of the last objective, where n is the total number
+ of points, so nobj objectives take O(n^(nobj-3)) calls to eaf3d(), each on
+ up to n points.
+
+*************************************************************************/
+
+#include "eaf.h"
+
+typedef struct {
+    const objective_t *x;
+    int dim;
+    size_t index;
+} point_ref_t;
+
+static int compare_last_objective(const void *p1, const void *p2)
+{
+    const point_ref_t *r1 = p1;
+    const point_ref_t *r2 = p2;
+    const objective_t x1 = r1->x[r1->dim];
+    const objective_t x2 = r2->x[r2->dim];
+
+    return (x1 < x2) ? -1 : (x1 > x2) ? 1 : 0;
+}
+
+static int compare_lex(const objective_t *x1, const objective_t *x2, int dim)
+{
+    for (int d = 0; d < dim; d++) {
+        if (x1[d] < x2[d]) return -1;
+        if (x1[d] > x2[d]) return 1;
+    }
+    return 0;
+}
+
+static int compare_point_ref(const void *p1, const void *p2)
+{
+    const point_ref_t *r1 = p1;
+    const point_ref_t *r2 = p2;
+    return compare_lex(r1->x, r2->x, r1->dim);
+}
+
+eaf_t **
+eafnd (const objective_t **rows, int nobj, const int *cumsize, int nruns,
+       const int *attlevel, const int nlevels, eaf_store_t store, int division)
+{
+    const int ntotal = cumsize[nruns - 1];
+    const int dim = nobj - 1; /* dimension of the projection.  */
+
+    /* Points sorted by their last objective.  */
+    point_ref_t *sorted = malloc(ntotal * sizeof(point_ref_t));
+    for (int i = 0; i < ntotal; i++) {
+        sorted[i].x = rows[i];
+        sorted[i].dim = dim;
+        sorted[i].index = i;
+    }
+    qsort(sorted, ntotal, sizeof(point_ref_t), compare_last_objective);
+
+    /* seen[i]: point i has already been added to the projection.  */
+    bool *seen = calloc(ntotal, sizeof(bool));
+    /* The projection of a point is given by the first DIM objectives of its
+       row, so the projection does not need to copy any data.  */
+    const objective_t **proj = malloc(ntotal * sizeof(objective_t *));
+    int *proj_cumsize = malloc(nruns * sizeof(int));
+    /* proj_run[j]: the run of the j-th non-empty run of the projection.  */
+    int *proj_run = malloc(nruns * sizeof(int));
+    int *sub_attlevel = malloc(nlevels * sizeof(int));
+    int *sub_level = malloc(nlevels * sizeof(int));
+    int *attained = malloc(nruns * sizeof(int));
+    point_ref_t *refs = NULL;
+    size_t refs_size = 0;
+
+    /* Previous surface of each level, sorted lexicographically.  */
+    objective_t **prev = malloc(nlevels * sizeof(objective_t *));
+    int *prev_size = malloc(nlevels * sizeof(int));
+    eaf_t **eaf = malloc(nlevels * sizeof(eaf_t *));
+    for (int l = 0; l < nlevels; l++) {
+        prev[l] = NULL;
+        prev_size[l] = 0;
+        eaf[l] = eaf_create_store (nobj, nruns, ntotal, store, division);
+    }
+
+    int i = 0;
+    while (i < ntotal) {
+        const objective_t z = sorted[i].x[dim];
+        for (; i < ntotal && sorted[i].x[dim] == z; i++)
+            seen[sorted[i].index] = true;
+
+        /* Project the points seen so far, keeping each run contiguous and
+           skipping empty runs.  */
+        int size = 0, nproj = 0, proj_division = 0;
+        for (int p = 0, k = 0; k < nruns; k++) {
+            for (; p < cumsize[k]; p++) {
+                if (!seen[p]) continue;
+                proj[size++] = rows[p];
+            }
+            if (nproj == 0 ? size > 0 : size > proj_cumsize[nproj - 1]) {
+                proj_cumsize[nproj] = size;
+                proj_run[nproj] = k;
+                nproj++;
+                if (k < division) proj_division++;
+            }
+        }
+
+        /* Levels larger than the number of non-empty runs are empty.  */
+        int nsub = 0;
+        for (int l = 0; l < nlevels; l++) {
+            if (attlevel[l] <= nproj) {
+                sub_level[nsub] = l;
+                sub_attlevel[nsub] = attlevel[l];
+                nsub++;
+            }
+        }
+        if (nsub == 0) continue;
+
+        eaf_t **sub = attsurf (proj, dim, proj_cumsize, nproj,
+                               sub_attlevel, nsub, store, proj_division);
+
+        for (int s = 0; s < nsub; s++) {
+            const int l = sub_level[s];
+            eaf_t *surf = sub[s];
+            if (surf->size > refs_size) {
+                refs_size = surf->size;
+                refs = realloc(refs, refs_size * sizeof(point_ref_t));
+            }
+            for (size_t j = 0; j < surf->size; j++) {
+                refs[j].x = surf->data + j * dim;
+                refs[j].dim = dim;
+                refs[j].index = j;
+            }
+            qsort(refs, surf->size, sizeof(point_ref_t), compare_point_ref);
+
+            objective_t *sorted_surf = malloc(surf->size * dim * sizeof(objective_t));
+            const objective_t *p = prev[l];
+            const objective_t *p_end = prev[l] + prev_size[l] * dim;
+            for (size_t j = 0; j < surf->size; j++) {
+                const objective_t *x = refs[j].x;
+                memcpy(sorted_surf + j * dim, x, dim * sizeof(objective_t));
+                int cmp = -1;
+                while (p < p_end && (cmp = compare_lex(p, x, dim)) < 0)
+                    p += dim;
+                if (p < p_end && cmp == 0)
+                    continue;
+                objective_t *pos;
+                if (store == EAF_STORE_BITS) {
+                    const bit_array *bits =
+                        bit_array_offset(surf->bit_attained, refs[j].index, nproj);
+                    for (int k = 0; k < nruns; k++)
+                        attained[k] = 0;
+                    for (int k = 0; k < nproj; k++)
+                        attained[proj_run[k]] = bit_array_get(bits, k);
+                    pos = eaf_store_point_help (eaf[l], nobj, attained);
+                } else {
+                    pos = eaf_store_point_help (eaf[l], nobj, NULL);
+                    if (store == EAF_STORE_LEFT_RIGHT)
+                        memcpy(eaf[l]->left_right + 2 * eaf[l]->size,
+                               surf->left_right + 2 * refs[j].index, 2 * sizeof(int));
+                }
+                memcpy(pos, x, dim * sizeof(objective_t));
+                pos[dim] = z;
+                eaf[l]->size++;
+            }
+            /* The surface at z becomes the previous surface.  */
+            free(prev[l]);
+            prev[l] = sorted_surf;
+            prev_size[l] = surf->size;
+            eaf_delete(surf);
+        }
+        free(sub);
+    }
+
+    for (int l = 0; l < nlevels; l++)
+        free(prev[l]);
+    free(prev);
+    free(prev_size);
+    free(refs);
+    free(attained);
+    free(sub_level);
+    free(sub_attlevel);
+    free(proj_run);
+    free(proj_cumsize);
+    free(proj);
+    free(seen);
+    free(sorted);
+    return eaf;
+}
@@ -44,6 +44,7 @@
 *************************************************************************/
 
 #include "hv.h"
+#include "profile.h"
 #include <stdlib.h>
 #include <stdio.h>
 #include <limits.h>
@@ -870,6 +871,7 @@ double fpli_hv(const double *data, int d, int n, const double *ref)
     
     if (n == 0) return 0.0;
 
+    int phase = EAF_PROFILE_BEGIN("hv");
     avl_tree_t *tree = avl_alloc_tree ((avl_compare_t) compare_tree_asc,
                                        (avl_freeitem_t) NULL);
     dlnode_t *list = setup_cdllist(data, d, n);
@@ -892,6 +894,7 @@ double fpli_hv(const double *data, int d, int n, const double *ref)
     /* Clean up.  */
     free_cdllist (list);
     free (tree);  /* The nodes are freed by free_cdllist ().  */
+    EAF_PROFILE_END(phase, n, 0);
 
     return hyperv;
 }
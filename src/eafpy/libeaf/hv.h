@@ -40,6 +40,9 @@ extern "C" {
 
 double fpli_hv(const double *data, int d, int n, const double *ref);
 void hv_contributions (double *hvc, double *points, int dim, int size, const double * ref);
+void hv_trajectory_ (double *hv, const double *data, int nobj, const int *cumsizes, int nsets, const double *ref, const int *counts, int ncounts);
+double hv_subset_greedy_ (const double *data, int nobj, int npoints, const double *ref, int k, int *selected);
+double hv_subset_exact2d_ (const double *data, int npoints, const double *ref, int k, int *selected);
 #ifdef __cplusplus
 }
 #endif
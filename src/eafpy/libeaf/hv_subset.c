@@ -0,0 +1,277 @@
+/*************************************************************************
+
+ hv_subset: selection of k points that maximise the hypervolume
+
+ ---------------------------------------------------------------------
+
+ This program is free software; you can redistribute it and/or
+ modify it under the terms of the GNU General Public License
+ as published by the Free Software Foundation; either version 2
+ of the License, or (at your option) any later version.
+
+ This program is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ General Public License for more details.
+
+ ----------------------------------------------------------------------
+
+ The input points are mutually nondominated and strictly dominate the
+ reference point.
+
+ The greedy selection adds, k times, the point whose hypervolume
+ contribution to the points already selected is largest.  Contributions
+ can only decrease as points are selected (the hypervolume is submodular),
+ so the candidates are kept in a max-heap by their last computed
+ contribution, and only the contribution of the top of the heap is
+ updated (lazy greedy): if it is still the largest, the point is selected.
+ With two objectives, the selected points form a staircase kept in an AVL
+ tree, so a contribution takes O(log k) time.  With more objectives, the
+ contribution of p is the volume of its box minus the hypervolume of the
+ selected points moved up to p, computed by fpli_hv().
+
+ The exact selection for two objectives is the dynamic program of Auger et
+ al. (FOGA 2009): with the points sorted by increasing first objective,
+
+   f[j][i] = max_{l < i} f[j-1][l] + (ref[0] - x_i) * (y_l - y_i)
+
+ is the largest hypervolume of j points whose last point is i.  For fixed j,
+ the maximum over l is the upper envelope of the lines with slope y_l and
+ intercept f[j-1][l], evaluated at ref[0] - x_i.  The slopes are added in
+ decreasing order and the queries are decreasing, so the envelope is kept
+ in a queue (convex hull trick), and each layer takes O(n) time.
+
+*************************************************************************/
+
+#include <float.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <string.h>
+#include "avl.h"
+#include "hv.h"
+#include "profile.h"
+
+static int
+compare_x (const void *a, const void *b)
+{
+    const double x = *(const double *) a, y = *(const double *) b;
+    return (x < y) ? -1 : (x > y) ? 1 : 0;
+}
+
+/* Area dominated by P and not by the (nondominated) staircase TREE.  */
+static double
+staircase_contribution (const avl_tree_t *tree, const double *p,
+                        const double *ref, avl_node_t **next_p)
+{
+    avl_node_t *next;
+    int c = avl_search_closest (tree, p, &next);
+    if (next != NULL && c > 0)
+        next = next->next;
+    avl_node_t *prev = (next != NULL) ? next->prev : tree->tail;
+    double xmax = (next != NULL) ? ((const double *) next->item)[0] : ref[0];
+    double ymax = (prev != NULL) ? ((const double *) prev->item)[1] : ref[1];
+    if (next_p != NULL)
+        *next_p = next;
+    return (xmax - p[0]) * (ymax - p[1]);
+}
+
+static double
+box_volume (const double *p, int nobj, const double *ref)
+{
+    double volume = 1;
+    for (int j = 0; j < nobj; j++)
+        volume *= ref[j] - p[j];
+    return volume;
+}
+
+/* Contribution of P to the NSELECTED points of SELECTED, using CLIPPED as
+   scratch space.  */
+static double
+nd_contribution (const double *p, const double *selected, int nselected,
+                 int nobj, const double *ref, double *clipped)
+{
+    for (int i = 0; i < nselected; i++)
+        for (int j = 0; j < nobj; j++) {
+            double x = selected[i * nobj + j];
+            clipped[i * nobj + j] = (x > p[j]) ? x : p[j];
+        }
+    return box_volume (p, nobj, ref) - fpli_hv (clipped, nobj, nselected, ref);
+}
+
+typedef struct {
+    double contribution;
+    int point;
+    int updated; /* Number of points selected when it was computed.  */
+} candidate_t;
+
+static bool
+candidate_less (const candidate_t *a, const candidate_t *b)
+{
+    /* Ties are broken by the index of the point, so the result does not
+       depend on the order of the heap.  */
+    return a->contribution < b->contribution
+        || (a->contribution == b->contribution && a->point > b->point);
+}
+
+static void
+heap_sift_down (candidate_t *heap, int size, int i)
+{
+    candidate_t c = heap[i];
+    for (int child; (child = 2 * i + 1) < size; i = child) {
+        if (child + 1 < size && candidate_less (&heap[child], &heap[child + 1]))
+            child++;
+        if (!candidate_less (&c, &heap[child]))
+            break;
+        heap[i] = heap[child];
+    }
+    heap[i] = c;
+}
+
+/* Select K of the NPOINTS points of DATA greedily and store their indices
+   in SELECTED, in the order in which they were selected.  Returns the
+   hypervolume of the selected points, or -1 if memory could not be
+   allocated.  */
+double
+hv_subset_greedy_ (const double *data, int nobj, int npoints,
+                   const double *ref, int k, int *selected)
+{
+    if (k <= 0 || npoints < k)
+        return 0;
+    candidate_t *heap = malloc (npoints * sizeof(candidate_t));
+    avl_node_t *nodes = (nobj == 2) ? malloc (k * sizeof(avl_node_t)) : NULL;
+    double *points = (nobj == 2) ? NULL : malloc (2 * k * nobj * sizeof(double));
+    if (heap == NULL || (nodes == NULL && points == NULL)) {
+        free (heap);
+        free (nodes);
+        free (points);
+        return -1;
+    }
+    int phase = EAF_PROFILE_BEGIN("hv_subset.greedy");
+    for (int i = 0; i < npoints; i++) {
+        heap[i].contribution = box_volume (data + i * nobj, nobj, ref);
+        heap[i].point = i;
+        heap[i].updated = 0;
+    }
+    for (int i = npoints / 2 - 1; i >= 0; i--)
+        heap_sift_down (heap, npoints, i);
+
+    avl_tree_t tree;
+    avl_init_tree (&tree, compare_x, NULL);
+    double *clipped = (points != NULL) ? points + k * nobj : NULL;
+
+    double volume = 0;
+    int size = npoints;
+    for (int nselected = 0; nselected < k; ) {
+        candidate_t *top = &heap[0];
+        if (top->updated < nselected) {
+            const double *p = data + top->point * nobj;
+            top->contribution = (nobj == 2)
+                ? staircase_contribution (&tree, p, ref, NULL)
+                : nd_contribution (p, points, nselected, nobj, ref, clipped);
+            top->updated = nselected;
+            heap_sift_down (heap, size, 0);
+            continue;
+        }
+        const double *p = data + top->point * nobj;
+        if (nobj == 2) {
+            avl_node_t *next;
+            staircase_contribution (&tree, p, ref, &next);
+            avl_init_node (nodes + nselected, (void *) p);
+            avl_insert_before (&tree, next, nodes + nselected);
+        } else {
+            memcpy (points + nselected * nobj, p, nobj * sizeof(double));
+        }
+        volume += top->contribution;
+        selected[nselected++] = top->point;
+        heap[0] = heap[--size];
+        heap_sift_down (heap, size, 0);
+    }
+    free (heap);
+    free (nodes);
+    free (points);
+    EAF_PROFILE_END(phase, npoints, 0);
+    return volume;
+}
+
+/* Select the K of the NPOINTS 2D points of DATA, sorted by increasing first
+   objective, with the largest hypervolume, and store their indices in
+   SELECTED in increasing order.  Returns the hypervolume, or -1 if memory
+   could not be allocated.  */
+double
+hv_subset_exact2d_ (const double *data, int npoints, const double *ref,
+                    int k, int *selected)
+{
+    if (k <= 0 || npoints < k)
+        return 0;
+    double *buffer = calloc (2 * npoints, sizeof(double));
+    /* best[j * npoints + i] is the previous point of the best j+1 points
+       ending at point i.  */
+    int *best = malloc ((size_t) k * npoints * sizeof(int));
+    int *queue = malloc (npoints * sizeof(int));
+    if (buffer == NULL || best == NULL || queue == NULL) {
+        free (buffer);
+        free (best);
+        free (queue);
+        return -1;
+    }
+    int phase = EAF_PROFILE_BEGIN("hv_subset.exact2d");
+    double *f = buffer, *f_prev = buffer + npoints;
+
+    for (int i = 0; i < npoints; i++) {
+        f[i] = (ref[0] - data[2 * i]) * (ref[1] - data[2 * i + 1]);
+        best[i] = -1;
+    }
+    for (int j = 1; j < k; j++) {
+        double *tmp = f_prev; f_prev = f; f = tmp;
+        int head = 0, tail = 0;
+        for (int i = 0; i < npoints; i++) {
+            f[i] = -DBL_MAX;
+            /* Line l: f_prev[l] + y_l * a, for the points l < i that end a
+               subset of j points.  */
+            int l = i - 1;
+            if (l >= j - 1) {
+                double m = data[2 * l + 1], b = f_prev[l];
+                while (tail - head >= 2) {
+                    int l1 = queue[tail - 2], l2 = queue[tail - 1];
+                    double m1 = data[2 * l1 + 1], b1 = f_prev[l1];
+                    double m2 = data[2 * l2 + 1], b2 = f_prev[l2];
+                    /* l2 is not needed if l1 and l meet before l1 and l2.  */
+                    if ((b - b1) * (m1 - m2) >= (b2 - b1) * (m1 - m))
+                        tail--;
+                    else
+                        break;
+                }
+                queue[tail++] = l;
+            }
+            if (head == tail)
+                continue;
+            double a = ref[0] - data[2 * i];
+            while (tail - head >= 2) {
+                int l1 = queue[head], l2 = queue[head + 1];
+                if (f_prev[l2] + data[2 * l2 + 1] * a
+                    >= f_prev[l1] + data[2 * l1 + 1] * a)
+                    head++;
+                else
+                    break;
+            }
+            int l1 = queue[head];
+            f[i] = f_prev[l1] + (data[2 * l1 + 1] - data[2 * i + 1]) * a;
+            best[j * npoints + i] = l1;
+        }
+    }
+
+    int last = 0;
+    for (int i = 1; i < npoints; i++)
+        if (f[i] > f[last])
+            last = i;
+    double volume = f[last];
+    for (int j = k - 1; j >= 0; j--) {
+        selected[j] = last;
+        last = best[j * npoints + last];
+    }
+    free (buffer);
+    free (best);
+    free (queue);
+    EAF_PROFILE_END(phase, npoints, 0);
+    return volume;
+}
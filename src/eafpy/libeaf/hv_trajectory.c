@@ -0,0 +1,326 @@
+/*************************************************************************
+
+ hv_trajectory: hypervolume of the prefixes of a sequence of points
+
+ ---------------------------------------------------------------------
+
+ This program is free software; you can redistribute it and/or
+ modify it under the terms of the GNU General Public License
+ as published by the Free Software Foundation; either version 2
+ of the License, or (at your option) any later version.
+
+ This program is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ General Public License for more details.
+
+ ----------------------------------------------------------------------
+
+ The points are added one at a time, in the order given, and the
+ hypervolume is reported after the first counts[k] points.
+
+ With two objectives, the nondominated points are kept in an AVL tree
+ sorted by the first objective, so they form a staircase, and the area
+ gained by each new point is computed by walking the steps that it
+ dominates, which are then removed.  Each point is inserted and removed at
+ most once, so adding a point takes amortized O(log n) time.
+
+ With three objectives, the nondominated points are kept in an AVL tree
+ sorted by the third objective (z).  The volume gained by each new point P
+ is the part of its box that the points already kept do not dominate.
+ The part of the 2D box of P covered at each z is the staircase of the
+ points with a lower z, clipped to this box, which is kept with
+ staircase_add(): first with the points below P, and then with the points
+ above P swept by increasing z, until the box is fully covered.  The points
+ dominated by P are then removed.  Adding a
+ point visits at most the n nondominated points, each in O(log n) time,
+ instead of computing the whole hypervolume again.
+
+ With more objectives, the nondominated points are kept in an array, and
+ the hypervolume is computed again with fpli_hv() only at the checkpoints
+ where the nondominated points changed.
+
+*************************************************************************/
+
+#include <stdbool.h>
+#include <stdlib.h>
+#include <string.h>
+#include "avl.h"
+#include "hv.h"
+#include "profile.h"
+
+static int
+compare_x (const void *a, const void *b)
+{
+    const double x = *(const double *) a, y = *(const double *) b;
+    return (x < y) ? -1 : (x > y) ? 1 : 0;
+}
+
+/* Add point P to the 2D staircase TREE and return the area gained.  */
+static double
+staircase_add (avl_tree_t *tree, avl_node_t *node, const double *p,
+               const double *ref)
+{
+    if (p[0] >= ref[0] || p[1] >= ref[1])
+        return 0;
+
+    /* The first point with x >= p[0], and the last one with x < p[0].  */
+    avl_node_t *next;
+    int c = avl_search_closest (tree, p, &next);
+    if (next != NULL && c > 0)
+        next = next->next;
+    avl_node_t *prev = (next != NULL) ? next->prev : tree->tail;
+
+    if (prev != NULL && ((const double *) prev->item)[1] <= p[1])
+        return 0;
+    if (next != NULL && ((const double *) next->item)[0] == p[0]
+        && ((const double *) next->item)[1] <= p[1])
+        return 0;
+
+    double area = 0;
+    double x = p[0];
+    double h = (prev != NULL) ? ((const double *) prev->item)[1] : ref[1];
+    /* Remove the points dominated by P, whose y is >= p[1].  */
+    while (next != NULL && ((const double *) next->item)[1] >= p[1]) {
+        const double *q = next->item;
+        area += (q[0] - x) * (h - p[1]);
+        x = q[0];
+        h = q[1];
+        avl_node_t *dominated = next;
+        next = next->next;
+        avl_unlink_node (tree, dominated);
+    }
+    area += (((next != NULL) ? ((const double *) next->item)[0] : ref[0]) - x)
+        * (h - p[1]);
+
+    avl_init_node (node, (void *) p);
+    avl_insert_before (tree, next, node);
+    return area;
+}
+
+static void
+hv_trajectory_2d (double *hv, const double *data, int npoints,
+                  const double *ref, const int *counts, int ncounts)
+{
+    avl_tree_t tree;
+    avl_init_tree (&tree, compare_x, NULL);
+    avl_node_t *nodes = malloc (npoints * sizeof(avl_node_t));
+    double volume = 0;
+    int i = 0;
+    for (int k = 0; k < ncounts; k++) {
+        for (; i < counts[k]; i++)
+            volume += staircase_add (&tree, nodes + i, data + 2 * i, ref);
+        hv[k] = volume;
+    }
+    free (nodes);
+}
+
+static int
+compare_zyx (const void *a, const void *b)
+{
+    const double *p = a, *q = b;
+    for (int j = 2; j >= 0; j--)
+        if (p[j] != q[j])
+            return (p[j] < q[j]) ? -1 : 1;
+    return 0;
+}
+
+/* Add point Q, clipped to the 2D box of P, to the staircase of the part of
+   this box covered, and return the area gained.  EDGE holds the lowest y of
+   the points clipped to the left edge of the box and the lowest x of those
+   clipped to its bottom edge, which are the only ones of them that cover
+   more of the box, so that the others are skipped without a search.  */
+static double
+clipped_add (avl_tree_t *staircase, avl_node_t *node, double *c,
+             const double *q, const double *p, const double *ref,
+             double *edge)
+{
+    if (q[0] <= p[0]) {
+        if (q[1] >= edge[0])
+            return 0;
+        edge[0] = q[1];
+    } else if (q[1] <= p[1]) {
+        if (q[0] >= edge[1])
+            return 0;
+        edge[1] = q[0];
+    }
+    c[0] = (q[0] > p[0]) ? q[0] : p[0];
+    c[1] = (q[1] > p[1]) ? q[1] : p[1];
+    return staircase_add (staircase, node, c, ref);
+}
+
+/* Add point P to the 3D nondominated points in ARCHIVE, a tree sorted by
+   compare_zyx(), using NODE, and return the volume gained.  CLIPPED, STEPS
+   and DOMINATED are scratch space for as many points as ARCHIVE.  */
+static double
+archive3d_add (avl_tree_t *archive, avl_node_t *node, const double *p,
+               const double *ref, double *clipped, avl_node_t *steps,
+               avl_node_t **dominated)
+{
+    for (int j = 0; j < 3; j++)
+        if (p[j] >= ref[j])
+            return 0;
+
+    /* The part of the 2D box of P covered by the points swept, which are
+       clipped to this box.  */
+    avl_tree_t staircase;
+    avl_init_tree (&staircase, compare_x, NULL);
+    const double area = (ref[0] - p[0]) * (ref[1] - p[1]);
+    double covered = 0;
+    double edge[2] = { ref[1], ref[0] };
+    int nsteps = 0, ndominated = 0;
+
+    /* The first point with z > p[2], or with z == p[2] and greater y, x.  */
+    avl_node_t *above;
+    int c = avl_search_closest (archive, p, &above);
+    if (above != NULL && c == 0)
+        return 0;
+    if (above != NULL && c > 0)
+        above = above->next;
+
+    /* The points below P, from the nearest one down, since the nearest ones
+       tend to cover most of the box, so that the others are often skipped.  */
+    for (avl_node_t *a = (above != NULL) ? above->prev : archive->tail;
+         a != NULL && ((const double *) a->item)[2] <= p[2]; a = a->prev) {
+        const double *q = a->item;
+        if (q[0] <= p[0] && q[1] <= p[1])
+            return 0;
+        if (q[2] == p[2] && q[0] >= p[0] && q[1] >= p[1])
+            dominated[ndominated++] = a;
+        covered += clipped_add (&staircase, steps + nsteps, clipped + 2 * nsteps,
+                                q, p, ref, edge);
+        nsteps++;
+    }
+
+    /* Each of the other points covers more of the box from its z on.  */
+    double volume = 0;
+    double z = p[2];
+    for (avl_node_t *a = above; a != NULL; a = a->next) {
+        const double *q = a->item;
+        volume += (area - covered) * (q[2] - z);
+        z = q[2];
+        if (q[0] <= p[0] && q[1] <= p[1]) {
+            /* The box is covered, and no later point is dominated by P.  */
+            covered = area;
+            break;
+        }
+        if (q[0] >= p[0] && q[1] >= p[1])
+            dominated[ndominated++] = a;
+        covered += clipped_add (&staircase, steps + nsteps, clipped + 2 * nsteps,
+                                q, p, ref, edge);
+        nsteps++;
+    }
+    volume += (area - covered) * (ref[2] - z);
+
+    for (int i = 0; i < ndominated; i++)
+        avl_unlink_node (archive, dominated[i]);
+    avl_init_node (node, (void *) p);
+    avl_insert_node (archive, node);
+    return volume;
+}
+
+static void
+hv_trajectory_3d (double *hv, const double *data, int npoints,
+                  const double *ref, const int *counts, int ncounts)
+{
+    avl_tree_t archive;
+    avl_init_tree (&archive, compare_zyx, NULL);
+    avl_node_t *nodes = malloc (2 * npoints * sizeof(avl_node_t));
+    avl_node_t **dominated = malloc (npoints * sizeof(avl_node_t *));
+    double *clipped = malloc (2 * npoints * sizeof(double));
+    double volume = 0;
+    int i = 0;
+    for (int k = 0; k < ncounts; k++) {
+        for (; i < counts[k]; i++)
+            volume += archive3d_add (&archive, nodes + i, data + 3 * i, ref,
+                                     clipped, nodes + npoints, dominated);
+        hv[k] = volume;
+    }
+    free (clipped);
+    free (dominated);
+    free (nodes);
+}
+
+static bool
+weakly_dominates (const double *a, const double *b, int nobj)
+{
+    for (int j = 0; j < nobj; j++)
+        if (a[j] > b[j])
+            return false;
+    return true;
+}
+
+/* Add point P to the *SIZE nondominated points in ARCHIVE.  Returns whether
+   it was added.  */
+static bool
+archive_add (double *archive, int *size, const double *p, int nobj,
+             const double *ref)
+{
+    for (int j = 0; j < nobj; j++)
+        if (p[j] >= ref[j])
+            return false;
+    for (int i = 0; i < *size; i++)
+        if (weakly_dominates (archive + i * nobj, p, nobj))
+            return false;
+    for (int i = 0; i < *size; ) {
+        if (weakly_dominates (p, archive + i * nobj, nobj)) {
+            (*size)--;
+            memcpy (archive + i * nobj, archive + *size * nobj,
+                    nobj * sizeof(double));
+        } else {
+            i++;
+        }
+    }
+    memcpy (archive + *size * nobj, p, nobj * sizeof(double));
+    (*size)++;
+    return true;
+}
+
+static void
+hv_trajectory_nd (double *hv, const double *data, int nobj, int npoints,
+                  const double *ref, const int *counts, int ncounts)
+{
+    double *archive = malloc (npoints * nobj * sizeof(double));
+    int size = 0;
+    double volume = 0;
+    bool changed = false;
+    int i = 0;
+    for (int k = 0; k < ncounts; k++) {
+        for (; i < counts[k]; i++)
+            changed |= archive_add (archive, &size, data + i * nobj, nobj, ref);
+        if (changed) {
+            volume = fpli_hv (archive, nobj, size, ref);
+            changed = false;
+        }
+        hv[k] = volume;
+    }
+    free (archive);
+}
+
+/* For each of the NSETS sets of points of DATA, which are stored one after
+   the other and end at the rows given by CUMSIZES, store in HV the
+   hypervolume of the first COUNTS[k] points of the set, for the NCOUNTS
+   non-decreasing counts of the set.  HV and COUNTS have NSETS * NCOUNTS
+   elements, by set.  */
+void
+hv_trajectory_ (double *hv, const double *data, int nobj, const int *cumsizes,
+                int nsets, const double *ref, const int *counts, int ncounts)
+{
+    int phase = EAF_PROFILE_BEGIN("hv_trajectory");
+    int start = 0;
+    for (int s = 0; s < nsets; s++) {
+        const double *set = data + start * nobj;
+        int npoints = cumsizes[s] - start;
+        if (nobj == 2)
+            hv_trajectory_2d (hv + s * ncounts, set, npoints, ref,
+                              counts + s * ncounts, ncounts);
+        else if (nobj == 3)
+            hv_trajectory_3d (hv + s * ncounts, set, npoints, ref,
+                              counts + s * ncounts, ncounts);
+        else
+            hv_trajectory_nd (hv + s * ncounts, set, nobj, npoints, ref,
+                              counts + s * ncounts, ncounts);
+        start = cumsizes[s];
+    }
+    EAF_PROFILE_END(phase, start, 0);
+}
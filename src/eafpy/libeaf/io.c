@@ -42,6 +42,7 @@
 #include <stdio.h>
 #include "io.h"
 #include "common.h"
+#include "profile.h"
 
 /* FIXME: Do we need to handle the following weird files? */
                 /* 
@@ -95,12 +96,16 @@ read_datasets_(const char * filename, double **data_p, int *ncols_p, int *datasi
     int *cumsizes = NULL;
     int num_sets=0;
     int nobjs = 0;
+    int phase = EAF_PROFILE_BEGIN("read_datasets.parse");
     int error = read_double_data(filename, &data, &nobjs, &cumsizes, &num_sets);
     if (error) {
+        EAF_PROFILE_END(phase, 0, 0);
         return error;
     }
     int ncols = nobjs + 1; // For the column 'set' 
     int nrows = cumsizes[num_sets - 1];
+    EAF_PROFILE_END(phase, nrows, 0);
+    phase = EAF_PROFILE_BEGIN("read_datasets.copy");
     int datasize = ncols * nrows * sizeof(double);
     double * newdata = malloc(datasize);
     int set = 1;
@@ -116,6 +121,7 @@ read_datasets_(const char * filename, double **data_p, int *ncols_p, int *datasi
     }
     free(data);
     free(cumsizes);
+    EAF_PROFILE_END(phase, nrows, datasize);
 
     *data_p = newdata;
     *ncols_p = ncols;
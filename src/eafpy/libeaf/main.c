@@ -121,12 +121,12 @@ void test_eaf(){
     // }
 
 
-    int eaf_size_p = 0;
     int eaf_points = 0;
     printf("npoints %d\n", npoints);
-    double * eaf = get_eaf_(data, 3, npoints, 0, 0, FALSE, 10,
+    int * cumsizes = get_cumsizes_(data, 3, npoints, 10);
+    double * eaf = get_eaf_(data, 3, NULL, cumsizes, 10, 0, 0, FALSE,
                 &eaf_points,
-                &eaf_size_p,
+                NULL,
                 TRUE
                 );  /*-> Returns pointer to row major order array containing the EAF data points and relevant percentiles  */
 
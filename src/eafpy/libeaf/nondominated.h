@@ -2,7 +2,9 @@
 #define NONDOMINATED_H
 
 #include "common.h"
+#include "profile.h"
 #include <string.h> // memcpy
+#include <math.h> // isnan
 #include <inttypes.h>
 
 enum objs_agree_t { AGREE_MINIMISE = -1, AGREE_NONE = 0, AGREE_MAXIMISE = 1 };
@@ -234,35 +236,49 @@ int * pareto_rank (const double *points, int dim, int size);
 
 bool * is_nondominated_(const double * data, int nobj, int npoint, const bool * maximise, bool keep_weakly)
 {
+    int phase = EAF_PROFILE_BEGIN("nondominated");
     bool * nondom = nondom_init(npoint);
     signed char * minmax = create_minmax_bool(nobj, maximise);
     find_nondominated_set_ (data, nobj, npoint, minmax, AGREE_NONE, nondom,
                             /* find_dominated_p = */false,
                             /* keep_weakly = */keep_weakly);
     free(minmax);
+    EAF_PROFILE_END(phase, npoint, npoint * sizeof(bool));
     return nondom;
 }
 
+/* Find the lower and upper bounds of the first NOBJ columns of a matrix
+   whose rows are STRIDE doubles apart.  If SET_IDX is not NULL, bounds are
+   computed separately for each set, where SET_IDX[i] in [0, NSETS) is the set
+   of row i, and LBOUNDS and UBOUNDS must have space for NSETS * NOBJ values.
+   Otherwise, LBOUNDS and UBOUNDS have space for NOBJ values.  */
+static inline void
+find_bounds_sets (const double * data, int nobj, int stride, int npoints,
+                  const int * set_idx, int nsets,
+                  double * lbounds, double * ubounds)
+{
+    const int nbounds = (set_idx) ? nsets * nobj : nobj;
+    for (int k = 0; k < nbounds; k++) {
+        lbounds[k] = INFINITY;
+        ubounds[k] = -INFINITY;
+    }
+    for (int p = 0; p < npoints; p++) {
+        const double * row = data + p * (size_t) stride;
+        double * lb = lbounds + ((set_idx) ? set_idx[p] * nobj : 0);
+        double * ub = ubounds + ((set_idx) ? set_idx[p] * nobj : 0);
+        for (int obj = 0; obj < nobj; obj++) {
+            if (row[obj] < lb[obj]) lb[obj] = row[obj];
+            if (row[obj] > ub[obj]) ub[obj] = row[obj];
+        }
+    }
+}
+
 void find_bounds(double * data, int nobj, int npoints, double ** lbounds, double ** ubounds){
     // bounds = [lower_obj1, upper_obj1, lower_obj2, upper_obj2 etc]
 
     double *mlbounds = malloc(sizeof(double) * nobj);
     double *mubounds = malloc(sizeof(double) * nobj);
-    
-    for (int obj = 0; obj < nobj; obj++ ){
-        mlbounds[obj] = data[obj];
-        mubounds[obj] = data[obj];
-        
-        for(int p = 0; p < npoints; p++){
-            if(data[p * nobj + obj] < mlbounds[obj]){
-                
-                mlbounds[obj] = data[p * nobj + obj];
-            }
-            if(data[p * nobj + obj] > mubounds[obj]){
-                mubounds[obj] = data[p * nobj + obj];
-            }
-        }
-    }
+    find_bounds_sets (data, nobj, nobj, npoints, NULL, 0, mlbounds, mubounds);
     *lbounds = mlbounds;
     *ubounds = mubounds;
     // Remember to free this memory in function call
@@ -280,4 +296,70 @@ void normalise_(double *data, int nobj, int npoints, const bool * maximise,
     free(minmax);
 }
 
+/* Normalise the first NOBJ columns of a matrix with NCOLS columns, possibly
+   containing several sets, in a single pass over the data (plus one pass to
+   find the bounds, if needed).
+
+   SET_IDX[i] in [0, NSETS) gives the set of row i.  If PER_SET is true, the
+   bounds of each set are computed separately, otherwise they are computed over
+   the whole matrix.  SET_IDX may be NULL if PER_SET is false.
+
+   LOWER and UPPER give the bounds for each objective.  A NaN value means that
+   the bound is computed from the data.
+
+   The result is written to OUT, which may be the same as DATA to normalise in
+   place.  If OUT is different from DATA, the columns beyond NOBJ are copied.  */
+void normalise_sets_(const double *data, double *out, int nobj, int ncols,
+                     int npoints, const int *set_idx, int nsets,
+                     const bool * maximise,
+                     const double lower_range, const double upper_range,
+                     const double * lower, const double * upper, bool per_set)
+{
+    const double range = upper_range - lower_range;
+    if (!per_set) {
+        set_idx = NULL;
+        nsets = 1;
+    }
+    double * lbounds = malloc(sizeof(double) * nsets * nobj);
+    double * ubounds = malloc(sizeof(double) * nsets * nobj);
+    double * scale = malloc(sizeof(double) * nsets * nobj);
+    bool missing = false;
+    for (int d = 0; d < nobj; d++)
+        missing = missing || isnan(lower[d]) || isnan(upper[d]);
+
+    if (missing)
+        find_bounds_sets (data, nobj, ncols, npoints, set_idx, nsets,
+                          lbounds, ubounds);
+    for (int s = 0; s < nsets; s++) {
+        for (int d = 0; d < nobj; d++) {
+            if (!isnan(lower[d])) lbounds[s * nobj + d] = lower[d];
+            if (!isnan(upper[d])) ubounds[s * nobj + d] = upper[d];
+            double diff = ubounds[s * nobj + d] - lbounds[s * nobj + d];
+            if (diff == 0.0) // FIXME: Should we use approximate equality?
+                diff = 1;
+            scale[s * nobj + d] = range / diff;
+        }
+    }
+
+    for (int p = 0; p < npoints; p++) {
+        const double * src = data + p * (size_t) ncols;
+        double * dst = out + p * (size_t) ncols;
+        const int s = (set_idx) ? set_idx[p] : 0;
+        const double * lb = lbounds + s * nobj;
+        const double * ub = ubounds + s * nobj;
+        const double * sc = scale + s * nobj;
+        for (int d = 0; d < nobj; d++) {
+            /* Maximised objectives are normalised to the reversed range.  */
+            dst[d] = (maximise[d])
+                ? lower_range + sc[d] * (ub[d] - src[d])
+                : lower_range + sc[d] * (src[d] - lb[d]);
+        }
+        if (dst != src)
+            memcpy(dst + nobj, src + nobj, sizeof(double) * (ncols - nobj));
+    }
+    free(lbounds);
+    free(ubounds);
+    free(scale);
+}
+
 #endif /* NONDOMINATED_H */
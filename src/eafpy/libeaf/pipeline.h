@@ -0,0 +1,200 @@
+#ifndef PIPELINE_H
+#define PIPELINE_H
+
+/* Fused normalise -> filter dominated -> indicators, one set at a time.
+
+   Each set is copied once into a scratch buffer that is reused for every set,
+   and all the steps work on that buffer, so no intermediate dataset is ever
+   created.  */
+
+#include "common.h"
+#include "hv.h"
+#include "igd.h"
+#include "epsilon.h"
+#include "nondominated.h"
+
+enum pipeline_step_t {
+    PIPELINE_NORMALISE = 0,
+    PIPELINE_FILTER_DOMINATED,
+};
+
+enum pipeline_indicator_t {
+    PIPELINE_HV = 0,
+    PIPELINE_IGD,
+    PIPELINE_IGD_PLUS,
+    PIPELINE_AVG_HAUSDORFF,
+    PIPELINE_EPSILON_ADDITIVE,
+    PIPELINE_EPSILON_MULT,
+};
+
+static inline bool
+all_positive (const double *points, int size)
+{
+    for (int k = 0; k < size; k++)
+        if (points[k] <= 0) return false;
+    return true;
+}
+
+static double
+pipeline_indicator (int indicator, const double *points, int nobj, int size,
+                    const signed char *minmax, double *scratch,
+                    const double *ref, const double *ref_set, int ref_set_size,
+                    unsigned int p)
+{
+    switch (indicator) {
+      case PIPELINE_HV: {
+          /* fpli_hv() assumes minimisation.  */
+          bool any_max = false;
+          for (int d = 0; d < nobj; d++)
+              any_max = any_max || (minmax[d] > 0);
+          if (!any_max)
+              return fpli_hv(points, nobj, size, ref);
+          double * neg_ref = scratch + size * nobj;
+          for (int d = 0; d < nobj; d++)
+              neg_ref[d] = (minmax[d] > 0) ? -ref[d] : ref[d];
+          for (int k = 0; k < size; k++)
+              for (int d = 0; d < nobj; d++)
+                  scratch[k * nobj + d] = (minmax[d] > 0)
+                      ? -points[k * nobj + d] : points[k * nobj + d];
+          return fpli_hv(scratch, nobj, size, neg_ref);
+      }
+      case PIPELINE_IGD:
+          return IGD (nobj, minmax, points, size, ref_set, ref_set_size);
+      case PIPELINE_IGD_PLUS:
+          return IGD_plus (nobj, minmax, points, size, ref_set, ref_set_size);
+      case PIPELINE_AVG_HAUSDORFF:
+          return avg_Hausdorff_dist (nobj, minmax, points, size,
+                                     ref_set, ref_set_size, p);
+      case PIPELINE_EPSILON_ADDITIVE:
+          return epsilon_additive (nobj, minmax, points, size,
+                                   ref_set, ref_set_size);
+      case PIPELINE_EPSILON_MULT:
+          /* epsilon_mult() aborts the program with non-positive values.  */
+          if (!all_positive (points, size * nobj)
+              || !all_positive (ref_set, ref_set_size * nobj))
+              return NAN;
+          return epsilon_mult (nobj, minmax, points, size,
+                               ref_set, ref_set_size);
+      default:
+          fatal_error("%s:%d: unknown indicator %d\n", __FILE__, __LINE__, indicator);
+    }
+}
+
+/*
+   Apply STEPS to each set of a matrix with NCOLS columns, where the first NOBJ
+   columns are objectives, and compute NINDICATORS indicators per set.
+
+   The rows of set k are ORDER[CUMSIZES[k-1]], ..., ORDER[CUMSIZES[k] - 1]
+   (with CUMSIZES[-1] = 0).  ORDER may be NULL if the rows of each set are
+   already contiguous.
+
+   The normalise step uses TO_RANGE, LOWER, UPPER (NaN means computed from the
+   data) and PER_SET like normalise_sets_().  After normalising, all objectives
+   are minimised.  With PER_SET false, the bounds are computed from the whole
+   input.
+
+   The result for indicator i of set k is stored in RESULT[k * NINDICATORS + i].
+*/
+void pipeline_sets_(const double *data, int nobj, int ncols,
+                    const int *order, const int *cumsizes, int nsets,
+                    const bool *maximise,
+                    const int *steps, int nsteps,
+                    const double *to_range,
+                    const double *lower, const double *upper, bool per_set,
+                    bool keep_weakly,
+                    const int *indicators, int nindicators,
+                    const double *ref, const double *ref_set, int ref_set_size,
+                    unsigned int p, double *result)
+{
+    if (nsets == 0)
+        return;
+    int max_size = 0;
+    for (int k = 0, prev = 0; k < nsets; k++) {
+        max_size = MAX(max_size, cumsizes[k] - prev);
+        prev = cumsizes[k];
+    }
+
+    /* Bounds used by the normalise step.  */
+    double *lbounds = malloc(sizeof(double) * nobj);
+    double *ubounds = malloc(sizeof(double) * nobj);
+    memcpy(lbounds, lower, sizeof(double) * nobj);
+    memcpy(ubounds, upper, sizeof(double) * nobj);
+    if (!per_set) {
+        double *lb = malloc(sizeof(double) * nobj);
+        double *ub = malloc(sizeof(double) * nobj);
+        find_bounds_sets (data, nobj, ncols, cumsizes[nsets - 1], NULL, 0, lb, ub);
+        for (int d = 0; d < nobj; d++) {
+            if (isnan(lbounds[d])) lbounds[d] = lb[d];
+            if (isnan(ubounds[d])) ubounds[d] = ub[d];
+        }
+        free(lb);
+        free(ub);
+    }
+
+    double *points = malloc(sizeof(double) * max_size * nobj);
+    /* Used by the hypervolume with maximised objectives.  */
+    double *scratch = malloc(sizeof(double) * (max_size + 1) * nobj);
+    bool *nondom = malloc(sizeof(bool) * max_size);
+    signed char *minmax = malloc(sizeof(signed char) * nobj);
+
+    for (int k = 0, start = 0; k < nsets; start = cumsizes[k], k++) {
+        int size = cumsizes[k] - start;
+        for (int i = 0; i < size; i++) {
+            const int row = (order) ? order[start + i] : start + i;
+            memcpy(points + i * nobj, data + row * (size_t) ncols,
+                   sizeof(double) * nobj);
+        }
+        for (int d = 0; d < nobj; d++)
+            minmax[d] = (maximise[d]) ? AGREE_MAXIMISE : AGREE_MINIMISE;
+
+        for (int s = 0; s < nsteps; s++) {
+            switch (steps[s]) {
+              case PIPELINE_NORMALISE: {
+                  bool set_maximise[nobj];
+                  for (int d = 0; d < nobj; d++)
+                      set_maximise[d] = (minmax[d] > 0);
+                  normalise_sets_(points, points, nobj, nobj, size, NULL, 1,
+                                  set_maximise, to_range[0], to_range[1],
+                                  lbounds, ubounds, false);
+                  for (int d = 0; d < nobj; d++)
+                      minmax[d] = AGREE_MINIMISE;
+                  break;
+              }
+              case PIPELINE_FILTER_DOMINATED: {
+                  for (int i = 0; i < size; i++)
+                      nondom[i] = true;
+                  find_nondominated_set_ (points, nobj, size, minmax, AGREE_NONE,
+                                          nondom, /* find_dominated_p = */false,
+                                          keep_weakly);
+                  int new_size = 0;
+                  for (int i = 0; i < size; i++) {
+                      if (!nondom[i]) continue;
+                      if (new_size != i)
+                          memcpy(points + new_size * nobj, points + i * nobj,
+                                 sizeof(double) * nobj);
+                      new_size++;
+                  }
+                  size = new_size;
+                  break;
+              }
+              default:
+                  fatal_error("%s:%d: unknown pipeline step %d\n",
+                              __FILE__, __LINE__, steps[s]);
+            }
+        }
+
+        for (int i = 0; i < nindicators; i++) {
+            result[k * nindicators + i] =
+                pipeline_indicator (indicators[i], points, nobj, size, minmax,
+                                    scratch, ref, ref_set, ref_set_size, p);
+        }
+    }
+    free(minmax);
+    free(nondom);
+    free(scratch);
+    free(points);
+    free(ubounds);
+    free(lbounds);
+}
+
+#endif /* PIPELINE_H */
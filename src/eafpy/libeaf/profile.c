@@ -0,0 +1,93 @@
+/*************************************************************************
+
+ profile: opt-in timing of the phases of the library
+
+ ---------------------------------------------------------------------
+
+ This program is free software; you can redistribute it and/or
+ modify it under the terms of the GNU General Public License
+ as published by the Free Software Foundation; either version 2
+ of the License, or (at your option) any later version.
+
+ This program is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ General Public License for more details.
+
+*************************************************************************/
+
+#include <stdlib.h>
+#include <time.h>
+#include "profile.h"
+
+#if defined(_MSC_VER)
+# define EAF_THREAD_LOCAL __declspec(thread)
+#else
+# define EAF_THREAD_LOCAL _Thread_local
+#endif
+
+bool eaf_profile_enabled = false;
+
+static EAF_THREAD_LOCAL eaf_profile_event_t *events = NULL;
+static EAF_THREAD_LOCAL int nevents = 0;
+static EAF_THREAD_LOCAL int maxevents = 0;
+static EAF_THREAD_LOCAL int depth = 0;
+
+void eaf_profile_enable_(bool enable)
+{
+    eaf_profile_enabled = enable;
+}
+
+int64_t eaf_profile_now_(void)
+{
+    struct timespec ts;
+#ifdef CLOCK_MONOTONIC
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+#else
+    timespec_get(&ts, TIME_UTC);
+#endif
+    return (int64_t) ts.tv_sec * 1000000000 + ts.tv_nsec;
+}
+
+/* Start a phase called NAME and return its event, or -1 if it cannot be
+   recorded.  */
+int eaf_profile_begin(const char *name)
+{
+    if (nevents == maxevents) {
+        int size = (maxevents) ? 2 * maxevents : 64;
+        eaf_profile_event_t *p = realloc(events, size * sizeof(eaf_profile_event_t));
+        if (p == NULL)
+            return -1;
+        events = p;
+        maxevents = size;
+    }
+    eaf_profile_event_t *e = events + nevents;
+    e->name = name;
+    e->npoints = e->nbytes = 0;
+    e->depth = depth++;
+    e->start_ns = e->end_ns = eaf_profile_now_();
+    return nevents++;
+}
+
+void eaf_profile_end(int event, int64_t npoints, int64_t nbytes)
+{
+    eaf_profile_event_t *e = events + event;
+    e->end_ns = eaf_profile_now_();
+    e->npoints = npoints;
+    e->nbytes = nbytes;
+    depth--;
+}
+
+/* The events recorded by this thread since the last eaf_profile_clear_().  */
+const eaf_profile_event_t *eaf_profile_events_(int *n)
+{
+    *n = nevents;
+    return events;
+}
+
+void eaf_profile_clear_(void)
+{
+    free(events);
+    events = NULL;
+    nevents = maxevents = depth = 0;
+}
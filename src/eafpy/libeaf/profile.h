@@ -0,0 +1,55 @@
+/*************************************************************************
+
+ profile.h: opt-in timing of the phases of the library
+
+ ---------------------------------------------------------------------
+
+ This program is free software; you can redistribute it and/or
+ modify it under the terms of the GNU General Public License
+ as published by the Free Software Foundation; either version 2
+ of the License, or (at your option) any later version.
+
+ This program is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ General Public License for more details.
+
+ ----------------------------------------------------------------------
+
+ When profiling is enabled, each phase delimited by EAF_PROFILE_BEGIN and
+ EAF_PROFILE_END records an event with its start and end times, the number
+ of points it processed and the bytes it allocated for its result.  Events
+ are recorded per thread, so the calls of different threads do not mix, and
+ are read back with eaf_profile_events_() from the same thread.  When
+ profiling is disabled, a phase costs a single test of a global flag.
+
+*************************************************************************/
+#ifndef EAF_PROFILE_H
+#define EAF_PROFILE_H
+
+#include <stdbool.h>
+#include <stdint.h>
+
+typedef struct {
+    const char *name;  /* A string literal.  */
+    int64_t start_ns;  /* As returned by eaf_profile_now_().  */
+    int64_t end_ns;
+    int64_t npoints;   /* Points processed.  */
+    int64_t nbytes;    /* Bytes allocated for the result.  */
+    int depth;         /* Number of enclosing phases.  */
+} eaf_profile_event_t;
+
+extern bool eaf_profile_enabled;
+
+void eaf_profile_enable_(bool enable);
+int64_t eaf_profile_now_(void);
+int eaf_profile_begin(const char *name);
+void eaf_profile_end(int event, int64_t npoints, int64_t nbytes);
+const eaf_profile_event_t *eaf_profile_events_(int *nevents);
+void eaf_profile_clear_(void);
+
+#define EAF_PROFILE_BEGIN(NAME) (eaf_profile_enabled ? eaf_profile_begin(NAME) : -1)
+#define EAF_PROFILE_END(EVENT, NPOINTS, NBYTES)                                \
+    do { if ((EVENT) >= 0) eaf_profile_end((EVENT), (NPOINTS), (NBYTES)); } while (0)
+
+#endif /* EAF_PROFILE_H */
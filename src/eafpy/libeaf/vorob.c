@@ -0,0 +1,144 @@
+/*************************************************************************
+
+ vorob: Vorob'ev threshold, expectation and deviation of a set of runs
+
+ ---------------------------------------------------------------------
+
+ This program is free software; you can redistribute it and/or
+ modify it under the terms of the GNU General Public License
+ as published by the Free Software Foundation; either version 2
+ of the License, or (at your option) any later version.
+
+ This program is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ General Public License for more details.
+
+ ----------------------------------------------------------------------
+
+ The Vorob'ev expectation is the attainment surface of the largest level
+ whose hypervolume is not smaller than the average hypervolume of the runs,
+ and the percentile of that level is the Vorob'ev threshold.  Since the
+ hypervolume of the attainment surfaces does not increase with the level,
+ the level is found by binary search.  All levels are computed once and the
+ hypervolume of a level is only computed when the search visits it.
+
+ The Vorob'ev deviation is the average volume of the symmetric difference
+ between the region attained by each run and the one attained by the
+ expectation, that is, 2 HV(X_i U VE) - HV(X_i) - HV(VE) averaged over
+ the runs X_i.
+
+ Reference:
+
+ M. Binois, D. Ginsbourger and O. Roustant. Quantifying uncertainty on
+ Pareto fronts with Gaussian process conditional simulations. European
+ Journal of Operational Research, 243(2):386-394, 2015.
+
+*************************************************************************/
+
+#include "eaf.h"
+#include "hv.h"
+
+/* Hypervolume of the SIZE points in ROWS, copied to BUFFER.  */
+static double
+hv_rows (const objective_t **rows, int nobj, int size, const double *ref,
+         double *buffer)
+{
+    for (int i = 0; i < size; i++)
+        memcpy(buffer + i * nobj, rows[i], nobj * sizeof(double));
+    return fpli_hv(buffer, nobj, size, ref);
+}
+
+/* Compute the Vorob'ev expectation of the runs of a matrix with NCOLS =
+   NOBJ + 1 columns, grouped as in get_eaf_().  Returns its points, as a
+   row-major matrix of *VE_NPOINTS rows and NOBJ columns, and stores the
+   threshold (a percentile) in *THRESHOLD and the average hypervolume of the
+   runs in *AVG_HYP.  If DEVIATION is not NULL, the Vorob'ev deviation is
+   stored in *DEVIATION.  */
+double *
+vorobev_ (const double *data, int ncols, const int *order,
+          const int *cumsizes, int nsets, const double *ref,
+          double *threshold, double *avg_hyp, double *deviation,
+          int *ve_npoints)
+{
+    const int nobj = ncols - 1;
+    if (nsets == 0) {
+        *threshold = *avg_hyp = NAN;
+        if (deviation)
+            *deviation = NAN;
+        *ve_npoints = 0;
+        return malloc(nobj * sizeof(double));
+    }
+    const int npoints = cumsizes[nsets - 1];
+    const objective_t **rows = malloc(npoints * sizeof(objective_t *));
+    for (int i = 0; i < npoints; i++)
+        rows[i] = data + ((order) ? order[i] : i) * (size_t) ncols;
+
+    int max_size = 0;
+    for (int k = 0, start = 0; k < nsets; start = cumsizes[k], k++)
+        max_size = MAX(max_size, cumsizes[k] - start);
+
+    int *levels = malloc(nsets * sizeof(int));
+    for (int k = 0; k < nsets; k++)
+        levels[k] = k + 1;
+    int phase = EAF_PROFILE_BEGIN(attsurf_phase(nobj));
+    eaf_t **eaf = attsurf (rows, nobj, cumsizes, nsets, levels, nsets,
+                           EAF_STORE_NONE, 0);
+    EAF_PROFILE_END(phase, npoints, 0);
+    free(levels);
+    int max_level_size = 0;
+    for (int k = 0; k < nsets; k++)
+        max_level_size = MAX(max_level_size, (int) eaf[k]->size);
+
+    double *buffer = malloc(MAX(max_size + max_level_size, 1) * nobj * sizeof(double));
+    double sum_hyp = 0;
+    for (int k = 0, start = 0; k < nsets; start = cumsizes[k], k++)
+        sum_hyp += hv_rows (rows + start, nobj, cumsizes[k] - start, ref, buffer);
+    const double avg = sum_hyp / nsets;
+
+    /* The largest level whose hypervolume is at least the average.  The
+       hypervolume of level 1 is never smaller than the hypervolume of any
+       run, so the search starts there.  */
+    const double tolerance = sqrt(DBL_EPSILON);
+    int lo = 0, hi = nsets - 1;
+    double ve_hyp = NAN;
+    while (lo < hi) {
+        const int mid = lo + (hi - lo + 1) / 2;
+        const double hyp = fpli_hv(eaf[mid]->data, nobj, eaf[mid]->size, ref);
+        if (hyp >= avg * (1 - tolerance)) {
+            lo = mid;
+            ve_hyp = hyp;
+        } else {
+            hi = mid - 1;
+        }
+    }
+    const eaf_t *ve = eaf[lo];
+    if (isnan(ve_hyp))
+        ve_hyp = fpli_hv(ve->data, nobj, ve->size, ref);
+
+    if (deviation) {
+        /* Each run followed by the expectation.  */
+        double sum_union = 0;
+        for (int k = 0, start = 0; k < nsets; start = cumsizes[k], k++) {
+            const int size = cumsizes[k] - start;
+            for (int i = 0; i < size; i++)
+                memcpy(buffer + i * nobj, rows[start + i], nobj * sizeof(double));
+            memcpy(buffer + size * nobj, ve->data, ve->size * nobj * sizeof(double));
+            sum_union += fpli_hv(buffer, nobj, size + ve->size, ref);
+        }
+        *deviation = 2 * sum_union / nsets - ve_hyp - avg;
+    }
+
+    *threshold = 100.0 * (lo + 1) / nsets;
+    *avg_hyp = avg;
+    *ve_npoints = ve->size;
+    double *result = malloc(MAX(ve->size, 1) * nobj * sizeof(double));
+    memcpy(result, ve->data, ve->size * nobj * sizeof(double));
+
+    for (int k = 0; k < nsets; k++)
+        eaf_delete(eaf[k]);
+    free(eaf);
+    free(buffer);
+    free(rows);
+    return result;
+}
@@ -0,0 +1,242 @@
+"""Run functions of eafpy on a pool of processes that share the datasets
+
+Each dataset is copied once into shared memory (see
+:mod:`multiprocessing.shared_memory`), and the workers receive NumPy views
+of it instead of a pickled copy.  Processes do not share the state of
+libeaf, so, unlike threads, any function of eafpy can run in parallel.
+
+Examples
+--------
+>>> import eafpy.parallel
+>>> dataset = eaf.read_datasets("./doc/examples/input1.dat")
+>>> with eafpy.parallel.Executor(max_workers=2) as executor:
+...     hv = executor.map_sets(eaf.hypervolume, dataset, ref=[10, 10])
+...     refs = executor.map(eaf.hypervolume, [dataset[:, :-1]] * 2, [[10, 10], [20, 20]])
+>>> len(hv), round(hv[0], 6), [round(x, 6) for x in refs]
+(10, 90.462728, [93.553314, 388.289283])
+"""
+import concurrent.futures
+import itertools
+
+import numpy as np
+
+from . import eaf
+
+# Arrays smaller than this are pickled to the workers, which is faster than
+# creating a shared memory block for them.
+_SHARE_MIN_BYTES = 1 << 16
+
+# Shared memory blocks attached by this worker process, by name.
+_attached = {}
+
+
+def _attach(name, shape, dtype, start, stop):
+    from multiprocessing import shared_memory
+
+    shm = _attached.get(name)
+    if shm is None:
+        shm = _attached[name] = shared_memory.SharedMemory(name=name)
+    array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)[start:stop]
+    # The same memory is seen by all the tasks.
+    array.setflags(write=False)
+    return array
+
+
+class SharedArray:
+    """An array in shared memory, created by :meth:`Executor.share`
+
+    It is passed to the workers by name, and unpickled there as a read-only view of the shared memory.
+
+    Attributes
+    ----------
+    shape : tuple
+        Shape of the rows of the array seen by the workers.
+    dtype : numpy.dtype
+        Type of the elements.
+    """
+
+    def __init__(self, shm, shape, dtype, start=0, stop=None):
+        self._shm = shm
+        self._shape = shape
+        self.dtype = np.dtype(dtype)
+        self._start = start
+        self._stop = shape[0] if stop is None else stop
+        self.shape = (self._stop - self._start,) + tuple(shape[1:])
+
+    def rows(self, start, stop):
+        """The rows from `start` to `stop` (excluded), without copying them"""
+        return SharedArray(
+            self._shm, self._shape, self.dtype, self._start + start, self._start + stop
+        )
+
+    def __array__(self, dtype=None):
+        array = np.ndarray(self._shape, dtype=self.dtype, buffer=self._shm.buf)
+        return np.asarray(array[self._start : self._stop], dtype=dtype)
+
+    def __reduce__(self):
+        return (
+            _attach,
+            (self._shm.name, self._shape, self.dtype.str, self._start, self._stop),
+        )
+
+
+def _share_args(executor, x):
+    if isinstance(x, np.ndarray) and x.nbytes >= _SHARE_MIN_BYTES:
+        return executor.share(x)
+    if isinstance(x, list) and any(isinstance(y, np.ndarray) for y in x):
+        return [_share_args(executor, y) for y in x]
+    return x
+
+
+def _call(f, args, kwargs):
+    return f(*args, **kwargs)
+
+
+class Executor:
+    """A pool of processes that receive the datasets through shared memory
+
+    Use it as a context manager, or call :meth:`shutdown`, to stop the workers and free the shared memory.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of worker processes. By default, the number of CPUs.
+    mp_context : multiprocessing context, optional
+        Context used to start the workers, see :class:`concurrent.futures.ProcessPoolExecutor`.
+    """
+
+    def __init__(self, max_workers=None, mp_context=None):
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"'max_workers' must be at least 1 ({max_workers} given)")
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp_context
+        )
+        self._blocks = []
+        # Arrays already shared, by id, with a reference that keeps the id valid.
+        self._shared = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def share(self, array):
+        """Copy an array to shared memory
+
+        Sharing the same array again returns the same :class:`SharedArray`, so an array that is passed to many \
+        calls is copied once. The array must not be modified while the executor uses it.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            The array.
+
+        Returns
+        -------
+        SharedArray
+            The array in shared memory, which can be passed to :meth:`map` and :meth:`submit`.
+        """
+        from multiprocessing import shared_memory
+
+        if isinstance(array, SharedArray):
+            return array
+        shared = self._shared.get(id(array))
+        if shared is not None and shared[0] is array:
+            return shared[1]
+        data = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        self._blocks.append(shm)
+        np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[...] = data
+        result = SharedArray(shm, data.shape, data.dtype)
+        self._shared[id(array)] = (array, result)
+        return result
+
+    def submit(self, f, *args, **kwargs):
+        """Schedule ``f(*args, **kwargs)`` on a worker
+
+        Array arguments (and lists of arrays) are shared with :meth:`share`, except small ones.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The future result.
+        """
+        args = [_share_args(self, x) for x in args]
+        kwargs = {k: _share_args(self, x) for k, x in kwargs.items()}
+        return self._pool.submit(_call, f, args, kwargs)
+
+    def map(self, f, *iterables, chunksize=1, **kwargs):
+        """Call `f` with the arguments taken from each of the iterables, like :func:`map`, on the workers
+
+        Array arguments are shared with :meth:`share`, except small ones. The keyword arguments are passed to \
+        all the calls.
+
+        Parameters
+        ----------
+        f : callable
+            A function that can be pickled, such as a function of eafpy.
+        *iterables : iterables
+            The positional arguments of the calls.
+        chunksize : int
+            Number of calls sent to a worker at once.
+        **kwargs
+            The keyword arguments of all the calls.
+
+        Returns
+        -------
+        list
+            The results, in the order of the arguments.
+        """
+        kwargs = {k: _share_args(self, x) for k, x in kwargs.items()}
+        calls = ([_share_args(self, x) for x in args] for args in zip(*iterables))
+        return list(
+            self._pool.map(
+                _call,
+                itertools.repeat(f),
+                calls,
+                itertools.repeat(kwargs),
+                chunksize=chunksize,
+            )
+        )
+
+    def map_sets(self, f, dataset, chunksize=1, **kwargs):
+        """Call ``f(points, **kwargs)`` with the points of each set of a dataset, on the workers
+
+        The objectives of the dataset are shared once and each worker receives a view of the rows of a set.
+
+        Parameters
+        ----------
+        f : callable
+            A function that can be pickled, such as :func:`eafpy.hypervolume` or :func:`eafpy.igd`.
+        dataset : numpy.ndarray
+            Points with the set number in the last column, as returned by :func:`eafpy.read_datasets`.
+        chunksize : int
+            Number of sets sent to a worker at once.
+        **kwargs
+            The keyword arguments of all the calls.
+
+        Returns
+        -------
+        list
+            The results, in the order of the set numbers.
+        """
+        dataset = np.asarray(dataset, dtype=float)
+        order, cumsizes, _ = eaf._group_sets(np.ascontiguousarray(dataset))
+        points = dataset[:, :-1] if order is None else dataset[order, :-1]
+        shared = self.share(np.ascontiguousarray(points))
+        bounds = [0] + cumsizes.tolist()
+        sets = [shared.rows(start, stop) for start, stop in zip(bounds, bounds[1:])]
+        return self.map(f, sets, chunksize=chunksize, **kwargs)
+
+    def shutdown(self, wait=True):
+        """Stop the workers and free the shared memory"""
+        self._pool.shutdown(wait=wait)
+        for shm in self._blocks:
+            try:
+                shm.close()
+            except BufferError:
+                pass  # An array created by SharedArray.__array__ still uses it.
+            shm.unlink()
+        self._blocks = []
+        self._shared = {}
@@ -1,5 +1,12 @@
 import sys
 import os
+import asyncio
+import json
+import subprocess
+import threading
+import shutil
+import itertools
+import warnings
 import numpy as np
 import pytest
 import math
@@ -279,6 +286,256 @@ def test_get_eaf():
         ), f"{test_name} test for get_eaf with percentiles failed"
 
 
+def test_get_eaf_nd():
+    # Compare with the minimal points of the attained grid points, which is
+    # exact for integer data.
+    rng = np.random.default_rng(1)
+    for nobj in [3, 4, 5]:
+        nruns = 4
+        data = rng.integers(0, 4, size=(nruns * 6, nobj)).astype(float)
+        runs = np.repeat(np.arange(1, nruns + 1), 6)
+        result = eaf.get_eaf(np.column_stack((data, runs)))
+
+        grid = np.array(np.meshgrid(*[np.arange(4)] * nobj)).reshape(nobj, -1).T
+        attained = np.all(data[None, :, :] <= grid[:, None, :], axis=2)
+        counts = np.array(
+            [attained[:, runs == run].any(axis=1) for run in range(1, nruns + 1)]
+        ).sum(axis=0)
+        for level in range(1, nruns + 1):
+            expected = eaf.filter_dominated(grid[counts >= level].astype(float))
+            points = result[result[:, -1] == level * 100 / nruns, :-1]
+            assert sorted(map(tuple, points)) == sorted(map(tuple, expected))
+
+
+def test_get_eaf_attained():
+    rng = np.random.default_rng(2)
+    for name in ["input1.dat", "uniform-250-10-3d.txt", None]:
+        if name is None:
+            # 4 objectives and more than 64 runs.
+            X = np.column_stack(
+                (rng.integers(0, 5, size=(70 * 3, 4)), np.repeat(np.arange(70), 3))
+            ).astype(float)
+        else:
+            X = eaf.read_datasets(f"tests/test_data/{name}")
+        sets = np.unique(X[:, -1])
+        result, attained = eaf.get_eaf(X, return_attained=True)
+        assert np.array_equal(result, eaf.get_eaf(X))
+        assert attained.dtype == np.uint8
+        assert attained.shape == (result.shape[0], (len(sets) + 7) // 8)
+        bits = np.unpackbits(attained, axis=1, count=len(sets), bitorder="little")
+        points = result[:, None, None, :-1]
+        expected = np.stack(
+            [
+                np.all(X[X[:, -1] == set, :-1] <= points, axis=-1).any(axis=-1)
+                for set in sets
+            ],
+            axis=-1,
+        )
+        expected = expected.reshape(result.shape[0], len(sets))
+        assert np.array_equal(bits, expected)
+        # The number of attaining runs agrees with the level of each point.
+        levels = np.ceil(result[:, -1] * len(sets) / 100 - 1e-9)
+        assert np.all(bits.sum(axis=1) >= levels)
+
+
+def test_get_eaf_out(tmp_path):
+    for name in ["input1.dat", "spherical-250-10-3d.txt"]:
+        X = eaf.read_datasets(f"tests/test_data/{name}")
+        for percentiles in [[], [10, 50, 90]]:
+            expected, attained = eaf.get_eaf(X, percentiles, return_attained=True)
+            levels = list(eaf.iter_eaf(X, percentiles))
+            assert len(levels) == (len(percentiles) or len(np.unique(X[:, -1])))
+            assert np.array_equal(np.vstack(levels), expected)
+
+            out = np.full((len(expected) + 5, X.shape[1]), -1.0)
+            result, result_attained = eaf.get_eaf(
+                X, percentiles, return_attained=True, out=out
+            )
+            assert np.shares_memory(result, out)
+            assert np.array_equal(result, expected)
+            assert np.array_equal(result_attained, attained)
+            assert np.all(out[len(expected) :] == -1)
+
+            result = eaf.get_eaf(X, percentiles, out=tmp_path / "eaf.npy")
+            assert isinstance(result, np.memmap)
+            assert np.array_equal(result, expected)
+            assert np.array_equal(np.load(tmp_path / "eaf.npy"), expected)
+
+    with pytest.raises(ValueError, match="at least"):
+        eaf.get_eaf(X, out=np.empty((10, X.shape[1])))
+    with pytest.raises(ValueError, match="at least 2 objectives"):
+        eaf.iter_eaf(X[:, 2:])
+
+
+def test_eaf_incremental():
+    rng = np.random.default_rng(3)
+    # Integer coordinates have many repeated values.
+    X = np.column_stack(
+        (rng.integers(0, 10, size=(60 * 5, 2)), np.repeat(np.arange(60), 5))
+    ).astype(float)
+    X = np.vstack((X, eaf.read_datasets("tests/test_data/input1.dat") + [0, 0, 60]))
+    x = eaf.EAF()
+    with pytest.raises(ValueError, match="No runs"):
+        x.get()
+    # Adding a few runs updates the surfaces of all levels, while adding many
+    # runs computes them again.
+    for start, end in [(0, 1), (1, 2), (2, 7), (7, 40), (40, 41), (41, 43), (43, 71)]:
+        runs = X[(X[:, -1] >= start) & (X[:, -1] < end)]
+        assert x.add(runs).nruns == len(np.unique(X[X[:, -1] < end, -1]))
+        subset = X[X[:, -1] < end]
+        for percentiles in [[50], [0, 10, 33.3, 90, 100]]:
+            assert np.array_equal(x.get(percentiles), eaf.get_eaf(subset, percentiles))
+        assert np.array_equal(x.get(), eaf.get_eaf(subset))
+    with pytest.raises(ValueError, match="2 objectives"):
+        x.add(np.ones((4, 4)))
+    # Levels above the number of runs do not exist.
+    for percentiles in [[150], [50, 100.5], [-1], [np.nan]]:
+        with pytest.raises(ValueError, match="between 0 and 100"):
+            x.get(percentiles)
+        with pytest.raises(ValueError, match="between 0 and 100"):
+            eaf.get_eaf(X, percentiles)
+
+
+def brute_force_attainment(X, points, maximise):
+    sign = np.where(np.broadcast_to(maximise, points.shape[1]), -1, 1)
+    sets = np.unique(X[:, -1])
+    return np.mean(
+        [
+            np.all(
+                X[X[:, -1] == set, None, :-1] * sign <= points[None, :, :] * sign,
+                axis=-1,
+            ).any(axis=0)
+            for set in sets
+        ],
+        axis=0,
+    )
+
+
+def test_attainment_index():
+    rng = np.random.default_rng(4)
+    for nobj in [2, 3]:
+        # Integer coordinates have many ties.
+        X = np.column_stack(
+            (rng.integers(0, 8, size=(30 * 15, nobj)), rng.integers(0, 30, 30 * 15))
+        ).astype(float)
+        points = rng.integers(-1, 9, size=(500, nobj)).astype(float)
+        for maximise in [False, True, [True] + [False] * (nobj - 1)]:
+            index = eaf.AttainmentIndex(X, maximise=maximise)
+            assert index.nruns == 30 and index.nobj == nobj
+            assert np.allclose(
+                index.attainment(points),
+                brute_force_attainment(X, points, maximise),
+            )
+    X = eaf.read_datasets("tests/test_data/spherical-250-10-3d.txt")
+    points = rng.uniform(0, 1, size=(1000, 3))
+    index = eaf.AttainmentIndex(X)
+    assert np.allclose(
+        index.attainment(points), brute_force_attainment(X, points, False)
+    )
+    assert np.allclose(index.attainment(points[0]), index.attainment(points[:1]))
+    with pytest.raises(ValueError, match="2 or 3 objectives"):
+        eaf.AttainmentIndex(np.ones((4, 5)))
+    with pytest.raises(ValueError, match="3 columns"):
+        index.attainment(np.ones((4, 2)))
+
+
+def test_vorobev():
+    for name, ref in [
+        ("input1.dat", [10, 10]),
+        ("spherical-250-10-3d.txt", [1.1, 1.1, 1.1]),
+    ]:
+        X = eaf.read_datasets(f"tests/test_data/{name}")
+        nobj = X.shape[1] - 1
+        sets = [X[X[:, -1] == s, :-1] for s in np.unique(X[:, -1])]
+        avg_hyp = np.mean([eaf.hypervolume(s, ref) for s in sets])
+        E = eaf.get_eaf(X)
+        levels = np.unique(E[:, -1])
+        hyp = [eaf.hypervolume(E[E[:, -1] == p, :-1], ref) for p in levels]
+        threshold = levels[np.flatnonzero(np.array(hyp) >= avg_hyp)[-1]]
+        assert eaf.vorobev_threshold(X, ref) == threshold
+        ve = eaf.vorobev_expectation(X, ref)
+        assert np.array_equal(ve, E[E[:, -1] == threshold, :-1])
+        deviation = (
+            2 * np.mean([eaf.hypervolume(np.vstack((s, ve)), ref) for s in sets])
+            - eaf.hypervolume(ve, ref)
+            - avg_hyp
+        )
+        assert math.isclose(eaf.vorobev_deviation(X, ref), deviation)
+        # Maximising the negated objectives gives the same result.
+        Y = np.column_stack((-X[:, :-1], X[:, -1]))
+        assert eaf.vorobev_threshold(Y, -np.asarray(ref), maximise=True) == threshold
+        assert np.array_equal(
+            eaf.vorobev_expectation(Y, -np.asarray(ref), maximise=True), -ve
+        )
+
+    # All the sets are equal.
+    X = eaf.read_datasets("tests/test_data/input1.dat")
+    X = X[X[:, -1] == 1]
+    X = np.vstack([X + [0, 0, k] for k in range(3)])
+    assert eaf.vorobev_threshold(X, [10, 10]) == 100
+    assert math.isclose(eaf.vorobev_deviation(X, [10, 10]), 0, abs_tol=1e-9)
+    with pytest.raises(ValueError, match="same number of objectives"):
+        eaf.vorobev_threshold(X, [10, 10, 10])
+
+
+def test_eaf_permutation_test():
+    X = eaf.read_datasets("tests/test_data/input1.dat")
+    x = eaf.subset(X, range=[1, 4])
+    y = eaf.subset(X, range=[5, 10]) + [0, 0, 100]
+    statistic, pvalue = eaf.eaf_permutation_test(x, y, n_permutations=50, seed=1)
+    # The maximum difference is reached at the points of the EAF of all sets.
+    points = eaf.get_eaf(np.vstack((x, y)))[:, :-1]
+    attains = lambda data: np.mean(
+        [
+            np.all(data[data[:, -1] == s, None, :-1] <= points, axis=-1).any(axis=0)
+            for s in np.unique(data[:, -1])
+        ],
+        axis=0,
+    )
+    assert math.isclose(statistic, np.max(np.abs(attains(x) - attains(y))))
+    assert 1 / 51 <= pvalue <= 1
+    # Reproducible and independent of the number of threads.
+    for workers in [1, 3]:
+        assert eaf.eaf_permutation_test(
+            x, y, n_permutations=50, seed=1, workers=workers
+        ) == (statistic, pvalue)
+
+    # Very different datasets.
+    y = X.copy()
+    y[:, :-1] += 100
+    statistic, pvalue = eaf.eaf_permutation_test(X, y, n_permutations=200, seed=1)
+    assert statistic == 1
+    assert pvalue < 0.05
+    with pytest.raises(ValueError, match="same number of columns"):
+        eaf.eaf_permutation_test(X, np.ones((4, 4)))
+
+
+def test_get_eaf_many():
+    names = [
+        "input1.dat",
+        "spherical-250-10-3d.txt",
+        "uniform-250-10-3d.txt",
+        "wrots_l10w100_dat",
+    ]
+    datasets = [eaf.read_datasets(f"tests/test_data/{name}") for name in names]
+    expected = [eaf.get_eaf(dataset) for dataset in datasets]
+    # Run many EAF computations of both engines at the same time.
+    for threads in [1, 8]:
+        results = eaf.get_eaf_many(datasets * 10, threads=threads)
+        assert len(results) == len(datasets) * 10
+        for i, result in enumerate(results):
+            assert np.array_equal(result, expected[i % len(datasets)])
+
+    pct = eaf.get_eaf_many(datasets, percentiles=[0, 50, 100], threads=4)
+    for result, dataset in zip(pct, datasets):
+        assert np.array_equal(result, eaf.get_eaf(dataset, percentiles=[0, 50, 100]))
+
+    with pytest.raises(ValueError):
+        eaf.get_eaf_many(datasets, threads=0)
+    with pytest.raises(ValueError):
+        eaf.get_eaf(np.ones((4, 2)))
+
+
 def test_get_diff_eaf():
     diff1 = np.loadtxt("tests/test_data/100_diff_points_1.txt")
     diff2 = np.loadtxt("tests/test_data/100_diff_points_2.txt")
@@ -296,5 +553,683 @@ def test_get_diff_eaf():
 
     # FIXME add more tests including intervals
 
+    # x and y may have a different number of sets.
+    x = eaf.read_datasets("tests/test_data/input1.dat")
+    x = x[x[:, -1] <= 3]
+    y = np.vstack((x, x + [0, 0, 3]))
+    diff = eaf.get_diff_eaf(x, y)
+    assert np.all(diff[:, -1] == 0)
+
+
+def test_get_diff_eaf_3d():
+    X = eaf.read_datasets("tests/test_data/spherical-250-10-3d.txt")
+    for x, y in [
+        (eaf.subset(X, range=[1, 5]), eaf.subset(X, range=[6, 10])),
+        (eaf.subset(X, range=[1, 3]), eaf.subset(X, range=[4, 10])),
+    ]:
+        diff = eaf.get_diff_eaf(x, y, intervals=1)
+        assert diff.flags.c_contiguous
+        assert np.array_equal(diff[:, :-1], eaf.get_eaf(np.vstack((x, y)))[:, :-1])
+        idx = np.random.default_rng(1).choice(len(diff), 200)
+        expected = brute_force_attainment(
+            x, diff[idx, :-1], False
+        ) - brute_force_attainment(y, diff[idx, :-1], False)
+        assert np.allclose(diff[idx, -1], expected)
+
+
+def test_get_diff_eaf_counts():
+    # The counts of runs of x and y that get_diff_eaf stores give the same
+    # differences as the runs that attain each point.
+    X = eaf.read_datasets("tests/test_data/spherical-250-10-3d.txt")
+    for cols in [[0, 1, 3], [0, 1, 2, 3]]:
+        for nx in [3, 5]:
+            x = eaf.subset(X, range=[1, nx])[:, cols]
+            y = eaf.subset(X, range=[nx + 1, 10])[:, cols]
+            points, attained = eaf.get_eaf(np.vstack((x, y)), return_attained=True)
+            bits = np.unpackbits(attained, axis=1, count=10, bitorder="little")
+            left = bits[:, :nx].sum(axis=1)
+            right = bits[:, nx:].sum(axis=1)
+            expected = 5 * (left / nx - right / (10 - nx))
+            diff = eaf.get_diff_eaf(x, y)
+            assert np.array_equal(diff[:, :-1], points[:, :-1])
+            assert np.allclose(diff[:, -1], expected)
+
+
+def test_get_diff_eaf_rectangles():
+    X = eaf.read_datasets("tests/test_data/input1.dat")
+    ref = np.array([10, 10])
+    for x, y, intervals in [
+        (eaf.subset(X, range=[1, 5]), eaf.subset(X, range=[6, 10]), None),
+        (eaf.subset(X, range=[1, 3]), eaf.subset(X, range=[4, 10]), 4),
+    ]:
+        rects = eaf.get_diff_eaf(x, y, intervals=intervals, rectangles=True)
+        nx, ny = len(np.unique(x[:, -1])), len(np.unique(y[:, -1]))
+        intervals = intervals or (nx + ny) // 2
+        assert np.all(rects[:, 4] != 0)
+        assert np.all(rects[:, :2] < rects[:, 2:4])
+        # The difference inside each rectangle is the one of its lower-left corner.
+        corners = rects[:, :2]
+        diff = brute_force_attainment(x, corners, False) - brute_force_attainment(
+            y, corners, False
+        )
+        assert np.allclose(rects[:, 4], intervals * diff)
+        # The rectangles do not overlap, so their weighted area is the difference
+        # of the average hypervolumes.
+        clipped = np.minimum(rects[:, :4], np.tile(ref, 2))
+        area = (clipped[:, 2] - clipped[:, 0]) * (clipped[:, 3] - clipped[:, 1])
+        avg_hv = lambda data: np.mean(
+            [
+                eaf.hypervolume(np.ascontiguousarray(data[data[:, -1] == s, :-1]), ref)
+                for s in np.unique(data[:, -1])
+            ]
+        )
+        assert math.isclose(
+            np.sum(area * rects[:, 4]) / intervals, avg_hv(x) - avg_hv(y)
+        )
+
+    with pytest.raises(ValueError, match="2 objectives"):
+        x = eaf.read_datasets("tests/test_data/spherical-250-10-3d.txt")
+        eaf.get_diff_eaf(x, x, rectangles=True)
+
+
+def test_eaf_unsorted_sets():
+    for name in ["input1.dat", "uniform-250-10-3d.txt"]:
+        X = eaf.read_datasets(f"tests/test_data/{name}")
+        shuffled = X[np.random.default_rng(0).permutation(X.shape[0])]
+        expected = np.unique(eaf.get_eaf(X), axis=0)
+        assert np.array_equal(np.unique(eaf.get_eaf(shuffled), axis=0), expected)
+        half = X[X[:, -1] <= 5]
+        shuffled_half = half[np.random.default_rng(1).permutation(half.shape[0])]
+        expected = np.unique(eaf.get_diff_eaf(half, half + 1), axis=0)
+        assert np.array_equal(
+            np.unique(eaf.get_diff_eaf(shuffled_half, half + 1), axis=0), expected
+        )
+
+    # Interleaved, gapped, negative and non-integer set numbers give the same
+    # result as the same sets numbered 1, 2, ...
+    X = eaf.read_datasets("tests/test_data/input1.dat")
+    perm = np.random.default_rng(2).permutation(X.shape[0])
+    expected = np.unique(eaf.get_eaf(X)[:, :-1], axis=0)
+    expected_norm = eaf.normalise_sets(X)[perm]
+    expected_filter = eaf.filter_dominated_sets(X)
+    for relabel in [
+        lambda s: s,
+        lambda s: 3 * s,
+        lambda s: s - 20,
+        lambda s: 10000 * s,
+        lambda s: s + 0.5,
+    ]:
+        Y = np.column_stack((X[:, :-1], relabel(X[:, -1])))[perm]
+        assert np.array_equal(np.unique(eaf.get_eaf(Y)[:, :-1], axis=0), expected)
+        assert np.array_equal(eaf.normalise_sets(Y)[:, :-1], expected_norm[:, :-1])
+        filtered = eaf.filter_dominated_sets(Y)
+        assert np.array_equal(
+            np.unique(filtered[:, :-1], axis=0),
+            np.unique(expected_filter[:, :-1], axis=0),
+        )
+        assert np.array_equal(np.unique(filtered[:, -1]), np.unique(Y[:, -1]))
+
+
+def test_eaf_empty_input():
+    X = eaf.read_datasets("tests/test_data/input1.dat")
+    empty = np.empty((0, 3))
+    with pytest.raises(ValueError, match="at least one point"):
+        eaf.get_eaf(empty)
+    with pytest.raises(ValueError, match="at least one point"):
+        list(eaf.iter_eaf(empty))
+    with pytest.raises(ValueError, match="at least one point"):
+        eaf.get_diff_eaf(empty, X)
+    with pytest.raises(ValueError, match="at least one point"):
+        eaf.get_diff_eaf(X, empty, rectangles=True)
+    with pytest.raises(ValueError, match="at least one point"):
+        eaf.vorobev_threshold(empty, ref=[10, 10])
+    with pytest.raises(ValueError, match="at least one point"):
+        eaf.eaf_permutation_test(empty, X)
+
+
+# TODO add tests for subset, data_subset, filer_dominated_sets
+
+
+def test_normalise_sets():
+    X = eaf.read_datasets("tests/test_data/input1.dat")
+    sets = X[:, -1]
+
+    def normalise_loop(lower=np.nan, upper=np.nan, maximise=False):
+        expected = X.copy()
+        for set in np.unique(sets):
+            expected[sets == set, :-1] = eaf.normalise(
+                X[sets == set, :-1], lower=lower, upper=upper, maximise=maximise
+            )
+        return expected
+
+    assert np.allclose(eaf.normalise_sets(X), normalise_loop())
+    # lower, upper and maximise are not ignored.
+    assert np.allclose(
+        eaf.normalise_sets(X, lower=[0, 1], upper=10, maximise=[True, False]),
+        normalise_loop(lower=[0, 1], upper=10, maximise=[True, False]),
+    )
+    expected_global = np.column_stack((eaf.normalise(X[:, :-1]), sets))
+    assert np.allclose(eaf.normalise_sets(X, per_set=False), expected_global)
+
+    # The input is not modified unless requested.
+    Y = X.copy()
+    eaf.normalise_sets(Y)
+    assert np.array_equal(X, Y)
+    assert eaf.normalise_sets(Y, inplace=True) is Y
+    assert np.allclose(Y, normalise_loop())
+
+    out = np.empty_like(X)
+    assert eaf.normalise_sets(X, out=out) is out
+    assert np.allclose(out, normalise_loop())
+
+    with pytest.raises(ValueError):
+        eaf.normalise_sets(X.astype(np.float32), inplace=True)
+    with pytest.raises(ValueError):
+        eaf.normalise_sets(X, out=np.empty((2, 3)))
+    with pytest.raises(ValueError):
+        eaf.normalise(X[:, :-1], inplace=True, out=out)
+
+
+def test_pipeline():
+    X = eaf.read_datasets("tests/test_data/input1.dat")
+    # Shuffle the rows so that sets are not contiguous.
+    X = X[np.random.default_rng(42).permutation(X.shape[0])]
+    ref_set = np.array([[0.0, 0.2], [0.1, 0.1], [0.2, 0.0]])
+
+    def unfused(data, maximise=False):
+        data = eaf.filter_dominated_sets(
+            eaf.normalise_sets(data, maximise=maximise), keep_weakly=False
+        )
+        expected = []
+        for set in np.unique(data[:, -1]):
+            points = data[data[:, -1] == set, :-1]
+            expected.append(
+                [
+                    eaf.hypervolume(points, ref=[1.1, 1.1]),
+                    eaf.igd_plus(points, ref_set),
+                    eaf.epsilon_additive(points, ref_set),
+                ]
+            )
+        return np.array(expected)
+
+    names = ["hv", "igd+", "eps+"]
+    for maximise in [False, [True, False]]:
+        result = (
+            eaf.pipeline(X, maximise=maximise)
+            .normalise()
+            .filter_dominated()
+            .indicators(names, ref=[1.1, 1.1], ref_set=ref_set)
+        )
+        assert np.allclose(result, unfused(X, maximise))
+
+    # Steps are lazy and immutable.
+    base = eaf.pipeline(X)
+    filtered = base.filter_dominated()
+    hv = base.indicators("hypervolume", ref=[10, 10])[:, 0]
+    for i, set in enumerate(np.unique(X[:, -1])):
+        points = X[X[:, -1] == set, :-1]
+        assert np.isclose(hv[i], eaf.hypervolume(points, ref=[10, 10]))
+    assert np.allclose(filtered.indicators("hv", ref=[10, 10])[:, 0], hv)
+
+    # Maximised objectives without normalisation.
+    result = eaf.pipeline(X, maximise=True).indicators(
+        ["hv", "igd"], ref=[0, 0], ref_set=[[10, 10]]
+    )
+    for i, set in enumerate(np.unique(X[:, -1])):
+        points = X[X[:, -1] == set, :-1]
+        assert np.isclose(result[i, 0], eaf.hypervolume(-points, ref=[0, 0]))
+        assert np.isclose(result[i, 1], eaf.igd(points, [[10, 10]], maximise=True))
+
+    # eps* is undefined with values equal to zero.
+    assert np.all(np.isnan(base.normalise().indicators("eps*", ref_set=ref_set)[:, 0]))
+    with pytest.raises(ValueError):
+        base.indicators(["hv", "unknown"], ref=[10, 10])
+    with pytest.raises(ValueError):
+        base.indicators(["hv"])
+    with pytest.raises(ValueError):
+        base.normalise().normalise()
+    with pytest.raises(ValueError, match="at least one point"):
+        eaf.pipeline(np.empty((0, 3))).normalise(per_set=False).indicators(
+            "hv", ref=[1, 1]
+        )
+
+
+def test_generate_nondominated_sets():
+    for method in ["linear", "sphere", "convex", "degenerate"]:
+        for nobj in [2, 3, 5]:
+            for shape in [None, 0.5, 4]:
+                data = eaf.generate_nondominated_sets(
+                    [50, 1, 200], nobj=nobj, method=method, shape=shape, seed=1
+                )
+                assert data.shape == (251, nobj + 1)
+                assert np.array_equal(np.unique(data[:, -1]), [1, 2, 3])
+                assert np.all((data[:, :-1] >= 0) & (data[:, :-1] <= 1))
+                for s in [1, 3]:
+                    assert np.all(eaf.is_nondominated(data[data[:, -1] == s, :-1]))
+                points = data[:, :-1]
+                if method == "linear":
+                    assert np.allclose(points.sum(axis=1), 1)
+                elif method == "convex":
+                    assert np.allclose(np.linalg.norm(1 - points, axis=1), 1)
+                else:
+                    assert np.allclose(np.linalg.norm(points, axis=1), 1)
+                if method == "degenerate":
+                    assert np.allclose(points[:, 1:], points[:, 1:2])
+
+    # Small shapes put many points so close to the boundary of the front that
+    # rounding makes them dominated or equal, so they are sampled again.
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        for method, (nobj, n), shape in itertools.product(
+            ["linear", "sphere", "convex"], [(2, 10000), (3, 2000)], [0.005, 0.1, 0.3]
+        ):
+            data = eaf.generate_nondominated_sets(
+                n, nobj=nobj, method=method, shape=shape, seed=2
+            )
+            assert np.all((data[:, :-1] >= 0) & (data[:, :-1] <= 1))
+            assert eaf.is_nondominated(np.ascontiguousarray(data[:, :-1])).all()
+
+    data = eaf.generate_nondominated_sets(10, nsets=4, seed=3)
+    assert np.array_equal(data[:, -1], np.repeat([1, 2, 3, 4], 10))
+    assert np.array_equal(
+        data, eaf.generate_nondominated_sets(10, nsets=4, seed=np.random.default_rng(3))
+    )
+    with pytest.raises(ValueError, match="unknown method"):
+        eaf.generate_nondominated_sets(10, method="unknown")
+    with pytest.raises(ValueError, match="nsets"):
+        eaf.generate_nondominated_sets([10, 20], nsets=3)
+    with pytest.raises(ValueError, match="nobj"):
+        eaf.generate_nondominated_sets(10, nobj=1)
+
+
+def test_profiling(tmp_path):
+    dataset = eaf.read_datasets("tests/test_data/spherical-250-10-3d.txt")
+    with eaf.profiling(trace=tmp_path / "trace.json") as prof:
+        eaf.read_datasets("tests/test_data/spherical-250-10-3d.txt")
+        x = eaf.get_eaf(dataset)
+        eaf.filter_dominated(np.ascontiguousarray(dataset[:, :3]))
+    eaf.get_eaf(dataset)  # Not recorded.
+
+    names = [call.name for call in prof.calls]
+    assert names == ["read_datasets", "get_eaf", "is_nondominated", "filter_dominated"]
+    read, get, nondom, filt = prof.calls
+    assert [p.name for p in read.phases] == [
+        "read_datasets.parse",
+        "read_datasets.copy",
+    ]
+    assert read.npoints == dataset.shape[0] and read.nbytes == dataset.nbytes
+    assert get.npoints == dataset.shape[0]
+    phases = {p.name: p for p in get.phases}
+    assert phases["eaf3d"].npoints == dataset.shape[0]
+    assert phases["get_eaf.copy"].npoints == x.shape[0]
+    assert phases["get_eaf.copy"].nbytes == x.nbytes
+    assert 0 < get.c_time <= get.wall and get.python_time >= 0
+    # Nested calls and phases lie within the enclosing one.
+    assert nondom.depth == 1 and filt.depth == 0
+    assert filt.start <= nondom.start and nondom.wall <= filt.wall
+    for call in prof.calls:
+        for p in call.phases:
+            assert call.start <= p.start <= call.start + call.wall
+
+    summary = prof.summary()
+    assert summary["get_eaf"]["calls"] == 1
+    assert summary["get_eaf/eaf.copy"]["calls"] == 10
+    with open(tmp_path / "trace.json") as f:
+        trace = json.load(f)
+    assert {e["name"] for e in trace["traceEvents"]} >= set(names) | {"eaf3d"}
+    assert all(e["ph"] == "X" for e in trace["traceEvents"])
+
+
+def test_import_without_plotting():
+    # The numerical API does not need the dependencies of the plotting functions,
+    # which are only imported when these are accessed.
+    code = """
+import sys
+class Block:
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in ("plotly", "pandas", "matplotlib"):
+            raise ImportError(name)
+sys.meta_path.insert(0, Block())
+import numpy as np
+import eafpy as eaf
+print(eaf.hypervolume(np.array([[1.0, 2.0]]), ref=[3, 3]))
+try:
+    eaf.plot_eaf
+except ImportError:
+    print("ImportError")
+"""
+    out = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout.split()
+    assert out == ["2.0", "ImportError"]
+    assert callable(eaf.plot_eaf) and "plot_datasets" in dir(eaf)
+    with pytest.raises(AttributeError, match="no attribute 'plot_nothing'"):
+        eaf.plot_nothing
+
+
+def test_cli(tmp_path, capsys):
+    from eafpy.cli import main
+
+    dataset = eaf.read_datasets("tests/test_data/input1.dat")
+    x, y = eaf.subset(dataset, range=[1, 5]), eaf.subset(dataset, range=[6, 10])
+    for name, data in [("x", x), ("y", y)]:
+        with open(tmp_path / f"{name}.txt", "w") as f:
+            for s in np.unique(data[:, -1]):
+                np.savetxt(f, data[data[:, -1] == s, :-1])
+                f.write("\n")
+    pattern = str(tmp_path / "*.txt")
+
+    assert main(["hv", "--ref", "10,10", "-j", "2", "--format", "csv", pattern]) == 0
+    out, err = capsys.readouterr()
+    lines = out.splitlines()
+    assert lines[0] == "file,set,hv" and len(lines) == 11
+    hv = [float(line.split(",")[2]) for line in lines[1:]]
+    expected = eaf.pipeline(dataset).indicators("hv", ref=[10, 10])[:, 0]
+    assert np.allclose(hv, expected)
+    assert "2 files, 100 points" in err
+
+    # The text output can be read back.
+    outdir = tmp_path / "out"
+    outdir.mkdir()
+    assert main(["filter", "-q", "-j", "1", "-o", str(outdir), pattern]) == 0
+    assert np.allclose(
+        eaf.read_datasets(str(outdir / "x.filter.txt")),
+        eaf.filter_dominated_sets(x),
+    )
+    assert (
+        main(["eaf", "-q", "-o", str(tmp_path / "eaf.txt"), str(tmp_path / "x.txt")])
+        == 0
+    )
+    levels = eaf.read_datasets(str(tmp_path / "eaf.txt"))
+    assert np.allclose(levels[:, :-1], eaf.get_eaf(x)[:, :-1])
+
+    assert (
+        main(["eafdiff", "-q", str(tmp_path / "x.txt"), str(tmp_path / "y.txt")]) == 0
+    )
+    diff = np.loadtxt(capsys.readouterr().out.splitlines())
+    assert np.allclose(diff, eaf.get_diff_eaf(x, y))
+
+    assert main(["hv", "--ref", "1,1,1", "-q", pattern]) == 1
+    assert "one value per objective" in capsys.readouterr().err
+    # The errors of the workers are reported like those of a single process.
+    with open(tmp_path / "bad.txt", "w") as f:
+        f.write("1 2\n3 x\n")
+    for jobs in ["1", "2"]:
+        args = ["hv", "--ref", "10,10", "-q", "-j", jobs, str(tmp_path / "x.txt")]
+        assert main(args + [str(tmp_path / "bad.txt")]) == 1
+        assert "error: ERROR_CONVERSION" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main(["hv", "--ref", "1,1", str(tmp_path / "none*.txt")])
+
+
+def test_aio():
+    import eafpy.aio
 
-# TODO add tests for subset, data_subset, normalise_sets, filer_dominated_sets
+    dataset = eaf.read_datasets("tests/test_data/input1.dat")
+    points = eaf.generate_nondominated_sets(400, nobj=5, method="sphere", seed=1)
+    points = np.ascontiguousarray(points[:, :-1])
+    ref = np.full(5, 1.1)
+
+    async def main():
+        # Identical concurrent calls are computed once.
+        with eaf.profiling() as prof:
+            results = await asyncio.gather(
+                *[eafpy.aio.get_eaf(dataset, percentiles=[50]) for _ in range(3)],
+                eafpy.aio.hypervolume(points, ref=ref),
+            )
+        assert sorted(call.name for call in prof.calls) == ["get_eaf", "hypervolume"]
+        assert results[0] is results[2]
+        assert np.allclose(results[0], eaf.get_eaf(dataset, percentiles=[50]))
+        assert math.isclose(results[3], eaf.hypervolume(points, ref=ref))
+
+        # Calls with the same arguments, given by position, by name or by
+        # default, are coalesced, but calls that write to `out` are not.
+        median = await asyncio.gather(
+            eafpy.aio.get_eaf(dataset, [50]),
+            eafpy.aio.get_eaf(dataset, percentiles=[50], debug=False),
+        )
+        assert median[0] is median[1]
+        outs = [np.zeros((len(median[0]), 3)) for _ in range(2)]
+        await asyncio.gather(
+            *[eafpy.aio.get_eaf(dataset, [50], False, False, out) for out in outs]
+        )
+        for out in outs:
+            assert np.array_equal(out, median[0])
+
+        # The computations below wait for `release`, so they are still running
+        # when they are cancelled.
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking_hypervolume(data, ref):
+            started.set()
+            release.wait()
+            return eaf.hypervolume(data, ref=ref)
+
+        blocking = eafpy.aio._awaitable(blocking_hypervolume)
+
+        # Cancelling one caller does not cancel the computation for the others.
+        a = asyncio.create_task(blocking(points, ref))
+        b = asyncio.create_task(blocking(points, ref))
+        await asyncio.to_thread(started.wait)
+        a.cancel()
+        release.set()
+        assert math.isclose(await b, results[3])
+        assert a.cancelled()
+
+        # A cancelled computation keeps its slot until it finishes in C.
+        eafpy.aio.configure(max_workers=2, max_concurrency=1)
+        started.clear()
+        release.clear()
+        with eaf.profiling() as prof:
+            c = asyncio.create_task(blocking(points, ref))
+            await asyncio.to_thread(started.wait)
+            c.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await c
+            others = asyncio.gather(
+                eafpy.aio.hypervolume(points[:300], ref=ref),
+                eafpy.aio.hypervolume(points[:200], ref=ref),
+            )
+            done, _ = await asyncio.wait([others], timeout=0.05)
+            assert not done
+            release.set()
+            await others
+        calls = sorted(prof.calls, key=lambda call: call.start)
+        assert len(calls) == 3
+        for first, second in zip(calls, calls[1:]):
+            assert second.start >= first.start + first.wall
+
+    try:
+        asyncio.run(main())
+    finally:
+        eafpy.aio.configure()
+    with pytest.raises(ValueError, match="max_concurrency"):
+        eafpy.aio.configure(max_concurrency=0)
+
+
+def test_caching(tmp_path):
+    filename = tmp_path / "data.txt"
+    shutil.copy("tests/test_data/spherical-250-10-3d.txt", filename)
+    dataset = eaf.read_datasets("tests/test_data/spherical-250-10-3d.txt")
+    with eaf.caching(directory=tmp_path / "cache") as cache:
+        x = eaf.get_eaf(dataset, percentiles=[50])
+        # Equal contents and default arguments give the same key.
+        assert eaf.get_eaf(dataset.copy(), [50], debug=False) is x
+        assert not x.flags.writeable
+        assert eaf.get_eaf(dataset, percentiles=[25]) is not x
+        out = np.empty_like(x)
+        assert eaf.get_eaf(dataset, percentiles=[50], out=out) is out
+        points = np.ascontiguousarray(dataset[:250, :3])
+        hv = eaf.hypervolume(points, ref=[10, 10, 10])
+        assert eaf.hypervolume(points.copy(), ref=[10, 10, 10]) == hv
+        data = eaf.read_datasets(str(filename))
+        assert eaf.read_datasets(str(filename)) is data
+        assert (cache.hits, cache.misses) == (3, 4)
+        # A modified file is read again.
+        with open(filename, "a") as f:
+            f.write("1 2 3\n")
+        assert eaf.read_datasets(str(filename)).shape[0] == data.shape[0] + 1
+    assert eaf.get_eaf(dataset, percentiles=[50]).flags.writeable
+
+    # Another cache reuses the results stored on disk, and evicts results
+    # that do not fit in memory.
+    with eaf.caching(maxbytes=x.nbytes, directory=tmp_path / "cache") as cache:
+        np.testing.assert_array_equal(eaf.get_eaf(dataset, percentiles=[50]), x)
+        assert eaf.hypervolume(points, ref=[10, 10, 10]) == hv
+        assert cache.hits == 2 and cache.misses == 0
+        eaf.get_eaf(dataset, percentiles=[25])
+        assert len(cache) < 3 and cache.nbytes <= x.nbytes
+
+    # Overlapping blocks in other threads, where A exits before B, each use
+    # their own cache, and leave none behind.
+    events = {name: threading.Event() for name in ["a_in", "b_in", "a_out"]}
+    caches = {}
+
+    def block(name, enter, wait, exit):
+        with eaf.caching() as cache:
+            caches[name] = cache
+            events[enter].set()
+            events[wait].wait()
+            for _ in range(2):
+                eaf.hypervolume(points, ref=[10, 10, 10])
+            if exit:
+                events[exit].set()
+
+    threads = [
+        threading.Thread(target=block, args=("a", "a_in", "b_in", "a_out")),
+        threading.Thread(target=block, args=("b", "b_in", "a_out", None)),
+    ]
+    threads[0].start()
+    events["a_in"].wait()
+    threads[1].start()
+    for thread in threads:
+        thread.join()
+    for cache in caches.values():
+        assert cache.hits == 1 and cache.misses == 1
+    x = eaf.get_eaf(dataset, percentiles=[50])
+    assert eaf.get_eaf(dataset, percentiles=[50]) is not x and x.flags.writeable
+
+    # The calls of eafpy.aio use the cache of the task that awaits them.
+    import eafpy.aio
+
+    async def cached_hypervolume():
+        with eaf.caching() as cache:
+            for _ in range(2):
+                await eafpy.aio.hypervolume(points, ref=[10, 10, 10])
+        return cache
+
+    cache = asyncio.run(cached_hypervolume())
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_parallel():
+    from multiprocessing import shared_memory
+    import eafpy.parallel
+
+    dataset = eaf.read_datasets("tests/test_data/spherical-250-10-3d.txt")
+    # Unsorted sets are grouped before sharing.
+    shuffled = dataset[np.random.default_rng(1).permutation(len(dataset))]
+    refs = [[10, 10, 10], [20, 20, 20], [30, 30, 30]]
+    with eafpy.parallel.Executor(max_workers=2) as executor:
+        hv = executor.map_sets(eaf.hypervolume, shuffled, ref=refs[0])
+        np.testing.assert_allclose(
+            hv, eaf.pipeline(dataset).indicators("hv", ref=refs[0])[:, 0]
+        )
+        points = np.ascontiguousarray(dataset[:, :3])
+        shared = executor.share(points)
+        assert executor.share(points) is shared and shared.shape == points.shape
+        hvs = executor.map(eaf.hypervolume, [points] * len(refs), refs)
+        assert hvs == [eaf.hypervolume(points, ref=r) for r in refs]
+        future = executor.submit(eaf.get_eaf, dataset, percentiles=[50])
+        np.testing.assert_array_equal(
+            future.result(), eaf.get_eaf(dataset, percentiles=[50])
+        )
+        # Workers receive read-only views of the shared memory.
+        with pytest.raises(ValueError, match="writeable"):
+            executor.map(eaf.normalise, [shared], inplace=True)
+        name = shared._shm.name
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+    with pytest.raises(ValueError, match="max_workers"):
+        eafpy.parallel.Executor(max_workers=0)
+
+
+def test_hypervolume_trajectory():
+    rng = np.random.default_rng(1)
+    for nobj in [2, 3, 4]:
+        # Integer coordinates give ties, duplicates and points beyond ref.
+        points = rng.integers(0, 6, size=(50, nobj)).astype(float)
+        time = rng.integers(0, 20, size=50)
+        ref = np.full(nobj, 5.0)
+        trajectory = eaf.hypervolume_trajectory(points, time, ref)
+        np.testing.assert_array_equal(trajectory[:, 0], np.unique(time))
+        for t, hv in trajectory:
+            prefix = np.ascontiguousarray(points[time <= t])
+            assert hv == pytest.approx(eaf.hypervolume(prefix, ref))
+
+    # Mutually nondominated points, which are all kept.
+    front = np.abs(rng.standard_normal((3000, 3)))
+    front /= np.linalg.norm(front, axis=1, keepdims=True)
+    checkpoints = [1, 10, 100, 1000, 2999]
+    trajectory = eaf.hypervolume_trajectory(
+        front, np.arange(3000), [1, 1, 1], checkpoints
+    )
+    for t, hv in trajectory:
+        prefix = np.ascontiguousarray(front[: int(t) + 1])
+        assert hv == pytest.approx(eaf.hypervolume(prefix, [1, 1, 1]))
+
+    dataset = eaf.read_datasets("tests/test_data/spherical-250-10-3d.txt")
+    time = rng.permutation(len(dataset))
+    checkpoints = [0, 500, 1000, 2500]
+    trajectories = eaf.hypervolume_trajectory_sets(
+        dataset, time, [10, 10, 10], checkpoints
+    )
+    assert trajectories.shape == (40, 3)
+    for t, hv, s in trajectories:
+        prefix = dataset[(dataset[:, -1] == s) & (time <= t), :-1]
+        assert hv == pytest.approx(
+            eaf.hypervolume(np.ascontiguousarray(prefix), [10, 10, 10])
+        )
+    for time in [np.arange(len(points) - 1), 3.0, np.ones((len(points), 1))]:
+        with pytest.raises(ValueError, match="one value per point"):
+            eaf.hypervolume_trajectory(points, time, ref)
+        with pytest.raises(ValueError, match="one value per point"):
+            eaf.hypervolume_trajectory_sets(dataset, time, [10, 10, 10])
+
+
+def test_hv_subset_selection():
+    rng = np.random.default_rng(2)
+    points = rng.random((12, 2))
+    ref = [1.0, 1.0]
+    nondominated = np.flatnonzero(eaf.is_nondominated(points))
+    for k in range(1, len(nondominated) + 1):
+        best = max(
+            eaf.hypervolume(points[list(subset)], ref)
+            for subset in itertools.combinations(nondominated, k)
+        )
+        exact = eaf.hv_subset_selection(points, ref, k, method="exact2d")
+        assert len(exact) == k
+        assert eaf.hypervolume(points[exact], ref) == pytest.approx(best)
+        greedy = eaf.hv_subset_selection(points, ref, k)
+        assert eaf.hypervolume(points[greedy], ref) >= (1 - 1 / math.e) * best
+    np.testing.assert_array_equal(
+        eaf.hv_subset_selection(points, ref, 100), np.sort(nondominated)
+    )
+
+    # Greedy selection in 3D matches recomputing the hypervolume of each candidate.
+    points = eaf.generate_nondominated_sets(30, nobj=3, nsets=1, seed=3)[:, :3]
+    ref = points.max(axis=0) + 0.1
+    selected = []
+    for _ in range(5):
+        selected.append(
+            max(
+                set(range(len(points))) - set(selected),
+                key=lambda i: eaf.hypervolume(points[selected + [i]], ref),
+            )
+        )
+    np.testing.assert_array_equal(
+        eaf.hv_subset_selection(points, ref, 5), sorted(selected)
+    )
+    with pytest.raises(ValueError, match="2 objectives"):
+        eaf.hv_subset_selection(points, ref, 5, method="exact2d")